@@ -21,7 +21,7 @@ a = Analysis(
         'pandas',
         'matplotlib',
         'matplotlib.backends.backend_agg',  # 明确指定 Agg 后端
-        'plottable',
+        'psutil',
     ],
     hookspath=[],
     hooksconfig={},
@@ -122,7 +122,7 @@ echo 目标版本: v%CURRENT_VERSION%
 echo.
 
 :: 定义需要迁移的用户数据文件夹/文件
-set "USER_DIRS=GPC_output Mw_output DSC_Pic DSC_Cycle logs setting datapath"
+set "USER_DIRS=GPC_output Mw_output DSC_Pic DSC_Cycle DSC_Result logs setting datapath"
 
 :: 迁移用户数据
 echo [1/3] 正在迁移用户数据...
@@ -0,0 +1,411 @@
+"""
+性能基准测试 - 使用合成数据测量 GPC / Mw / DSC 分析流程各阶段的耗时
+
+用法:
+    python benchmark.py                          # 运行默认规模 (small, medium)
+    python benchmark.py --sizes small medium large
+    python benchmark.py --save-baseline          # 将结果保存为基准
+    python benchmark.py --baseline bench_baseline.json --tolerance 0.3
+
+每个用例在独立子进程中运行，峰值内存 (RSS) 互不干扰；与基准相比任一用例总耗时
+超过容限或结果校验值不一致时，以退出码 1 结束。
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# 各规模的合成数据参数
+BENCHMARK_SIZES: Dict[str, Dict[str, Dict[str, int]]] = {
+    "small": {
+        "rst": {"files": 20, "peaks": 2, "rows": 500},
+        "dsc": {"files": 2, "cycles": 3, "rows": 10000},
+    },
+    "medium": {
+        "rst": {"files": 100, "peaks": 3, "rows": 2000},
+        "dsc": {"files": 4, "cycles": 10, "rows": 50000},
+    },
+    "large": {
+        "rst": {"files": 400, "peaks": 3, "rows": 5000},
+        "dsc": {"files": 2, "cycles": 30, "rows": 100000},
+    },
+}
+DEFAULT_SIZES = ["small", "medium"]
+DEFAULT_BASELINE = "bench_baseline.json"
+DEFAULT_TOLERANCE = 0.25  # 允许的耗时增幅（相对基准）
+
+
+def generate_rst(path: str, sample_name: str, peaks: int = 2, rows: int = 500, seed: int = 0) -> None:
+    """生成合成 GPC .rst 文件（ASCII，制表符分隔）
+
+    结构与 preprocess_common / GPCAnalyzer.preprocess 的解析逻辑一致：
+    Sample Name、<MW_Averages> 区域（两行表头 + 每峰一行）、<Slice_Table> 区域（每峰一段）。
+
+    Args:
+        path: 输出文件路径
+        sample_name: 样品名称
+        peaks: 峰数
+        rows: 每个峰的切片行数
+        seed: 随机种子
+    """
+    rng = np.random.default_rng(seed)
+    averages = []
+    slices = []
+    for peak_idx in range(peaks):
+        center = rng.uniform(4.0, 5.5) + peak_idx * 0.4
+        width = rng.uniform(0.25, 0.45)
+        log_mw = np.linspace(center + 1.8, center - 1.8, rows)
+        weight = np.exp(-0.5 * ((log_mw - center) / width) ** 2)
+        weight /= weight.sum()
+        mw = 10 ** log_mw
+
+        mn = 1 / np.sum(weight / mw)
+        mw_avg = np.sum(weight * mw)
+        mz = np.sum(weight * mw ** 2) / mw_avg
+        mz1 = np.sum(weight * mw ** 3) / np.sum(weight * mw ** 2)
+        averages.append("%d\t%.0f\t%.0f\t%.0f\t%.0f\t%.0f\t%.0f\t%.4f" % (
+            peak_idx + 1, mw[np.argmax(weight)], mn, mw_avg, mz, mz1, mw_avg * 0.9, mw_avg / mn))
+        slices.append((log_mw, weight, mw))
+
+    lines = [f"Sample Name\t{sample_name}", "Instrument\tSynthetic",
+             "<MW_Averages>", "Peak\tMp\tMn\tMw\tMz\tMz+1\tMv\tPD", "\t(g/mol)"]
+    lines += averages
+    lines += ["</MW_Averages>", "<Slice_Table>"]
+    for peak_idx, (log_mw, weight, mw) in enumerate(slices):
+        lines.append(f"Peak {peak_idx + 1}")
+        lines.append("RT\tArea\tNorm\tCum\tMW\tlogM\tdwdlogM\tFlag")
+        retention = 12.0 + np.arange(rows) * 0.01
+        cumulative = np.cumsum(weight)
+        lines += ["%.4f\t%.4f\t%.8f\t%.6f\t%.2f\t%.5f\t%.5f\t0" % row for row in zip(
+            retention, weight * 1000, weight, cumulative, mw, log_mw, weight * 100)]
+    lines.append("</Slice_Table>")
+
+    with open(path, "w", encoding="ascii") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def generate_dsc(path: str, cycles: int = 3, rows: int = 10000, seed: int = 0) -> None:
+    """生成合成 TA 风格 DSC .txt 文件（UTF-16）
+
+    方法与 DSCAnalyzer.preprocess 的约定一致：先平衡、起始等温，之后每段为“升/降温、等温、标记”。
+    每个循环包含升温段和降温段（升降温各 rows 行，段末等温按相同采样率），段之间以 -2 开头的分隔行隔开；
+    第一段开头另有起始等温的数据，最后一段之后没有等温数据（解析时最后一段不扣除等温时间）。
+    升温段含玻璃化台阶和熔融吸热峰，降温段含结晶放热峰。
+
+    Args:
+        path: 输出文件路径
+        cycles: 循环数
+        rows: 每段升降温的数据行数
+        seed: 随机种子
+    """
+    rng = np.random.default_rng(seed)
+    low, high, rate, hold = 40.0, 200.0, 10.0, 2.0
+
+    header = ["Filename\tsynthetic", "Sig1 Time min", "Sig2 Temperature °C", "Sig3 Heat Flow W/g",
+              f"OrgMethod1: Equilibrate at {low:.2f} °C",
+              f"OrgMethod2: Isothermal for {hold:.2f} min"]
+    method_idx = 3
+    for _ in range(cycles):
+        for target in (high, low):
+            header.append(f"OrgMethod{method_idx}: Ramp {rate:.2f} °C/min to {target:.2f} °C")
+            header.append(f"OrgMethod{method_idx + 1}: Isothermal for {hold:.2f} min")
+            header.append(f"OrgMethod{method_idx + 2}: Mark end of cycle 0")
+            method_idx += 3
+    header.append("StartOfData")
+
+    ramp_minutes = (high - low) / rate
+    hold_rows = max(int(rows * hold / ramp_minutes), 2)
+
+    def isothermal(start_time: float, temperature: float) -> np.ndarray:
+        """等温段数据：时间、恒定温度、基线热流"""
+        time_col = start_time + np.linspace(0, hold, hold_rows)
+        flow = -0.05 + 0.0004 * (temperature - low) + rng.normal(0, 0.002, hold_rows)
+        return np.column_stack([time_col, np.full(hold_rows, temperature), flow])
+
+    current_time = 0.0
+    with open(path, "w", encoding="utf-16") as f:
+        f.write("\n".join(header) + "\n")
+        start_hold = isothermal(current_time, low)
+        f.write("\n".join("%.6f\t%.4f\t%.6f" % tuple(row) for row in start_hold) + "\n")
+        current_time = start_hold[-1, 0]
+        for cycle_idx in range(cycles):
+            for heating in (True, False):
+                time_col = current_time + np.linspace(0, ramp_minutes, rows)
+                temp = np.linspace(low, high, rows) if heating else np.linspace(high, low, rows)
+                flow = -0.05 + 0.0004 * (temp - low) + rng.normal(0, 0.002, rows)
+                if heating:
+                    flow -= 0.03 / (1 + np.exp(-(temp - 70.0) / 1.5))  # 玻璃化台阶
+                    flow -= 0.8 * np.exp(-0.5 * ((temp - 160.0 - cycle_idx * 0.2) / 2.5) ** 2)  # 熔融
+                else:
+                    flow += 0.6 * np.exp(-0.5 * ((temp - 115.0) / 3.0) ** 2)  # 结晶
+                block = np.column_stack([time_col, temp, flow])
+                last = cycle_idx == cycles - 1 and not heating
+                if not last:
+                    block = np.vstack([block, isothermal(time_col[-1], temp[-1])])
+                f.write("\n".join("%.6f\t%.4f\t%.6f" % tuple(row) for row in block) + "\n")
+                current_time = block[-1, 0]
+                if not last:
+                    f.write("-2.000000\t0\t0\n")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """获取当前进程的峰值常驻内存
+
+    Returns:
+        峰值RSS（MB），平台不支持时返回None
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 返回字节，Linux 返回 KB
+        return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def _stage_seconds(records: List[Dict[str, Any]]) -> Dict[str, float]:
+    """按阶段汇总 StageTimer 记录
+
+    Args:
+        records: StageTimer.records
+
+    Returns:
+        阶段名 -> 总耗时（秒）
+    """
+    stages: Dict[str, float] = {}
+    for record in records:
+        stages[record["stage"]] = stages.get(record["stage"], 0.0) + record["seconds"]
+    return stages
+
+
+def _prepare_analyzer(analyzer: Any, output_dir: str) -> None:
+    """将分析器的输出目录指向临时目录（数据目录由构造参数 datadir 指定）"""
+    for attr in ("output_dir", "cycle_dir", "pic_dir", "result_dir"):
+        if hasattr(analyzer, attr):
+            setattr(analyzer, attr, os.path.join(output_dir, attr))
+
+
+def run_case(kind: str, size: str, workdir: str) -> Dict[str, Any]:
+    """运行单个基准用例（在子进程中调用）
+
+    Args:
+        kind: 用例类型 (gpc / mw / dsc)
+        size: 数据规模名称
+        workdir: 临时工作目录
+
+    Returns:
+        用例结果字典
+    """
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main
+
+    # 测量的是绘图本身，不使用（也不写入）渲染图片缓存
+    os.environ[main.FIGURE_CACHE_ENV_VAR] = "0"
+    params = BENCHMARK_SIZES[size]["dsc" if kind == "dsc" else "rst"]
+    data_dir = os.path.join(workdir, "data")
+    output_dir = os.path.join(workdir, "output")
+    os.makedirs(data_dir, exist_ok=True)
+
+    generate_start = time.perf_counter()
+    if kind == "dsc":
+        for file_idx in range(params["files"]):
+            generate_dsc(os.path.join(data_dir, f"DSC{file_idx:03d}.txt"), params["cycles"], params["rows"], seed=file_idx)
+    else:
+        for file_idx in range(params["files"]):
+            generate_rst(os.path.join(data_dir, f"S{file_idx:04d}.rst"), f"S{file_idx:04d}",
+                         params["peaks"], params["rows"], seed=file_idx)
+    generate_seconds = time.perf_counter() - generate_start
+    input_mb = sum(os.path.getsize(os.path.join(data_dir, name)) for name in os.listdir(data_dir)) / (1024 * 1024)
+
+    checks: Dict[str, Any] = {}
+    start = time.perf_counter()
+    if kind == "gpc":
+        analyzer = main.GPCAnalyzer(data_dir, "bench", display_mode=False, save_figure_file_gpc=False)
+        _prepare_analyzer(analyzer, output_dir)
+        analyzer.run()
+        table = analyzer.batch_mw_table()
+        checks = {"peaks": int(len(table)), "mw_sum": round(float(table["Mw"].sum()), 1)}
+    elif kind == "mw":
+        analyzer = main.MolecularWeightAnalyzer(data_dir)
+        _prepare_analyzer(analyzer, output_dir)
+        analyzer.selected_file = sorted(os.listdir(data_dir))
+        analyzer.run()
+        checks = {"images": len([n for n in os.listdir(analyzer.output_dir) if n.endswith(".png")])}
+    else:
+        analyzer = main.DSCAnalyzer(data_dir, display_pic=False)
+        _prepare_analyzer(analyzer, output_dir)
+        analyzer.run()
+        # 每个文件的每一段都应解析出数据，否则基准漏测了空段的拟合和绘图
+        expected = params["files"] * params["cycles"] * 2
+        segments = sum(len(curves) for curves in analyzer.cycle_store.values())
+        if segments != expected:
+            raise RuntimeError(f"合成 DSC 数据有空段: 非空段 {segments}，应为 {expected}")
+        checks = {"cycles": len([n for n in os.listdir(analyzer.cycle_dir) if n.startswith("Cycle")]),
+                  "segments": segments}
+    total_seconds = time.perf_counter() - start
+
+    return {
+        "kind": kind,
+        "size": size,
+        "params": params,
+        "files": params["files"],
+        "input_mb": round(input_mb, 3),
+        "generate_seconds": round(generate_seconds, 3),
+        "total_seconds": round(total_seconds, 4),
+        "files_per_second": round(params["files"] / total_seconds, 3) if total_seconds > 0 else None,
+        "mb_per_second": round(input_mb / total_seconds, 3) if total_seconds > 0 else None,
+        "stages": {name: round(value, 4) for name, value in _stage_seconds(analyzer.timer.records).items()},
+        "peak_rss_mb": peak_rss_mb(),
+        "checks": checks,
+    }
+
+
+def run_case_subprocess(kind: str, size: str) -> Dict[str, Any]:
+    """在独立子进程中运行用例，保证峰值内存统计互不影响
+
+    Args:
+        kind: 用例类型
+        size: 数据规模名称
+
+    Returns:
+        用例结果字典；失败时包含 error 字段
+    """
+    with tempfile.TemporaryDirectory(prefix="polyanalyzer_bench_") as workdir:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", kind, size, workdir],
+            capture_output=True, text=True, cwd=workdir)
+    if proc.returncode != 0:
+        return {"kind": kind, "size": size, "error": proc.stderr.strip().splitlines()[-1:] or ["unknown"]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """与基准结果比较
+
+    Args:
+        results: 本次结果
+        baseline: 基准结果（compare 的 key 为 "kind/size"）
+        tolerance: 允许的耗时增幅
+
+    Returns:
+        回归问题描述列表，为空表示无回归
+    """
+    problems = []
+    for result in results:
+        key = f"{result['kind']}/{result['size']}"
+        reference = baseline.get("cases", {}).get(key)
+        if reference is None or "error" in result:
+            continue
+        ratio = result["total_seconds"] / reference["total_seconds"] if reference["total_seconds"] else 1.0
+        if ratio > 1 + tolerance:
+            problems.append(f"{key}: 总耗时 {result['total_seconds']:.3f}s 为基准的 {ratio:.2f} 倍")
+        if result.get("checks") != reference.get("checks"):
+            problems.append(f"{key}: 结果校验值变化 {reference.get('checks')} -> {result.get('checks')}")
+    return problems
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """将结果格式化为文本表格
+
+    Args:
+        results: 用例结果列表
+
+    Returns:
+        表格文本
+    """
+    stage_names = []
+    for result in results:
+        for name in result.get("stages", {}):
+            if name not in stage_names:
+                stage_names.append(name)
+
+    header = ["case", "total(s)", "files/s", "MB/s", "RSS(MB)"] + stage_names
+    rows = [header]
+    for result in results:
+        case = f"{result['kind']}/{result['size']}"
+        if "error" in result:
+            rows.append([case, "ERROR: " + " ".join(result["error"])])
+            continue
+        rss = result.get("peak_rss_mb")
+        rows.append([case, f"{result['total_seconds']:.3f}", str(result["files_per_second"]),
+                     str(result["mb_per_second"]), f"{rss:.1f}" if rss else "-"] +
+                    [f"{result['stages'].get(name, 0.0):.3f}" for name in stage_names])
+    widths = [max(len(row[i]) for row in rows if i < len(row)) for i in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)) for row in rows)
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    """命令行入口
+
+    Returns:
+        退出码
+    """
+    parser = argparse.ArgumentParser(description="PolyAnalyzer 性能基准测试")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, choices=list(BENCHMARK_SIZES))
+    parser.add_argument("--kinds", nargs="+", default=["gpc", "mw", "dsc"], choices=["gpc", "mw", "dsc"])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基准结果文件")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基准")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许的耗时增幅")
+    parser.add_argument("--output", help="将完整结果写入 JSON 文件")
+    parser.add_argument("--worker", nargs=3, metavar=("KIND", "SIZE", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        kind, size, workdir = args.worker
+        print(json.dumps(run_case(kind, size, workdir)))
+        return 0
+
+    results = []
+    for size in args.sizes:
+        for kind in args.kinds:
+            print(f"运行 {kind}/{size} ...", flush=True)
+            results.append(run_case_subprocess(kind, size))
+    print(format_results(results))
+
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": {f"{r['kind']}/{r['size']}": r for r in results},
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"基准已保存: {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare_with_baseline(results, baseline, args.tolerance)
+        for problem in problems:
+            print("回归: " + problem)
+        if problems:
+            return 1
+        print("与基准相比无回归")
+
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,573 @@
+"""
+缓存模块 - 进程级共享缓存
+
+Streamlit 每次重新运行都会重新执行 main.py，其中的模块级变量随之重置；
+本模块作为普通模块只导入一次，因此这里的缓存可以在多次重新运行、多个会话之间共享。
+"""
+
+import copy
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from stat import S_ISREG
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# 可选依赖：watchdog 可用时监听目录事件，文件原地改写（目录 mtime 不变）也能及时失效
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# 目录 mtime 与扫描时间相差不足此秒数时，同一时间刻度内仍可能有文件变动，下次读取重新扫描
+DIRECTORY_RACY_SECONDS = 2.0
+
+# 渲染图片缓存的磁盘条目后缀（条目可以是任意输出格式的图片字节）
+FIGURE_CACHE_SUFFIX = ".fig"
+
+
+class MtimeCache:
+    """基于文件修改时间的缓存 - 文件的 mtime 或大小变化后自动失效"""
+
+    def __init__(self) -> None:
+        """初始化缓存"""
+        self._entries: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp(path: str) -> Tuple[int, int]:
+        """获取文件的版本标记
+
+        Args:
+            path: 文件或目录路径
+
+        Returns:
+            (mtime_ns, size) 元组
+        """
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path: str, loader: Callable[[str], Any], copy_result: bool = True) -> Any:
+        """读取缓存，失效时调用 loader 重新加载
+
+        Args:
+            path: 文件或目录路径
+            loader: 加载函数，参数为路径
+            copy_result: 是否返回深拷贝；调用方只读时可关闭，避免复制大对象
+
+        Returns:
+            缓存值（copy_result 为True时为深拷贝，调用方可以放心修改）
+
+        Raises:
+            OSError: 路径不存在或无法访问
+        """
+        key = os.path.abspath(path)
+        stamp = self._stamp(key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            return copy.deepcopy(entry[1]) if copy_result else entry[1]
+
+        value = loader(key)
+        with self._lock:
+            self._entries[key] = (stamp, value)
+        return copy.deepcopy(value) if copy_result else value
+
+    def invalidate(self, path: str) -> None:
+        """使指定路径的缓存失效
+
+        Args:
+            path: 文件或目录路径
+        """
+        with self._lock:
+            self._entries.pop(os.path.abspath(path), None)
+
+    def clear(self) -> None:
+        """清空全部缓存"""
+        with self._lock:
+            self._entries.clear()
+
+
+class FileEntry(NamedTuple):
+    """目录索引中的文件记录"""
+    name: str
+    size: int
+    mtime_ns: int
+
+
+class _InvalidateHandler(FileSystemEventHandler):
+    """watchdog 事件处理：目录内任何变动都使对应索引失效"""
+
+    def __init__(self, index: "DirectoryIndex", path: str) -> None:
+        """初始化事件处理器
+
+        Args:
+            index: 目录索引
+            path: 被监听的目录
+        """
+        super().__init__()
+        self._index = index
+        self._path = path
+
+    def on_any_event(self, event: Any) -> None:
+        """收到事件时使目录索引失效（只读打开、关闭不算变动）"""
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        self._index.invalidate(self._path)
+
+
+class DirectoryIndex:
+    """目录索引 - 缓存目录下文件的名称、大小和修改时间，供所有分析器共用
+
+    以目录的 mtime 作为版本标记：增删、重命名文件都会更新目录 mtime，此时重新扫描整个目录；
+    否则每次读取只需对目录本身做一次 stat。安装了 watchdog 时还会监听目录事件，
+    文件原地改写（不改变目录 mtime）也会使索引失效。网络共享上收不到远端写入的事件，
+    因此索引只用于文件列表，单个文件的大小和修改时间由 stat 直接读取。
+    """
+
+    def __init__(self, watch: bool = True) -> None:
+        """初始化目录索引
+
+        Args:
+            watch: watchdog 可用时是否监听目录事件
+        """
+        # 目录 -> (目录 mtime, 文件记录, 通配符 -> 匹配的文件名)
+        self._entries: Dict[str, Tuple[int, Dict[str, FileEntry], Dict[str, List[str]]]] = {}
+        self._lock = threading.Lock()
+        self._observer = None
+        self._watched: set = set()
+        self._watch = watch and Observer is not None
+
+    def _start_watch(self, path: str) -> None:
+        """开始监听目录（每个目录只注册一次，失败时退回仅依赖目录 mtime）
+
+        Args:
+            path: 目录绝对路径
+        """
+        if not self._watch or path in self._watched:
+            return
+        self._watched.add(path)
+        try:
+            if self._observer is None:
+                self._observer = Observer()
+                self._observer.daemon = True
+                self._observer.start()
+            self._observer.schedule(_InvalidateHandler(self, path), path, recursive=False)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _scan(path: str) -> Dict[str, FileEntry]:
+        """扫描目录中的普通文件
+
+        Args:
+            path: 目录绝对路径
+
+        Returns:
+            文件名 -> FileEntry，顺序与目录遍历顺序一致
+        """
+        entries = {}
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries[entry.name] = FileEntry(entry.name, stat.st_size, stat.st_mtime_ns)
+        return entries
+
+    def _current(self, path: str) -> Tuple[int, Dict[str, FileEntry], Dict[str, List[str]]]:
+        """获取目录的最新索引（内部共享，调用方不可修改）
+
+        Args:
+            path: 目录绝对路径
+
+        Returns:
+            (目录 mtime, 文件记录, 通配符匹配缓存)
+
+        Raises:
+            OSError: 目录不存在或无法访问
+        """
+        stamp = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._entries.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached
+
+        self._start_watch(path)
+        scanned_at = time.time_ns()
+        current = (stamp, self._scan(path), {})
+        # 扫描时目录刚被修改过，可能漏掉同一时间刻度内的变动，不缓存
+        if scanned_at - stamp > DIRECTORY_RACY_SECONDS * 1e9:
+            with self._lock:
+                self._entries[path] = current
+        return current
+
+    def entries(self, path: str) -> Dict[str, FileEntry]:
+        """获取目录中全部文件的记录，目录变化后自动重新扫描
+
+        Args:
+            path: 目录路径
+
+        Returns:
+            文件名 -> FileEntry（副本，调用方可以修改）
+
+        Raises:
+            OSError: 目录不存在或无法访问
+        """
+        return dict(self._current(os.path.abspath(path))[1])
+
+    def files(self, path: str, pattern: str = "*") -> List[str]:
+        """获取目录中匹配通配符的文件名（与 glob 一致：忽略隐藏文件，大小写规则随平台）
+
+        Args:
+            path: 目录路径
+            pattern: 通配符，例如 "*.rst"
+
+        Returns:
+            文件名列表（副本）；目录不存在时返回空列表
+        """
+        try:
+            _, entries, matches = self._current(os.path.abspath(path))
+        except OSError:
+            return []
+        names = matches.get(pattern)
+        if names is None:
+            names = [name for name in fnmatch.filter(entries, pattern) if not name.startswith(".")]
+            with self._lock:
+                matches[pattern] = names
+        return list(names)
+
+    def stat(self, path: str) -> Optional[FileEntry]:
+        """获取单个文件的记录（直接 stat 文件本身，不使用索引：原地改写不改变目录 mtime，
+        索引中的大小和修改时间可能已过期）
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            FileEntry，文件不存在、不是普通文件或无法访问时返回None
+        """
+        path = os.path.abspath(path)
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        if not S_ISREG(info.st_mode):
+            return None
+        return FileEntry(os.path.basename(path), info.st_size, info.st_mtime_ns)
+
+    def invalidate(self, path: str) -> None:
+        """使指定目录的索引失效
+
+        Args:
+            path: 目录路径
+        """
+        with self._lock:
+            self._entries.pop(os.path.abspath(path), None)
+
+    def clear(self) -> None:
+        """清空全部索引"""
+        with self._lock:
+            self._entries.clear()
+
+
+class FigureCache:
+    """渲染图片缓存 - 按内容寻址的图片字节缓存
+
+    键由图形类型、数据摘要和设置计算得到，相同的绘图请求直接返回编码后的图片，不再调用 matplotlib。
+    两级存储：内存 LRU 和磁盘目录，各有容量上限，超出时淘汰最久未使用的条目；
+    磁盘条目的最近使用时间记录在文件 mtime 上，进程重启后仍可按 LRU 淘汰。
+    """
+
+    def __init__(self, disk_dir: Optional[str], memory_limit: int, disk_limit: int) -> None:
+        """初始化图片缓存
+
+        Args:
+            disk_dir: 磁盘缓存目录，为None时只使用内存
+            memory_limit: 内存层容量上限（字节）
+            disk_limit: 磁盘层容量上限（字节）
+        """
+        self.disk_dir = disk_dir
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._disk: Optional["OrderedDict[str, int]"] = None  # 键 -> 文件大小，按最近使用排序（首次使用时扫描目录）
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(kind: str, data_digest: str, settings: Dict[str, Any]) -> str:
+        """计算缓存键
+
+        Args:
+            kind: 图形类型
+            data_digest: 绘图数据的摘要
+            settings: 影响图片内容的设置（可 JSON 序列化，其余类型按 str 处理）
+
+        Returns:
+            十六进制摘要
+        """
+        payload = json.dumps({"kind": kind, "data": data_digest, "settings": settings}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """磁盘条目路径（按键的前两位分子目录）"""
+        return os.path.join(self.disk_dir, key[:2], key + FIGURE_CACHE_SUFFIX)
+
+    def _load_disk_index(self) -> "OrderedDict[str, int]":
+        """扫描磁盘缓存目录，按 mtime 排序建立 LRU 索引（调用方持有锁）"""
+        if self._disk is not None:
+            return self._disk
+        found = []
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for root, _, names in os.walk(self.disk_dir):
+                for name in names:
+                    if not name.endswith(FIGURE_CACHE_SUFFIX):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime_ns, name[:-len(FIGURE_CACHE_SUFFIX)], stat.st_size))
+        found.sort()
+        self._disk = OrderedDict((key, size) for _, key, size in found)
+        self._disk_size = sum(size for _, _, size in found)
+        return self._disk
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """放入内存层并淘汰超出容量的条目（调用方持有锁）"""
+        if len(data) > self.memory_limit:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存的图片
+
+        Args:
+            key: make_key 计算的缓存键
+
+        Returns:
+            图片字节，未命中时返回None
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+            disk = self._load_disk_index() if self.disk_dir else None
+            if not disk or key not in disk:
+                self.misses += 1
+                return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            data = None  # 已被清理或被其他进程淘汰
+        with self._lock:
+            if data is None:
+                size = disk.pop(key, None)
+                if size is not None:
+                    self._disk_size -= size
+                self.misses += 1
+                return None
+            if key in disk:
+                disk.move_to_end(key)
+            self._remember(key, data)
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """写入缓存（内存层和磁盘层）
+
+        Args:
+            key: make_key 计算的缓存键
+            data: 图片字节（PNG、WebP、SVG 或 PDF）
+        """
+        with self._lock:
+            self._remember(key, data)
+        if not self.disk_dir or len(data) > self.disk_limit:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        evicted = []
+        with self._lock:
+            disk = self._load_disk_index()
+            self._disk_size -= disk.pop(key, 0)
+            disk[key] = len(data)
+            self._disk_size += len(data)
+            while self._disk_size > self.disk_limit and len(disk) > 1:
+                old_key, size = disk.popitem(last=False)
+                self._disk_size -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        """清空内存层，并在下次使用时重新扫描磁盘层"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            self._disk = None
+            self._disk_size = 0
+
+
+class MemoryTracer:
+    """tracemalloc 使用登记 - 协调同一进程内多个会话对 tracemalloc 的开启、关闭和峰值重置
+
+    tracemalloc 是进程级的，Streamlit 的多个会话共享同一进程；登记计数放在本模块中，
+    所有会话和每次重新运行看到的是同一个计数器和锁。
+    """
+
+    def __init__(self) -> None:
+        """初始化登记"""
+        self._lock = threading.Lock()
+        self._users = 0  # 正在使用 tracemalloc 的运行数
+        self._owned = False  # tracemalloc 是否由这里开启（外部开启的不在这里关闭）
+        self._starts = 0  # 累计登记次数，用于判断测量期间是否有其他运行加入
+
+    def start(self) -> None:
+        """登记一次使用，第一个使用者负责开启"""
+        with self._lock:
+            if self._users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owned = True
+            self._users += 1
+            self._starts += 1
+
+    def stop(self) -> None:
+        """注销一次使用，最后一个使用者结束时才关闭，不打断其他会话正在进行的记录"""
+        with self._lock:
+            self._users = max(self._users - 1, 0)
+            if self._users == 0 and self._owned:
+                tracemalloc.stop()
+                self._owned = False
+
+    def begin_peak(self) -> Optional[int]:
+        """开始测量一段峰值：只有一个运行在使用时才重置峰值，避免清掉其他运行正在测量的峰值
+
+        Returns:
+            测量标记，交给 is_exclusive；已有其他运行在使用时返回None
+        """
+        with self._lock:
+            if self._users > 1:
+                return None
+            tracemalloc.reset_peak()
+            return self._starts
+
+    def is_exclusive(self, token: Optional[int]) -> bool:
+        """判断从 begin_peak 到现在是否一直只有一个运行在使用
+
+        Args:
+            token: begin_peak 的返回值
+
+        Returns:
+            是否独占；否则测得的峰值可能包含其他运行的分配
+        """
+        with self._lock:
+            return token is not None and token == self._starts and self._users <= 1
+
+
+# 全局实例
+_settings_cache = None
+_directory_index = None
+_archive_cache = None
+_figure_caches: Dict[Optional[str], FigureCache] = {}
+_figure_caches_lock = threading.Lock()
+_memory_tracer = MemoryTracer()
+
+def get_settings_cache() -> MtimeCache:
+    """获取设置文件缓存（设置内容与目录列表共用）
+
+    Returns:
+        MtimeCache实例
+    """
+    global _settings_cache
+    if _settings_cache is None:
+        _settings_cache = MtimeCache()
+    return _settings_cache
+
+
+def get_directory_index() -> DirectoryIndex:
+    """获取数据目录索引（GPC、Mw、DSC 分析器共用）
+
+    Returns:
+        DirectoryIndex实例
+    """
+    global _directory_index
+    if _directory_index is None:
+        _directory_index = DirectoryIndex()
+    return _directory_index
+
+
+def get_archive_cache() -> MtimeCache:
+    """获取压缩包成员列表缓存
+
+    Returns:
+        MtimeCache实例
+    """
+    global _archive_cache
+    if _archive_cache is None:
+        _archive_cache = MtimeCache()
+    return _archive_cache
+
+
+def get_figure_cache(disk_dir: Optional[str], memory_limit: int, disk_limit: int) -> FigureCache:
+    """获取渲染图片缓存（同一磁盘目录共用一个实例，容量以首次创建时为准）
+
+    Args:
+        disk_dir: 磁盘缓存目录，为None时只使用内存
+        memory_limit: 内存层容量上限（字节）
+        disk_limit: 磁盘层容量上限（字节）
+
+    Returns:
+        FigureCache实例
+    """
+    key = os.path.abspath(disk_dir) if disk_dir else None
+    with _figure_caches_lock:
+        cache = _figure_caches.get(key)
+        if cache is None:
+            cache = _figure_caches[key] = FigureCache(key, memory_limit, disk_limit)
+    return cache
+
+
+def get_memory_tracer() -> MemoryTracer:
+    """获取 tracemalloc 使用登记（进程内唯一）
+
+    Returns:
+        MemoryTracer实例
+    """
+    return _memory_tracer
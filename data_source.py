@@ -0,0 +1,421 @@
+"""
+数据源模块 - 分析器读取数据文件的统一入口
+
+分析器不再直接拼接路径打开文件，而是通过数据源列出和读取文件：
+- LocalDirectorySource：本地目录，文件列表来自共享的目录索引
+- ArchiveSource：zip/tar 压缩包，以流的方式直接读取其中的文件，无需先解压或复制到 datapath；zip 成员并行预读
+- NetworkShareSource：网络共享目录，处理当前文件时后台预读后续文件，掩盖网络延迟
+"""
+
+import fnmatch
+import io
+import os
+import platform
+import posixpath
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Dict, Iterable, List, Optional, Tuple, Union
+
+from caching import FileEntry, get_archive_cache, get_directory_index
+
+# 预读（网络共享、zip 压缩包）：同时预读的文件数，以及预读缓冲的总内存上限（超过 上限/文件数 的大文件不预读）
+DATA_SOURCE_READAHEAD_FILES = 4
+DATA_SOURCE_READAHEAD_MB = 256
+NETWORK_FILESYSTEMS = {"cifs", "smb3", "smbfs", "nfs", "nfs4", "afpfs", "fuse.sshfs", "sshfs", "9p"}  # 视为网络共享的文件系统类型
+
+
+class DataSource:
+    """数据源基类 - 按文件名列出、查询和打开数据文件
+
+    子类实现 _scan（文件记录）和 _open_raw（二进制流）；预读（readahead_files > 0 时）在基类中统一处理：
+    prefetch 登记处理顺序后，后台线程按顺序把后续文件读入内存，open 时直接使用已读入的字节。
+    """
+
+    readahead_files = 0  # 同时预读的文件数，0 表示不预读
+
+    def __init__(self, location: str) -> None:
+        """初始化数据源
+
+        Args:
+            location: 目录或压缩包路径
+        """
+        self.location = location
+        self._queue: List[str] = []
+        self._pending: Dict[str, Future] = {}
+        self._current: Optional[Tuple[str, bytes]] = None  # 最近一次打开的预读文件，同一文件再次打开时复用
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> Dict[str, FileEntry]:
+        """获取数据源中全部文件的记录
+
+        Returns:
+            文件名 -> FileEntry
+
+        Raises:
+            OSError: 数据源不存在或无法访问
+        """
+        raise NotImplementedError
+
+    def _open_raw(self, name: str) -> IO[bytes]:
+        """以二进制方式打开文件
+
+        Args:
+            name: 文件名
+
+        Returns:
+            二进制流
+
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
+        raise NotImplementedError
+
+    def refresh(self) -> None:
+        """丢弃缓存的文件列表，下次读取时重新扫描"""
+
+    def entries(self) -> Dict[str, FileEntry]:
+        """获取全部文件的记录（名称、大小、修改时间）
+
+        Returns:
+            文件名 -> FileEntry；数据源无法访问时返回空字典
+        """
+        try:
+            return dict(self._scan())
+        except OSError:
+            return {}
+
+    def files(self, pattern: str = "*") -> List[str]:
+        """获取匹配通配符的文件名（忽略隐藏文件，大小写规则随平台）
+
+        Args:
+            pattern: 通配符，例如 "*.rst"
+
+        Returns:
+            文件名列表
+        """
+        try:
+            names = self._scan()
+        except OSError:
+            return []
+        return [name for name in fnmatch.filter(names, pattern) if not name.startswith(".")]
+
+    def stat(self, name: str) -> Optional[FileEntry]:
+        """获取单个文件的记录
+
+        Args:
+            name: 文件名
+
+        Returns:
+            FileEntry，文件不存在时返回None
+        """
+        try:
+            return self._scan().get(name)
+        except OSError:
+            return None
+
+    def size(self, name: str) -> int:
+        """获取文件大小（字节）
+
+        Args:
+            name: 文件名
+
+        Returns:
+            文件大小
+
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
+        entry = self.stat(name)
+        if entry is None:
+            raise FileNotFoundError(name)
+        return entry.size
+
+    def prefetch(self, names: Iterable[str]) -> None:
+        """登记接下来的处理顺序，后台按顺序预读（不支持预读的数据源忽略）
+
+        Args:
+            names: 按处理顺序排列的文件名
+        """
+        if self.readahead_files <= 0:
+            return
+        limit = DATA_SOURCE_READAHEAD_MB * 1024 * 1024 / self.readahead_files
+        with self._lock:
+            self._cancel_pending()
+            self._queue = [name for name in names if (self.stat(name) or FileEntry(name, 0, 0)).size <= limit]
+        self._fill()
+
+    def _read_bytes(self, name: str) -> bytes:
+        """读入整个文件（预读线程中执行）"""
+        with self._open_raw(name) as raw:
+            return raw.read()
+
+    def _fill(self) -> None:
+        """补足预读窗口"""
+        with self._lock:
+            while self._queue and len(self._pending) < self.readahead_files:
+                name = self._queue.pop(0)
+                if name in self._pending:
+                    continue
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.readahead_files, thread_name_prefix="prefetch")
+                self._pending[name] = self._executor.submit(self._read_bytes, name)
+
+    def _cancel_pending(self) -> None:
+        """取消尚未开始的预读（调用方持有锁）"""
+        for future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+        self._queue = []
+
+    def open(self, name: str, encoding: Optional[str] = None, errors: str = "strict") -> Union[IO[bytes], IO[str]]:
+        """打开文件
+
+        Args:
+            name: 文件名
+            encoding: 文本编码，为None时以二进制方式打开
+            errors: 解码错误处理方式
+
+        Returns:
+            二进制流或文本流（可用作上下文管理器）
+
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
+        raw = None
+        future = None
+        with self._lock:
+            if self._current is not None and self._current[0] == name:
+                raw = io.BytesIO(self._current[1])
+            else:
+                future = self._pending.pop(name, None)
+                self._current = None
+        if raw is None and future is not None:
+            try:
+                data = future.result()
+            except Exception:
+                data = None  # 预读失败时直接读取，由直接读取报告错误
+            self._fill()
+            if data is not None:
+                with self._lock:
+                    self._current = (name, data)
+                raw = io.BytesIO(data)
+        if raw is None:
+            raw = self._open_raw(name)
+        if encoding is None:
+            return raw
+        return io.TextIOWrapper(raw, encoding=encoding, errors=errors)
+
+    def close(self) -> None:
+        """停止预读并释放打开的句柄（之后仍可继续使用，需要时重新打开）"""
+        with self._lock:
+            self._cancel_pending()
+            self._current = None
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.location!r})"
+
+
+class LocalDirectorySource(DataSource):
+    """本地目录数据源"""
+
+    def _scan(self) -> Dict[str, FileEntry]:
+        return get_directory_index().entries(self.location)
+
+    def files(self, pattern: str = "*") -> List[str]:
+        return get_directory_index().files(self.location, pattern)
+
+    def stat(self, name: str) -> Optional[FileEntry]:
+        return get_directory_index().stat(os.path.join(self.location, name))
+
+    def refresh(self) -> None:
+        get_directory_index().invalidate(self.location)
+
+    def _open_raw(self, name: str) -> IO[bytes]:
+        return open(os.path.join(self.location, name), "rb")
+
+
+class NetworkShareSource(LocalDirectorySource):
+    """网络共享目录数据源 - 与本地目录相同，但处理当前文件时后台预读后续文件"""
+
+    readahead_files = DATA_SOURCE_READAHEAD_FILES
+
+
+def _zip_timestamp(date_time: Tuple[int, int, int, int, int, int]) -> float:
+    """zip 成员的修改时间（本地时间）转换为时间戳"""
+    return time.mktime(date_time + (0, 0, -1))
+
+
+class ArchiveSource(DataSource):
+    """压缩包数据源 - 直接读取 zip/tar 中的文件，不写入磁盘
+
+    文件名取成员的文件名部分（去掉包内目录）；不同目录下的同名成员用包内路径（"/" 换成 "_"）区分。
+    成员列表按压缩包的 mtime 缓存，同一压缩包在多次重新运行之间只解析一次目录。
+
+    zip 的各成员独立压缩，预读线程并行解压后续成员（ZipFile 支持多线程同时读取不同成员）；
+    tar.gz 等是单一压缩流，无法并行解压，按包内顺序处理时只需顺序解压一遍，因此不预读。
+    未预读的成员（含超过预读上限的大文件）以流的方式边解压边解析。
+    """
+
+    def __init__(self, location: str) -> None:
+        """初始化压缩包数据源
+
+        Args:
+            location: 压缩包路径
+        """
+        super().__init__(location)
+        self._archive: Optional[Union[zipfile.ZipFile, tarfile.TarFile]] = None
+        self.is_zip = zipfile.is_zipfile(location)
+        self.readahead_files = DATA_SOURCE_READAHEAD_FILES if self.is_zip else 0
+
+    @staticmethod
+    def _list_members(path: str) -> Tuple[Dict[str, FileEntry], Dict[str, Union[zipfile.ZipInfo, tarfile.TarInfo]]]:
+        """解析压缩包目录
+
+        Args:
+            path: 压缩包路径
+
+        Returns:
+            (文件名 -> FileEntry, 文件名 -> 成员信息)；保留成员信息（含数据偏移），
+            打开成员时无需再次扫描压缩包（tar.gz 的 getmember 需要解压整个压缩包）
+        """
+        members: List[Tuple[str, int, int, Union[zipfile.ZipInfo, tarfile.TarInfo]]] = []
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        mtime = int(_zip_timestamp(info.date_time) * 1e9)
+                        members.append((info.filename, info.file_size, mtime, info))
+        else:
+            with tarfile.open(path, "r:*") as archive:
+                for info in archive:
+                    if info.isfile():
+                        members.append((info.name, info.size, int(info.mtime * 1e9), info))
+
+        entries: Dict[str, FileEntry] = {}
+        infos: Dict[str, Union[zipfile.ZipInfo, tarfile.TarInfo]] = {}
+        for member, size, mtime, info in members:
+            name = posixpath.basename(member)
+            if name in infos:
+                name = member.strip("/").replace("/", "_")
+            entries[name] = FileEntry(name, size, mtime)
+            infos[name] = info
+        return entries, infos
+
+    def _listing(self) -> Tuple[Dict[str, FileEntry], Dict[str, Union[zipfile.ZipInfo, tarfile.TarInfo]]]:
+        """获取缓存的成员列表（只读共享，不复制）"""
+        return get_archive_cache().get(self.location, self._list_members, copy_result=False)
+
+    def _scan(self) -> Dict[str, FileEntry]:
+        return self._listing()[0]
+
+    def refresh(self) -> None:
+        get_archive_cache().invalidate(self.location)
+
+    def _open_raw(self, name: str) -> IO[bytes]:
+        info = self._listing()[1].get(name)
+        if info is None:
+            raise FileNotFoundError(f"{self.location}: {name}")
+        with self._lock:
+            if self._archive is None:
+                if self.is_zip:
+                    self._archive = zipfile.ZipFile(self.location)
+                else:
+                    self._archive = tarfile.open(self.location, "r:*")
+            archive = self._archive
+        if isinstance(archive, zipfile.ZipFile):
+            return archive.open(info)
+        return archive.extractfile(info)
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            archive, self._archive = self._archive, None
+        if archive is not None:
+            archive.close()
+
+
+def is_archive(path: str) -> bool:
+    """判断路径是否为 zip/tar 压缩包
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        是压缩包返回True
+    """
+    if not os.path.isfile(path):
+        return False
+    try:
+        return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+    except OSError:
+        return False
+
+
+def is_network_path(path: str) -> bool:
+    """判断目录是否位于网络共享上
+
+    UNC 路径（\\\\server\\share）直接视为网络共享；Windows 映射的网络驱动器用 GetDriveTypeW 判断；
+    Linux 根据 /proc/mounts 中最长匹配的挂载点的文件系统类型判断。
+
+    Args:
+        path: 目录路径
+
+    Returns:
+        位于网络共享上返回True
+    """
+    if path.startswith(("\\\\", "//")):
+        return True
+    path = os.path.abspath(path)
+    if platform.system() == "Windows":
+        try:
+            import ctypes
+            drive = os.path.splitdrive(path)[0] + "\\"
+            return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE
+        except Exception:
+            return False
+    try:
+        with open("/proc/mounts", "r") as file:
+            mounts = [line.split()[1:3] for line in file]
+    except OSError:
+        return False
+    best, fstype = "", ""
+    for mount_point, mount_type in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+            best, fstype = mount_point, mount_type
+    return fstype in NETWORK_FILESYSTEMS
+
+
+def is_data_source(location: str) -> bool:
+    """判断路径能否作为数据源（目录或压缩包）
+
+    Args:
+        location: 目录或压缩包路径
+
+    Returns:
+        可以作为数据源返回True
+    """
+    return os.path.isdir(location) or is_archive(location)
+
+
+def open_data_source(location: str) -> DataSource:
+    """根据路径创建数据源
+
+    Args:
+        location: 目录或压缩包路径
+
+    Returns:
+        压缩包返回 ArchiveSource，网络共享目录返回 NetworkShareSource，其余返回 LocalDirectorySource
+    """
+    if is_archive(location):
+        return ArchiveSource(location)
+    if os.path.isdir(location) and is_network_path(location):
+        return NetworkShareSource(location)
+    return LocalDirectorySource(location)
@@ -29,6 +29,7 @@ TRANSLATIONS = {
         "help": "帮助",
         "settings": "设置",
         "complete": "完成！耗时{:.2f}s",
+        "stage_timing": "各阶段耗时 (s)",
         
         # 标签页
         "tab_mw": "Mw",
@@ -46,6 +47,11 @@ TRANSLATIONS = {
         "center_peak": "峰居中",
         "fit_segment_data": "拟合各片段数据",
         "fit_segment_data_ml": "拟合各片段数据（机器学习）",
+        "baseline_lambda": "基线平滑参数 λ",
+        "analyze_transitions": "转变分析 (Tg/Tm/Tc/ΔH)",
+        "exo_up": "放热向上",
+        "transition_results": "转变分析结果",
+        "baseline_lambda_help": "AsLS 基线校正的平滑参数，越大基线越平直；结果保存在 DSC_Result 文件夹",
         "test_mode": "测试模式",
         "left_boundary": "左边界/min",
         "right_boundary": "右边界/min",
@@ -54,11 +60,23 @@ TRANSLATIONS = {
 
         # 文件和路径
         "data_folder": "数据文件夹",
+        "data_folder_help": "数据目录，也可以直接填写 zip/tar 压缩包或网络共享路径（无需解压或复制到 datapath）",
         "output_filename": "输出文件名",
         "file_list": "文件列表",
         "invalid_path": "请输入正确路径",
         "confirm_overwrite": "确认覆盖",
         "file_exists_warning": "存在相同文件名文件",
+        "incremental_build": "增量更新",
+        "incremental_build_help": "只重画输入文件或绘图设置发生变化的图片，其余已是最新的图片直接跳过",
+        "incremental_skipped": "{} / {} 个图片已是最新，已跳过",
+        "mw_small_multiples": "组图模式",
+        "mw_small_multiples_help": "将所有样品画在每页 8×8 的小图阵列中（Mw_grid_001.png 等），共享坐标轴，便于对比；不再逐个文件生成图片",
+        "mw_report": "汇总报告",
+        "mw_report_help": "将所有图片汇总为一个多页 PDF 或分页拼图，保存在 Mw_output 中；不勾选“保存图像”时只生成报告。生成报告时每个文件都会重画，不受增量更新影响",
+        "mw_report_off": "不生成",
+        "mw_report_pdf": "多页 PDF",
+        "mw_report_sheet": "拼图",
+        "mw_report_saved": "报告已保存: {}",
         "select_partial_files": "选择部分文件",
         
         # 图像设置
@@ -94,11 +112,24 @@ TRANSLATIONS = {
         "display_image": "显示图片",
         "save_sample_info": "保存样品信息",
         "save_plot_data": "保存画图数据",
+        "save_batch_stats": "保存批量统计",
         
         # 其他功能
         "clean_folder": "清理文件夹",
         "run_clean": "执行清理",
         "clean_success": "清理完成",
+        "profile_mode": "运行性能剖析",
+        "profile_mode_help": "开启后，运行时保存 .prof、热点函数摘要和折叠调用栈到输出目录下的 profile 文件夹",
+        "profile_off": "关闭",
+        "profile_saved": "性能剖析结果已保存: {}",
+        "memory_budget": "内存预算 (MB，0 为不限制)",
+        "memory_budget_help": "一次 DSC 运行允许新增的内存（不含界面本身和其他会话）；超出时改为分块读取，仍不足则推迟到最后分块处理",
+        "trace_memory": "记录 Python 内存峰值 (tracemalloc)",
+        "figure_format": "图片保存格式",
+        "figure_format_help": "svg/pdf 为矢量格式，可任意缩放；webp 为无损压缩，文件约为 png 的 40%。界面预览始终为 png",
+        "png_compress_level": "PNG 压缩级别",
+        "png_compress_level_help": "0 不压缩、9 压缩最强；级别越低保存越快、文件越大，6 为默认",
+        "memory_usage": "各文件内存峰值 (MB)",
         "unsupported_os": "不支持的操作系统",
         "cannot_open_folder": "无法打开文件夹: {}",
         
@@ -120,6 +151,7 @@ TRANSLATIONS = {
         "help": "Help",
         "settings": "Settings",
         "complete": "Complete! Time elapsed: {:.2f}s",
+        "stage_timing": "Stage Timing (s)",
         
         # Tabs
         "tab_mw": "Mw",
@@ -137,6 +169,11 @@ TRANSLATIONS = {
         "center_peak": "Center Peak",
         "fit_segment_data": "Fit Segment Data",
         "fit_segment_data_ml": "Fit Segment Data (ML)",
+        "baseline_lambda": "Baseline Smoothness λ",
+        "analyze_transitions": "Transition Analysis (Tg/Tm/Tc/ΔH)",
+        "exo_up": "Exo Up",
+        "transition_results": "Transition Results",
+        "baseline_lambda_help": "Smoothness parameter of the AsLS baseline correction; larger values give a flatter baseline. Results are saved to the DSC_Result folder",
         "test_mode": "Test Mode",
         "left_boundary": "Left Boundary (min)",
         "right_boundary": "Right Boundary (min)",
@@ -145,11 +182,23 @@ TRANSLATIONS = {
 
         # Files and Paths
         "data_folder": "Data Folder",
+        "data_folder_help": "Data directory; a zip/tar archive or a network share path also works (no need to extract or copy into datapath)",
         "output_filename": "Output Filename",
         "file_list": "File List",
         "invalid_path": "Please enter a valid path",
         "confirm_overwrite": "Confirm Overwrite",
         "file_exists_warning": "File with same name exists",
+        "incremental_build": "Incremental Update",
+        "incremental_build_help": "Only redraw images whose input file or plot settings changed; up-to-date images are skipped",
+        "incremental_skipped": "{} / {} images were up to date and skipped",
+        "mw_small_multiples": "Small Multiples",
+        "mw_small_multiples_help": "Draw all samples as an 8×8 grid of small plots per page with shared axes (Mw_grid_001.png, ...) for side-by-side comparison, instead of one image per file",
+        "mw_report": "Summary Report",
+        "mw_report_help": "Collect all images into one multi-page PDF or paginated contact sheets in Mw_output; with \"Save Image\" unchecked only the report is written. Every file is redrawn for the report, regardless of incremental update",
+        "mw_report_off": "None",
+        "mw_report_pdf": "Multi-page PDF",
+        "mw_report_sheet": "Contact Sheet",
+        "mw_report_saved": "Report saved: {}",
         "select_partial_files": "Select Partial Files",
         
         # Plot Settings
@@ -185,11 +234,24 @@ TRANSLATIONS = {
         "display_image": "Display Image",
         "save_sample_info": "Save Sample Info",
         "save_plot_data": "Save Plot Data",
+        "save_batch_stats": "Save Batch Statistics",
         
         # Other Functions
         "clean_folder": "Clean Folder",
         "run_clean": "Run Clean",
         "clean_success": "Clean Completed",
+        "profile_mode": "Run Profiling",
+        "profile_mode_help": "When enabled, runs save a .prof file, a hot-function summary and collapsed stacks to the profile folder under the output directory",
+        "profile_off": "Off",
+        "profile_saved": "Profile saved: {}",
+        "memory_budget": "Memory Budget (MB, 0 = unlimited)",
+        "memory_budget_help": "Memory a DSC run may add on top of what the process used when the run started (the app itself and other sessions are not counted); larger files are read in chunks, or deferred to the end and then read in chunks",
+        "trace_memory": "Record Python Memory Peaks (tracemalloc)",
+        "figure_format": "Image Format",
+        "figure_format_help": "svg/pdf are vector formats that scale freely; webp is lossless and about 40% the size of png. On-screen previews are always png",
+        "png_compress_level": "PNG Compression Level",
+        "png_compress_level_help": "0 = no compression, 9 = strongest; lower levels save faster but produce larger files, 6 is the default",
+        "memory_usage": "Peak Memory per File (MB)",
         "unsupported_os": "Unsupported Operating System",
         "cannot_open_folder": "Cannot open folder: {}",
         
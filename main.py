@@ -2,21 +2,46 @@ import streamlit as st
 import os
 import time
 import numpy as np
-# matplotlib 和 plottable 改为延迟加载,减少 PyInstaller 打包体积
+# matplotlib 改为延迟加载,减少 PyInstaller 打包体积；表格默认由 draw_table 绘制，plottable 仅为可选渲染器
 # import matplotlib.pyplot as plt
 # import matplotlib.gridspec as gridspec
-# from plottable import Table, ColumnDefinition
 import glob
 import pandas as pd
-from typing import List, Optional, Tuple, Callable, Any, Dict, Union
+from typing import List, Optional, Tuple, Callable, Any, Dict, Union, Iterator, Iterable
 import platform
 import subprocess
 import json
+import hashlib
 import logging
+import logging.handlers
+import queue
+import atexit
+import threading
+import uuid
+import sys
+import io
+import cProfile
+import pstats
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from numpy.typing import NDArray
 import re
+import warnings
+import tempfile
+import gc
+import itertools
+import tracemalloc
 import chardet
+from caching import FigureCache, get_figure_cache, get_memory_tracer, get_settings_cache
+from data_source import DataSource, is_data_source, open_data_source
+
+# psutil 用于获取进程内存（已列入 requirements），缺失时在 Windows 上调用 GetProcessMemoryInfo，在 Linux 上读取 /proc
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 # 设置 matplotlib 后端为 Agg (非交互式),减少依赖
 os.environ['MPLBACKEND'] = 'Agg'
@@ -28,11 +53,102 @@ DEFAULT_MW_COLOR = "#FF6A07"
 DEFAULT_SETTING_NAME = "defaultSetting.ini"
 DEFAULT_DSC_SETTING_NAME = "defaultDSCSetting.ini"
 DEFAULT_TRANSPARENT_BACK = True
+DEFAULT_SEGMENT_POS = [0, 5000, 10000, 50000, 100000, 500000, 1000000, 5000000, 10000000, 50000000]
+
+# 常量定义 - 日志
+LOG_DEDUP_WINDOW = 5.0  # 相同日志的去重时间窗口（秒）
+LOG_RATE_LIMIT = 200  # 每秒最多写入的日志条数（错误日志不受限）
+UI_WARNING_MAX_MESSAGES = 5  # UI汇总中每个文件最多列出的不同警告数
+
+# 常量定义 - 性能追踪
+TRACE_STAGES = ["read", "detect_encoding", "parse", "compute", "figure", "savefig", "report", "display", "export"]  # 阶段顺序
+TRACE_BATCH_LABEL = "(batch)"  # 跨文件阶段（如叠加图）的文件名标记
+PROFILE_ENV_VAR = "POLYANALYZER_PROFILE"  # 环境变量：cprofile / sample / full，开启运行性能剖析
+PROFILE_MODES = ["cprofile", "sample", "full"]  # full = cProfile + 采样调用栈
+PROFILE_DIR_NAME = "profile"  # 剖析结果保存在输出目录下的子目录
+PROFILE_TOP_N = 30  # 热点函数摘要的条数
+PROFILE_SAMPLE_INTERVAL = 0.005  # 采样间隔（秒）
+
+# 常量定义 - 内存
+MEMORY_BUDGET_ENV_VAR = "POLYANALYZER_MEMORY_BUDGET_MB"  # 环境变量：一次运行允许新增的进程内存（MB）
+TRACEMALLOC_ENV_VAR = "POLYANALYZER_TRACEMALLOC"  # 环境变量：开启 tracemalloc 记录各阶段 Python 内存峰值
+BYTES_PER_MB = 1024 * 1024
+DSC_EAGER_MEMORY_FACTOR = 4.0  # 一次性读入时，内存增量约为文件大小的倍数
+DSC_STREAM_MEMORY_FACTOR = 1.0  # 分块读取时，内存增量约为文件大小的倍数
+DSC_CHUNK_ROWS = 50000  # 分块转换的行数
+DSC_ENCODING_SAMPLE_BYTES = 65536  # 分块读取时用于检测编码的字节数
+
+# 常量定义 - DSC 基线校正（AsLS）
+BASELINE_LAM = 1e9  # 平滑参数，越大基线越平直
+BASELINE_P = 0.05  # 非对称权重：高于基线的点取 p，低于基线的点取 1-p
+BASELINE_MAX_ITER = 10  # 最大迭代次数（权重不再变化时提前结束）
+
+# 常量定义 - DSC 转变检测
+DSC_EXO_UP = True  # 热流符号约定：放热向上（TA 仪器默认）
+DSC_TRANSITION_POINTS = 2000  # 检测前将每段分箱平均到约此点数，使结果与采样率无关
+DSC_TRANSITION_BASELINE_DEG = 20.0  # 检测用 AsLS 基线的平滑尺度（温度单位）
+DSC_PEAK_SNR = 10.0  # 峰的显著性（相对噪声）下限
+DSC_PEAK_MIN_WIDTH_DEG = 0.5  # 峰半高宽下限（温度单位）
+DSC_PEAK_MAX_WIDTH_DEG = 20.0  # 峰半高宽上限（温度单位）
+DSC_PEAK_MIN_RELATIVE = 0.05  # 峰的显著性相对段内最大峰的下限
+DSC_PEAK_STRONG_RELATIVE = 0.25  # 检测 Tg 时需要屏蔽的强峰（相对段内最大峰）
+DSC_TG_SNR = 8.0  # Tg 导数峰的显著性（相对导数噪声）下限
+DSC_TG_SMOOTH_DEG = 2.0  # 求导前 Savitzky-Golay 平滑窗口（温度单位）
+DSC_TG_WINDOW_DEG = 5.0  # 计算台阶高度时 Tg 两侧的取值窗口（温度单位）
+DSC_TG_EXCLUSION_DEG = 10.0  # Tg 附近由台阶引起的伪峰的排除范围（温度单位）
+DSC_TRANSITIONS_FILE = "transitions.csv"  # 转变检测结果文件（位于 DSC_Result）
 
 # 常量定义 - 图形参数
 FIGURE_DPI = 300
 FIGURE_SIZE_WITH_TABLE = (12, 8)
 FIGURE_SIZE_WITHOUT_TABLE = (7.5, 8)
+CYCLE_FIGURE_SIZE = (16, 8)  # DSC 循环叠加图
+PREVIEW_DPI = 100  # 界面预览图的分辨率，保存的图片仍为 FIGURE_DPI
+FIGURE_ENCODE_THREADS = max(1, min(4, os.cpu_count() or 1))  # 图片编码（PNG 压缩、WebP）线程数
+FIGURE_WRITER_MAX_PENDING = FIGURE_ENCODE_THREADS + 1  # 后台未保存完的图形数上限（每个图形占用一份绘图数据和像素）
+
+# 常量定义 - 图片输出格式
+FIGURE_FORMATS = ["png", "webp", "svg", "pdf"]  # 保存图片的格式，第一个为默认
+FIGURE_VECTOR_FORMATS = ("svg", "pdf")  # 矢量格式：由 matplotlib 直接输出，不经栅格化
+FIGURE_FORMAT_ENV_VAR = "POLYANALYZER_FIGURE_FORMAT"  # 环境变量：保存图片的格式
+PNG_COMPRESS_LEVEL = 6  # PNG 压缩级别 0-9（6 与 matplotlib 默认输出一致，1 约快 25%、文件大约 30%）
+PNG_COMPRESS_LEVEL_ENV_VAR = "POLYANALYZER_PNG_COMPRESS_LEVEL"  # 环境变量：PNG 压缩级别
+PREVIEW_COMPRESS_LEVEL = 1  # 预览图只传给本机浏览器，使用最快的压缩
+WEBP_OPTIONS = {"lossless": True}  # 无损 WebP：线条图不产生压缩伪影，文件约为 PNG 的 40%
+DSC_PREVIEW_BUCKETS = int(CYCLE_FIGURE_SIZE[0] * FIGURE_DPI)  # 叠加图用降采样副本的分桶数（约每个像素列一桶）
+
+# 常量定义 - 分子量图增量更新
+MW_MANIFEST_NAME = ".manifest.json"  # 输出目录中记录各图片指纹的清单文件
+MW_MANIFEST_VERSION = 1
+MW_FINGERPRINT_SETTINGS = ["bar_color", "mw_color", "transparent_back", "bar_width", "line_width", "axis_width",
+                           "title_font_size", "axis_font_size", "draw_bar", "draw_mw", "draw_table", "selectedpos",
+                           "table_renderer"]  # 影响图片内容的设置
+
+# 常量定义 - 分子量图表格
+TABLE_RENDERERS = ["native", "plottable"]  # 表格渲染器，第一个为默认（plottable 为可选依赖）
+TABLE_RENDERER_ENV_VAR = "POLYANALYZER_TABLE_RENDERER"  # 环境变量：表格渲染器
+TABLE_TEXTPROPS = {"fontsize": 12, "fontname": "Times New Roman"}
+DISTRIBUTION_TABLE_WIDTHS = [10, 4]  # 区间分布表的列宽（Mw 区间, Percent）
+
+# 常量定义 - 分子量图报告
+MW_REPORT_FORMATS = ["pdf", "sheet"]  # 多页 PDF / 分页拼图
+MW_REPORT_NAME = "Mw_report"  # 报告文件名（拼图为 Mw_report_001.png 等）
+REPORT_SHEET_GRID = (3, 4)  # 每页拼图的列数、行数
+REPORT_SHEET_DPI = 75  # 拼图中缩略图的分辨率（带表格的图为 900x600 像素）
+REPORT_SHEET_PADDING = 20  # 缩略图之间的间距（像素）
+
+# 常量定义 - 分子量组图（小图阵列）
+MW_GRID_NAME = "Mw_grid"  # 组图文件名（Mw_grid_001.png 等）
+MW_GRID_SHAPE = (8, 8)  # 每页的列数、行数
+MW_GRID_PANEL_SIZE = (2.5, 2.0)  # 每个小图的尺寸（英寸）
+MW_GRID_FONT_SCALE = 0.5  # 小图标题相对 title_font_size 的缩放
+MW_GRID_TICK_SIZE = 8  # 小图刻度字号
+
+# 常量定义 - 渲染图片缓存
+FIGURE_CACHE_ENV_VAR = "POLYANALYZER_FIGURE_CACHE"  # 环境变量：设为 0 关闭图片缓存
+FIGURE_CACHE_DIR_NAME = "figure_cache"  # 磁盘缓存目录（程序目录下）
+FIGURE_CACHE_MEMORY_MB = 128  # 内存层容量上限
+FIGURE_CACHE_DISK_MB = 1024  # 磁盘层容量上限
 GPC_FIGURE_SIZE = (16, 8)
 GRIDSPEC_ROWS = 8
 GRIDSPEC_COLS = 8
@@ -46,16 +162,90 @@ GPC_Y_COLUMN_INDEX = 6  # GPC Y轴数据列索引
 MIN_PEAK_COLUMNS = 4  # 峰数据最小列数
 MIN_GPC_PEAK_COLUMNS = 6  # GPC峰数据最小列数
 MIN_MW_DATA_COLUMNS = 8  # 分子量数据最小列数
+MW_AVERAGE_FIELDS = ["Mp", "Mn", "Mw", "Mz", "Mz+1", "Mv", "PD"]  # MW_Averages 数值列
+MW_TABLE_COLUMNS = ["Samplename"] + MW_AVERAGE_FIELDS  # 分子量表格列名
+SEGMENT_FEATURE_DTYPE = np.dtype([  # DSC 曲线段特征记录
+    ("rows", np.int64), ("heating", np.bool_), ("imin", np.int64), ("imax", np.int64),
+    ("xmin", np.float64), ("xmax", np.float64), ("ymin", np.float64), ("ymax", np.float64), ("median", np.float64),
+])
 
 # 常量定义 - 计算参数
 NORM_SCALE_FACTOR = 50  # 归一化缩放因子
 PERCENTAGE_FACTOR = 100  # 百分比转换因子
 BAR_POSITION_WEIGHT_LEFT = 0.75  # 柱状图位置左权重
 BAR_POSITION_WEIGHT_RIGHT = 0.25  # 柱状图位置右权重
+OUTLIER_Z_THRESHOLD = 3.5  # 批量统计异常值判定阈值（稳健Z分数）
+MOMENT_TOLERANCE = 0.05  # 切片表重算分子量与报告值的相对误差容限
+
+
+class LogThrottleFilter(logging.Filter):
+    """日志去重与限流过滤器 - 抑制短时间内重复的日志，并限制每秒写入条数
+    
+    错误及以上级别的日志始终放行；被抑制的条数会附加在下一条放行的同类日志后面。
+    """
+    
+    def __init__(self, window: float = LOG_DEDUP_WINDOW, rate_limit: int = LOG_RATE_LIMIT) -> None:
+        """初始化过滤器
+        
+        Args:
+            window: 去重时间窗口（秒）
+            rate_limit: 每秒最多放行的日志条数
+        """
+        super().__init__()
+        self.window = window
+        self.rate_limit = rate_limit
+        self._last_seen: Dict[Tuple[int, str], float] = {}
+        self._suppressed: Dict[Tuple[int, str], int] = {}
+        self._dropped = 0
+        self._second_start = 0.0
+        self._second_count = 0
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        """判断日志是否放行"""
+        if record.levelno >= logging.ERROR:
+            return True
+        
+        now = time.monotonic()
+        key = (record.levelno, record.getMessage())
+        with self._lock:
+            last = self._last_seen.get(key)
+            if last is not None and now - last < self.window:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            
+            if now - self._second_start >= 1.0:
+                self._second_start = now
+                self._second_count = 0
+            if self._second_count >= self.rate_limit:
+                self._dropped += 1
+                return False
+            self._second_count += 1
+            
+            if len(self._last_seen) > 1000:
+                self._last_seen = {k: v for k, v in self._last_seen.items() if now - v < self.window}
+            self._last_seen[key] = now
+            
+            notes = []
+            repeated = self._suppressed.pop(key, 0)
+            if repeated:
+                notes.append(f"重复 {repeated} 次已省略")
+            if self._dropped:
+                notes.append(f"限流丢弃 {self._dropped} 条日志")
+                self._dropped = 0
+        
+        if notes:
+            record.msg = f"{record.getMessage()} ({'; '.join(notes)})"
+            record.args = None
+        return True
 
 
 class Logger:
-    """日志管理器 - 提供结构化日志记录功能"""
+    """日志管理器 - 提供结构化日志记录功能
+    
+    文件写入由后台 QueueListener 线程完成，调用方只需将日志放入队列；
+    批量处理期间的UI警告按文件缓存，处理结束后通过 flush_ui 汇总显示。
+    """
     
     def __init__(self, name: str = "PolyAnalyzer", level: int = logging.INFO):
         """初始化日志器
@@ -67,6 +257,10 @@ class Logger:
         self.logger = logging.getLogger(name)
         self.logger.setLevel(level)
         
+        # UI警告缓存：文件名 -> {警告消息: 次数}
+        self._ui_file: Optional[str] = None
+        self._ui_warnings: Dict[str, Dict[str, int]] = {}
+        
         # 避免重复添加处理器
         if not self.logger.handlers:
             # 创建日志目录
@@ -85,7 +279,15 @@ class Logger:
             )
             file_handler.setFormatter(formatter)
             
-            self.logger.addHandler(file_handler)
+            # 队列处理器：调用线程只负责入队，由监听线程异步写文件
+            log_queue = queue.SimpleQueue()
+            queue_handler = logging.handlers.QueueHandler(log_queue)
+            queue_handler.addFilter(LogThrottleFilter())
+            listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+            listener.start()
+            atexit.register(listener.stop)
+            
+            self.logger.addHandler(queue_handler)
     
     def debug(self, message: str) -> None:
         """调试信息"""
@@ -100,11 +302,41 @@ class Logger:
         
         Args:
             message: 警告消息
-            show_ui: 是否在UI中显示
+            show_ui: 是否在UI中显示（批量处理期间缓存到 flush_ui 时统一显示）
         """
         self.logger.warning(message)
         if show_ui:
-            st.warning(message)
+            if self._ui_file is not None:
+                file_warnings = self._ui_warnings.setdefault(self._ui_file, {})
+                file_warnings[message] = file_warnings.get(message, 0) + 1
+            else:
+                st.warning(message)
+    
+    def set_file(self, filename: str) -> None:
+        """标记当前处理的文件，之后的UI警告按该文件汇总
+        
+        Args:
+            filename: 文件名
+        """
+        self._ui_file = filename
+    
+    def flush_ui(self) -> None:
+        """将缓存的UI警告按文件汇总为一条显示，并结束批量模式"""
+        self._ui_file = None
+        if not self._ui_warnings:
+            return
+        
+        lines = []
+        for filename, messages in self._ui_warnings.items():
+            total = sum(messages.values())
+            lines.append(f"**{filename}**: {total} 条警告")
+            for message, count in list(messages.items())[:UI_WARNING_MAX_MESSAGES]:
+                suffix = f" (×{count})" if count > 1 else ""
+                lines.append(f"- {message}{suffix}")
+            if len(messages) > UI_WARNING_MAX_MESSAGES:
+                lines.append(f"- ... 另有 {len(messages) - UI_WARNING_MAX_MESSAGES} 种警告，详见日志")
+        self._ui_warnings = {}
+        st.warning("\n".join(lines))
     
     def error(self, message: str, show_ui: bool = True, exception: Optional[Exception] = None) -> None:
         """错误信息
@@ -244,6 +476,10 @@ class DataValidator:
         if len(positions) < 2:
             self.logger.error("至少需要2个分割位置")
             return False
+        # 区间统计按升序边界二分查找，乱序或重复的边界会得到错误的百分比
+        if any(right <= left for left, right in zip(positions, positions[1:])):
+            self.logger.error(f"分割位置必须严格递增: {list(positions)}")
+            return False
         return True
 
 
@@ -251,6 +487,940 @@ class DataValidator:
 logger = Logger()
 
 
+def windows_memory_counters() -> Optional[Tuple[int, int]]:
+    """通过 GetProcessMemoryInfo 获取 Windows 进程的工作集（未安装 psutil 时使用）
+
+    Returns:
+        (当前工作集, 峰值工作集) 字节数，非 Windows 或调用失败时返回None
+    """
+    if platform.system() != "Windows":
+        return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        kernel32 = ctypes.WinDLL("kernel32")
+        psapi = ctypes.WinDLL("psapi")
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+        psapi.GetProcessMemoryInfo.restype = wintypes.BOOL
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize, counters.PeakWorkingSetSize
+    except (ImportError, OSError, AttributeError):
+        return None
+
+
+def current_rss_mb() -> Optional[float]:
+    """获取当前进程的常驻内存（RSS）
+
+    Returns:
+        RSS（MB），无法获取时返回None
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / BYTES_PER_MB
+    counters = windows_memory_counters()
+    if counters is not None:
+        return counters[0] / BYTES_PER_MB
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / BYTES_PER_MB
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """获取进程启动以来的峰值常驻内存（最高水位，包括两次采样之间的瞬时峰值）
+
+    Returns:
+        峰值RSS（MB），无法获取时返回None
+    """
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        if hasattr(info, "peak_wset"):
+            return info.peak_wset / BYTES_PER_MB
+    counters = windows_memory_counters()
+    if counters is not None:
+        return counters[1] / BYTES_PER_MB
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 返回字节，Linux 返回 KB
+    return peak / BYTES_PER_MB if platform.system() == "Darwin" else peak / 1024
+
+
+def resolve_memory_budget(budget_mb: Optional[float] = None) -> Optional[float]:
+    """确定内存预算
+
+    Args:
+        budget_mb: 界面指定的预算（MB），为None时读取环境变量 MEMORY_BUDGET_ENV_VAR
+
+    Returns:
+        预算（MB），不限制时返回None
+    """
+    if budget_mb is None:
+        try:
+            budget_mb = float(os.environ.get(MEMORY_BUDGET_ENV_VAR, "0"))
+        except ValueError:
+            logger.warning(f"环境变量 {MEMORY_BUDGET_ENV_VAR} 不是有效数字，忽略内存预算", show_ui=False)
+            return None
+    return budget_mb if budget_mb > 0 else None
+
+
+def resolve_trace_memory(enabled: Optional[bool] = None) -> bool:
+    """确定是否开启 tracemalloc
+
+    Args:
+        enabled: 界面指定的开关，为None时读取环境变量 TRACEMALLOC_ENV_VAR
+
+    Returns:
+        是否开启
+    """
+    if enabled is None:
+        return os.environ.get(TRACEMALLOC_ENV_VAR, "").strip().lower() in ("1", "true", "on")
+    return enabled
+
+
+class StageTimer:
+    """阶段计时器 - 记录每个文件各处理阶段的耗时与内存，并输出 JSONL 追踪文件"""
+    
+    def __init__(self, analyzer_name: str) -> None:
+        """初始化计时器
+        
+        Args:
+            analyzer_name: 分析器名称，写入追踪记录
+        """
+        self.analyzer_name = analyzer_name
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records: List[Dict[str, Any]] = []
+        self.current_file = TRACE_BATCH_LABEL
+        self._child_seconds: List[float] = []  # 嵌套阶段栈：各层已被子阶段占用的时间
+        self._python_peaks: List[int] = []  # 嵌套阶段栈：各层已观测到的 tracemalloc 峰值（字节）
+    
+    def reset(self) -> None:
+        """开始新一次运行，清空已有记录"""
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records = []
+        self.current_file = TRACE_BATCH_LABEL
+    
+    def set_file(self, filename: str) -> None:
+        """设置后续阶段所属的文件
+        
+        Args:
+            filename: 文件名，跨文件阶段使用 TRACE_BATCH_LABEL
+        """
+        self.current_file = filename
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """记录一个阶段的耗时与内存（异常时同样记录）
+        
+        阶段可以嵌套，记录的是扣除子阶段后的自身耗时，因此各阶段之和等于总耗时。
+        RSS 在阶段开始和结束时采样；阶段内进程峰值内存创新高时，RSS 峰值取新的最高水位，
+        因此阶段内的瞬时峰值也能记到；低于此前最高水位的瞬时峰值测不到，取起止采样的较大值。
+        tracemalloc 开启时另记录阶段内（含子阶段）的 Python 内存峰值。
+        tracemalloc 峰值是进程级的：阶段期间有其他会话的运行也在使用时无法单独测量，
+        此时不记录峰值，只标记 python_peak_shared。
+        
+        Args:
+            name: 阶段名称，参见 TRACE_STAGES
+        """
+        started = time.time()
+        rss_start = current_rss_mb()
+        high_water_start = peak_rss_mb()
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            if self._python_peaks:
+                self._python_peaks[-1] = max(self._python_peaks[-1], tracemalloc.get_traced_memory()[1])
+            self._python_peaks.append(0)
+            peak_token = get_memory_tracer().begin_peak()
+        start = time.perf_counter()
+        self._child_seconds.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            child = self._child_seconds.pop()
+            if self._child_seconds:
+                self._child_seconds[-1] += elapsed
+            record = {
+                "run_id": self.run_id,
+                "analyzer": self.analyzer_name,
+                "file": self.current_file,
+                "stage": name,
+                "start": started,
+                "seconds": elapsed - child,
+            }
+            rss_end = current_rss_mb()
+            if rss_start is not None and rss_end is not None:
+                record["rss_mb"] = rss_end
+                record["rss_delta_mb"] = rss_end - rss_start
+                record["rss_peak_mb"] = max(rss_start, rss_end)
+                high_water_end = peak_rss_mb()
+                if high_water_start is not None and high_water_end is not None and high_water_end > high_water_start:
+                    record["rss_peak_mb"] = max(record["rss_peak_mb"], high_water_end)
+            if tracing:
+                peak = max(self._python_peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._python_peaks:
+                    self._python_peaks[-1] = max(self._python_peaks[-1], peak)
+                if get_memory_tracer().is_exclusive(peak_token):
+                    record["python_peak_mb"] = peak / BYTES_PER_MB
+                else:
+                    record["python_peak_shared"] = True
+            self.records.append(record)
+    
+    def summary(self) -> pd.DataFrame:
+        """按文件汇总各阶段耗时
+        
+        Returns:
+            行为文件（末行为合计）、列为阶段的耗时表格（秒）
+        """
+        if not self.records:
+            return pd.DataFrame()
+        
+        frame = pd.DataFrame(self.records)
+        table = frame.pivot_table(index="file", columns="stage", values="seconds", aggfunc="sum", sort=False)
+        ordered = [name for name in TRACE_STAGES if name in table.columns]
+        table = table[ordered + [name for name in table.columns if name not in ordered]]
+        table["total"] = table.sum(axis=1)
+        table.loc["total"] = table.sum(axis=0)
+        return table.fillna(0.0)
+    
+    def memory_summary(self) -> pd.DataFrame:
+        """按文件汇总内存峰值
+        
+        Returns:
+            行为文件、列为 RSS 峰值（及 tracemalloc 峰值）的表格（MB），无内存记录时为空表
+        """
+        frame = pd.DataFrame(self.records)
+        columns = [name for name in ("rss_peak_mb", "python_peak_mb") if name in frame.columns]
+        if not columns:
+            return pd.DataFrame()
+        return frame.groupby("file", sort=False)[columns].max().dropna(how="all")
+    
+    def write_trace(self) -> Optional[str]:
+        """将本次运行的记录追加到 logs/trace_YYYYMMDD.jsonl
+        
+        Returns:
+            追踪文件路径，无记录或写入失败时返回None
+        """
+        if not self.records:
+            return None
+        
+        trace_dir = os.path.join(os.getcwd(), "logs")
+        trace_file = os.path.join(trace_dir, f"trace_{datetime.now().strftime('%Y%m%d')}.jsonl")
+        try:
+            os.makedirs(trace_dir, exist_ok=True)
+            with open(trace_file, 'a', encoding='utf-8') as f:
+                for record in self.records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"写入性能追踪失败: {e}", show_ui=False)
+            return None
+        
+        memory = self.memory_summary()
+        if not memory.empty and "rss_peak_mb" in memory.columns and memory["rss_peak_mb"].notna().any():
+            worst = memory["rss_peak_mb"].idxmax()
+            logger.info(f"{self.analyzer_name} 内存峰值: {worst} RSS {memory.loc[worst, 'rss_peak_mb']:.1f} MB")
+        return trace_file
+
+
+def atomic_write(path: str, content: str) -> None:
+    """原子写入：先在同一目录写临时文件再重命名，其他会话不会读到写了一半的文件
+
+    Args:
+        path: 目标文件路径
+        content: 文件内容
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def figure_cache(rootdir: str) -> Optional[FigureCache]:
+    """获取渲染图片缓存
+
+    Args:
+        rootdir: 程序目录，磁盘缓存位于其下的 FIGURE_CACHE_DIR_NAME 子目录
+
+    Returns:
+        FigureCache实例，环境变量 FIGURE_CACHE_ENV_VAR 设为 0 时返回None
+    """
+    if os.environ.get(FIGURE_CACHE_ENV_VAR, "").strip().lower() in ("0", "false", "off"):
+        return None
+    return get_figure_cache(os.path.join(rootdir, FIGURE_CACHE_DIR_NAME),
+                            FIGURE_CACHE_MEMORY_MB * 1024 * 1024, FIGURE_CACHE_DISK_MB * 1024 * 1024)
+
+
+def resolve_figure_format(figure_format: Optional[str] = None) -> str:
+    """确定保存图片的格式
+
+    Args:
+        figure_format: 界面指定的格式，为None时读取环境变量 FIGURE_FORMAT_ENV_VAR
+
+    Returns:
+        FIGURE_FORMATS 之一，未指定或不可用时为 png
+    """
+    value = (figure_format if figure_format is not None else os.environ.get(FIGURE_FORMAT_ENV_VAR, "")).strip().lower()
+    if not value:
+        return FIGURE_FORMATS[0]
+    if value not in FIGURE_FORMATS:
+        logger.warning(f"不支持的图片格式 {value}，改用 png", show_ui=False)
+        return FIGURE_FORMATS[0]
+    if value == "webp":
+        from PIL import features
+        if not features.check("webp"):
+            logger.warning("Pillow 未编译 WebP 支持，改用 png", show_ui=False)
+            return FIGURE_FORMATS[0]
+    return value
+
+
+def resolve_png_compress_level(level: Optional[int] = None) -> int:
+    """确定 PNG 压缩级别
+
+    Args:
+        level: 界面指定的级别，为None时读取环境变量 PNG_COMPRESS_LEVEL_ENV_VAR
+
+    Returns:
+        0-9 的压缩级别
+    """
+    if level is None:
+        try:
+            level = int(os.environ.get(PNG_COMPRESS_LEVEL_ENV_VAR, PNG_COMPRESS_LEVEL))
+        except ValueError:
+            logger.warning(f"环境变量 {PNG_COMPRESS_LEVEL_ENV_VAR} 不是有效整数，使用默认压缩级别", show_ui=False)
+            return PNG_COMPRESS_LEVEL
+    return min(max(int(level), 0), 9)
+
+
+def rasterize_figure(fig: Any, dpi: int, transparent: bool) -> NDArray[np.uint8]:
+    """将图形绘制为 RGBA 像素（只绘制，不编码）
+
+    Args:
+        fig: matplotlib 图形
+        dpi: 分辨率
+        transparent: 是否透明背景
+
+    Returns:
+        (高, 宽, 4) 的 RGBA 数组
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    # 已从 pyplot 分离的图形不再有 Agg 画布，需重新挂上才能取得绘制结果
+    canvas = fig.canvas if isinstance(fig.canvas, FigureCanvasAgg) else FigureCanvasAgg(fig)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="rgba", dpi=dpi, transparent=transparent)
+    # 画布保留着本次绘制所用的渲染器，由其缓冲区得到图像尺寸
+    height, width = np.asarray(canvas.buffer_rgba()).shape[:2]
+    return np.frombuffer(buffer.getbuffer(), dtype=np.uint8).reshape(height, width, 4)
+
+
+def encode_raster(rgba: NDArray[np.uint8], figure_format: str, dpi: int, compress_level: int = PNG_COMPRESS_LEVEL) -> bytes:
+    """将 RGBA 像素编码为图片（默认参数下与 savefig 输出的 PNG 逐字节一致）
+
+    Args:
+        rgba: rasterize_figure 返回的像素
+        figure_format: png 或 webp
+        dpi: 写入图片元数据的分辨率
+        compress_level: PNG 压缩级别
+
+    Returns:
+        图片字节
+    """
+    import matplotlib.image as mpimg
+
+    pil_kwargs = {"compress_level": compress_level} if figure_format == "png" else dict(WEBP_OPTIONS)
+    buffer = io.BytesIO()
+    mpimg.imsave(buffer, memoryview(rgba), format=figure_format, dpi=dpi, pil_kwargs=pil_kwargs)
+    return buffer.getvalue()
+
+
+def render_figure_bytes(fig: Any, figure_format: str, dpi: int, transparent: bool,
+                        compress_level: int = PNG_COMPRESS_LEVEL) -> bytes:
+    """在当前线程中绘制并编码图形
+
+    Args:
+        fig: matplotlib 图形
+        figure_format: FIGURE_FORMATS 之一
+        dpi: 分辨率
+        transparent: 是否透明背景
+        compress_level: PNG 压缩级别
+
+    Returns:
+        图片字节
+    """
+    if figure_format in FIGURE_VECTOR_FORMATS:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=figure_format, dpi=dpi, transparent=transparent)
+        return buffer.getvalue()
+    return encode_raster(rasterize_figure(fig, dpi, transparent), figure_format, dpi, compress_level)
+
+
+def resolve_table_renderer(renderer: Optional[str] = None) -> str:
+    """确定分子量图表格的渲染器
+
+    Args:
+        renderer: 指定的渲染器，为None时读取环境变量 TABLE_RENDERER_ENV_VAR
+
+    Returns:
+        TABLE_RENDERERS 之一，未指定、不支持或 plottable 未安装时为 native
+    """
+    value = (renderer if renderer is not None else os.environ.get(TABLE_RENDERER_ENV_VAR, "")).strip().lower()
+    if not value:
+        return TABLE_RENDERERS[0]
+    if value not in TABLE_RENDERERS:
+        logger.warning(f"不支持的表格渲染器 {value}，改用 native", show_ui=False)
+        return TABLE_RENDERERS[0]
+    if value == "plottable":
+        import importlib.util
+        if importlib.util.find_spec("plottable") is None:
+            logger.warning("未安装 plottable，表格改用 native 渲染", show_ui=False)
+            return TABLE_RENDERERS[0]
+    return value
+
+
+def draw_table(ax: Any, header: List[str], rows: List[List[str]], widths: Optional[List[float]] = None,
+               textprops: Optional[Dict[str, Any]] = None, footer_divider: bool = False,
+               row_dividers: bool = True) -> List[Any]:
+    """用最少的 artist 绘制简单文本表格，版式与 plottable.Table 相同
+
+    每个单元格只有一个 Text，全部单元格共用一个背景矩形，全部分隔线合并为一个 LineCollection；
+    不创建逐格的背景和布局对象。
+
+    Args:
+        ax: 绘制表格的坐标轴（将被隐藏）
+        header: 表头
+        rows: 各行单元格文本
+        widths: 各列相对宽度，默认等宽
+        textprops: 文本属性（字体、字号），单元格均居中
+        footer_divider: 是否在末行下方画线
+        row_dividers: 是否在行间画细线
+
+    Returns:
+        单元格 Text 列表（表头在前、按行排列），可用 set_text 更新内容
+    """
+    import matplotlib as mpl
+    from matplotlib.collections import LineCollection
+    from matplotlib.patches import Rectangle
+    edges = np.concatenate(([0.0], np.cumsum(widths if widths is not None else [1.0] * len(header))))
+    centers = (edges[:-1] + edges[1:]) / 2
+    props = {"ha": "center", "va": "center", **(textprops or {})}
+    texts = [ax.text(x, -0.5, label, **props) for x, label in zip(centers, header)]
+    for row_idx, row in enumerate(rows):
+        texts.extend(ax.text(x, row_idx + 0.5, value, **props) for x, value in zip(centers, row))
+    # 表格背景与坐标轴底色相同（透明背景的图片中表格区域保持不透明），表头占 [-1, 0]，第 i 行占 [i, i+1]
+    width = edges[-1]
+    ax.add_patch(Rectangle((0.0, -1.0), width, len(rows) + 1, linewidth=0.0,
+                           edgecolor=ax.get_facecolor(), facecolor=ax.get_facecolor()))
+    # 表头线、行间细线、表尾线（y 轴向下）
+    positions = [0.0]
+    line_widths = [1.0]
+    if row_dividers:
+        positions.extend(range(1, len(rows)))
+        line_widths.extend([0.2] * (len(rows) - 1))
+    if footer_divider and rows:
+        positions.append(len(rows))
+        line_widths.append(1.0)
+    segments = [[(0.0, y), (width, y)] for y in positions]
+    ax.add_collection(LineCollection(segments, linewidths=line_widths, colors=mpl.rcParams["text.color"],
+                                     capstyle=mpl.rcParams["lines.solid_capstyle"]), autolim=False)
+    ax.axis("off")
+    ax.set_xlim(-0.025, width + 0.025)
+    ax.set_ylim(len(rows) + 0.05, -1.025)
+    return texts
+
+
+class FigureWriter:
+    """后台图片写入器 - 在后台线程中以 FIGURE_DPI 绘制、编码并保存图片
+    
+    界面只需显示低分辨率预览，高分辨率输出推迟到后台，与后续文件的处理重叠。
+    绘制（matplotlib，单线程）与编码（PNG 压缩、WebP，Pillow 编码时释放 GIL）分在两个线程池，
+    一个图形编码时下一个图形即可开始绘制。
+    提交的图形须已从 pyplot 中分离（plt.close），之后只由后台线程访问。
+    """
+    
+    def __init__(self, logger: "Logger", max_pending: int = FIGURE_WRITER_MAX_PENDING,
+                 encode_threads: int = FIGURE_ENCODE_THREADS):
+        """初始化写入器
+        
+        Args:
+            logger: 日志器（后台线程只写日志文件，不写UI）
+            max_pending: 尚未保存完成的图形数上限（含编码中的像素），超出时 submit 阻塞
+            encode_threads: 编码线程数
+        """
+        self.logger = logger
+        self.encode_threads = encode_threads
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._render_executor: Optional[ThreadPoolExecutor] = None
+        self._encode_executor: Optional[ThreadPoolExecutor] = None
+        self._futures: List[Future] = []
+    
+    def submit(self, fig: Any, path: str, transparent: bool, figure_format: str = FIGURE_FORMATS[0],
+               compress_level: int = PNG_COMPRESS_LEVEL, on_done: Optional[Callable[[bytes], None]] = None) -> None:
+        """提交一个图形的保存任务
+        
+        Args:
+            fig: 已从 pyplot 分离的 matplotlib 图形
+            path: 保存路径
+            transparent: 是否透明背景
+            figure_format: FIGURE_FORMATS 之一
+            compress_level: PNG 压缩级别
+            on_done: 保存成功后以图片字节调用（如写入图片缓存）
+        """
+        self._slots.acquire()
+        if self._render_executor is None:
+            self._render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="figure-render")
+            self._encode_executor = ThreadPoolExecutor(max_workers=self.encode_threads, thread_name_prefix="figure-encode")
+        try:
+            self._futures.append(self._render_executor.submit(
+                self._render, fig, path, transparent, figure_format, compress_level, on_done))
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def _render(self, fig: Any, path: str, transparent: bool, figure_format: str, compress_level: int,
+                on_done: Optional[Callable[[bytes], None]]) -> Union[Future, str, None]:
+        """绘制线程：矢量格式直接保存，栅格格式绘制后交给编码线程池
+        
+        Returns:
+            编码任务；已完成时成功返回None，失败返回路径
+        """
+        encoding = False
+        try:
+            if figure_format in FIGURE_VECTOR_FORMATS:
+                return self._finish(path, render_figure_bytes(fig, figure_format, FIGURE_DPI, transparent), on_done)
+            rgba = rasterize_figure(fig, FIGURE_DPI, transparent)
+            future = self._encode_executor.submit(self._encode, rgba, path, figure_format, compress_level, on_done)
+            encoding = True
+            return future
+        except Exception as e:
+            self.logger.error(f"保存图片失败: {path}", show_ui=False, exception=e)
+            return path
+        finally:
+            if not encoding:
+                self._slots.release()
+    
+    def _encode(self, rgba: NDArray[np.uint8], path: str, figure_format: str, compress_level: int,
+                on_done: Optional[Callable[[bytes], None]]) -> Optional[str]:
+        """编码线程：编码并写入图片，失败时返回路径"""
+        try:
+            return self._finish(path, encode_raster(rgba, figure_format, FIGURE_DPI, compress_level), on_done)
+        except Exception as e:
+            self.logger.error(f"保存图片失败: {path}", show_ui=False, exception=e)
+            return path
+        finally:
+            self._slots.release()
+    
+    def _finish(self, path: str, data: bytes, on_done: Optional[Callable[[bytes], None]]) -> None:
+        """写入图片文件"""
+        with open(path, "wb") as f:
+            f.write(data)
+        if on_done is not None:
+            on_done(data)
+        self.logger.debug(f"已保存图片: {path}")
+        return None
+    
+    def wait(self) -> List[str]:
+        """等待已提交的任务全部完成
+        
+        Returns:
+            保存失败的图片路径列表
+        """
+        futures, self._futures = self._futures, []
+        failed = []
+        for future in futures:
+            result = future.result()
+            if isinstance(result, Future):
+                result = result.result()
+            if result:
+                failed.append(result)
+        return failed
+    
+    def close(self) -> List[str]:
+        """等待任务完成并释放后台线程
+        
+        Returns:
+            保存失败的图片路径列表
+        """
+        failed = self.wait()
+        for executor in (self._render_executor, self._encode_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._render_executor = None
+        self._encode_executor = None
+        return failed
+
+
+class FigureReport:
+    """批量报告 - 将逐个生成的图形依次写入一个多页 PDF 或分页拼图
+    
+    每个图形绘制后立即写出一页（PDF）或缩入当前拼图页，之后即可释放，
+    内存占用与图形数量无关：PDF 只保留页面索引（字体在关闭时统一嵌入一次），拼图只保留当前一页的像素。
+    """
+    
+    def __init__(self, path_stem: str, report_format: str, figure_format: str = FIGURE_FORMATS[0],
+                 compress_level: int = PNG_COMPRESS_LEVEL) -> None:
+        """初始化报告
+        
+        Args:
+            path_stem: 不含扩展名的报告路径
+            report_format: MW_REPORT_FORMATS 之一
+            figure_format: 拼图的图片格式（矢量格式时改用 png）
+            compress_level: PNG 压缩级别
+        """
+        self.path_stem = path_stem
+        self.report_format = report_format
+        self.sheet_format = figure_format if figure_format not in FIGURE_VECTOR_FORMATS else FIGURE_FORMATS[0]
+        self.compress_level = compress_level
+        self.files: List[str] = []  # 已写出的报告文件
+        self.pages = 0
+        self._pdf = None
+        self._sheet = None
+        self._sheet_count = 0
+        cols, rows = REPORT_SHEET_GRID
+        self._cell = (int(FIGURE_SIZE_WITH_TABLE[0] * REPORT_SHEET_DPI), int(FIGURE_SIZE_WITH_TABLE[1] * REPORT_SHEET_DPI))
+        self._sheet_size = (cols * self._cell[0] + (cols + 1) * REPORT_SHEET_PADDING,
+                            rows * self._cell[1] + (rows + 1) * REPORT_SHEET_PADDING)
+    
+    def add(self, fig: Any, transparent: bool = False) -> None:
+        """写入一个图形（须在绘图的线程中调用，且早于把图形交给后台写入器）
+        
+        Args:
+            fig: matplotlib 图形
+            transparent: 是否透明背景（仅 PDF；拼图始终为白底）
+        """
+        if self.report_format == "pdf":
+            if self._pdf is None:
+                from matplotlib.backends.backend_pdf import PdfPages
+                path = f"{self.path_stem}.pdf"
+                self._pdf = PdfPages(path, metadata={"Title": os.path.basename(self.path_stem), "Creator": f"PolyAnalyzer {APP_VERSION}"})
+                self.files.append(path)
+            self._pdf.savefig(fig, dpi=FIGURE_DPI, transparent=transparent)
+        else:
+            self._add_thumbnail(fig)
+        self.pages += 1
+    
+    def _add_thumbnail(self, fig: Any) -> None:
+        """将图形缩为 REPORT_SHEET_DPI 的缩略图，放入当前拼图页（页满时写出）"""
+        from PIL import Image
+        cols, rows = REPORT_SHEET_GRID
+        slot = self.pages % (cols * rows)
+        if self._sheet is None:
+            self._sheet = Image.new("RGBA", self._sheet_size, (255, 255, 255, 255))
+        thumbnail = Image.fromarray(rasterize_figure(fig, REPORT_SHEET_DPI, False))
+        thumbnail.thumbnail(self._cell)
+        col, row = slot % cols, slot // cols
+        x = REPORT_SHEET_PADDING + col * (self._cell[0] + REPORT_SHEET_PADDING) + (self._cell[0] - thumbnail.width) // 2
+        y = REPORT_SHEET_PADDING + row * (self._cell[1] + REPORT_SHEET_PADDING) + (self._cell[1] - thumbnail.height) // 2
+        self._sheet.alpha_composite(thumbnail, (x, y))
+        if slot == cols * rows - 1:
+            self._write_sheet()
+    
+    def _write_sheet(self) -> None:
+        """编码并写出当前拼图页"""
+        self._sheet_count += 1
+        path = f"{self.path_stem}_{self._sheet_count:03d}.{self.sheet_format}"
+        data = encode_raster(np.asarray(self._sheet), self.sheet_format, REPORT_SHEET_DPI, self.compress_level)
+        self._sheet = None
+        with open(path, "wb") as f:
+            f.write(data)
+        self.files.append(path)
+    
+    def close(self) -> List[str]:
+        """写出未满的拼图页或完成 PDF
+        
+        Returns:
+            报告文件路径列表
+        """
+        if self._sheet is not None:
+            self._write_sheet()
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        return self.files
+
+
+def format_mw_label(num: float) -> str:
+    """将分子量分割点转换为科学记数法标签（如 5.0 × 10$^3$）
+
+    Args:
+        num: 分割点
+
+    Returns:
+        科学记数法字符串
+    """
+    dig = len(str(num)) - 1
+    front = num / (10 ** dig)
+    return '{:.1f} × 10$^{}$'.format(front, dig)
+
+
+class MwAxisStyle:
+    """分子量图的坐标轴样式 - 按一组绘图设置预先计算一次，之后应用到每个坐标轴
+    
+    包含字体、柱的位置和宽度、区间表格的标签；apply 只调用坐标轴对象的方法，不经过 pyplot 的全局状态，
+    各线程可对各自的图形使用。刻度定位器和格式化器须绑定到各自的坐标轴，由 set_xscale 创建。
+    """
+    
+    def __init__(self, selectedpos: List[float], bar_width: float, axis_width: float,
+                 title_font_size: float, axis_font_size: float) -> None:
+        """预先计算样式
+        
+        Args:
+            selectedpos: 分子量分割点
+            bar_width: 柱宽系数
+            axis_width: 坐标轴线宽
+            title_font_size: 标题字号
+            axis_font_size: 轴标签字号
+        """
+        self.key = self.make_key(selectedpos, bar_width, axis_width, title_font_size, axis_font_size)
+        self.axis_width = axis_width
+        positions = np.asarray(selectedpos, dtype=np.float64)
+        left = positions[:-1] * BAR_POSITION_WEIGHT_LEFT + positions[1:] * BAR_POSITION_WEIGHT_RIGHT
+        self.bar_left = left.tolist()  # 各区间柱的左边界
+        self.bar_widths = (left * bar_width).tolist()  # 对数坐标下宽度与位置成正比
+        self.label_font = {"size": axis_font_size, "weight": "bold", "fontname": "Arial"}
+        self.title_font = {"size": title_font_size, "weight": "bold", "fontname": "Arial"}
+        # 区间表格的标签：< 第一个内部分割点、相邻分割点之间、> 最后一个内部分割点
+        labels = [format_mw_label(pos) for pos in selectedpos]
+        inner = len(selectedpos) - 2
+        self.range_labels = ["< " + labels[1] if idx == 0 else
+                             ">" + labels[idx] if idx == inner - 1 else
+                             labels[idx] + " ~ " + labels[idx + 1]
+                             for idx in range(inner)]
+    
+    @staticmethod
+    def make_key(selectedpos: List[float], bar_width: float, axis_width: float,
+                 title_font_size: float, axis_font_size: float) -> Tuple[Any, ...]:
+        """样式依赖的设置，相同时可复用已计算的样式"""
+        return (tuple(selectedpos), bar_width, axis_width, title_font_size, axis_font_size)
+    
+    def apply(self, ax: Any, title: str) -> None:
+        """应用到绘制完数据的坐标轴：对数 x 轴、粗体轴标签和刻度、标题
+        
+        Args:
+            ax: matplotlib 坐标轴
+            title: 标题
+        """
+        ax.set_xscale("log")
+        ax.set_xlabel("Mw (g /mol)", labelpad=4, fontdict=self.label_font)
+        ax.set_ylabel("Cumulative%", labelpad=4, fontdict=self.label_font)
+        # 之后新建的刻度会复制已有刻度标签的字体属性
+        for label in ax.get_xticklabels():
+            label.set_fontweight("bold")
+        for label in ax.get_yticklabels():
+            label.set_fontweight("bold")
+        ax.set_title(title, pad=10, fontdict=self.title_font)
+
+
+def resolve_profile_mode(mode: Optional[str] = None) -> Optional[str]:
+    """确定运行性能剖析模式
+
+    Args:
+        mode: 界面指定的模式，为None时读取环境变量 PROFILE_ENV_VAR
+
+    Returns:
+        PROFILE_MODES 之一，未开启时返回None
+    """
+    value = (mode if mode is not None else os.environ.get(PROFILE_ENV_VAR, "")).strip().lower()
+    if value in ("", "0", "false", "off", "none"):
+        return None
+    if value in ("1", "true", "on"):
+        return "cprofile"
+    if value not in PROFILE_MODES:
+        logger.warning(f"未知的性能剖析模式 {value}，改用 cprofile", show_ui=False)
+        return "cprofile"
+    return value
+
+
+class StackSampler:
+    """采样剖析器 - 后台线程定期抓取目标线程的调用栈，输出火焰图可用的折叠栈
+
+    折叠栈格式与 py-spy / flamegraph.pl 一致：每行 "帧1;帧2;...;帧N 次数"，根帧在前。
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+        """初始化采样器
+
+        Args:
+            interval: 采样间隔（秒）
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def available() -> bool:
+        """当前解释器是否支持采样（依赖 CPython 的 sys._current_frames）"""
+        return hasattr(sys, "_current_frames")
+
+    def start(self) -> None:
+        """开始采样调用线程"""
+        self._target_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="StackSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止采样并等待后台线程退出"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self) -> None:
+        """采样循环"""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+                self.samples += 1
+
+    def top_functions(self, top_n: int = PROFILE_TOP_N) -> List[Tuple[str, int, int]]:
+        """按采样数统计热点函数
+
+        Args:
+            top_n: 返回条数
+
+        Returns:
+            (函数, 自身采样数, 累计采样数) 列表，按自身采样数降序
+        """
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        return [(name, count, total_counts[name]) for name, count in self_counts.most_common(top_n)]
+
+    def write_collapsed(self, path: str) -> None:
+        """写出折叠栈文件
+
+        Args:
+            path: 输出路径（.collapsed）
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RunProfiler:
+    """运行性能剖析器 - 包装一次分析运行，保存 .prof、热点摘要和折叠栈文件"""
+
+    def __init__(self, output_dir: str, label: str, mode: str = "cprofile", top_n: int = PROFILE_TOP_N,
+                 interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+        """初始化剖析器
+
+        Args:
+            output_dir: 结果保存目录
+            label: 文件名前缀（通常为分析器名称）
+            mode: PROFILE_MODES 之一
+            top_n: 热点摘要条数
+            interval: 采样间隔（秒）
+        """
+        self.output_dir = output_dir
+        self.label = label
+        self.mode = mode
+        self.top_n = top_n
+        self.interval = interval
+        self.files: List[str] = []
+
+    def run(self, func: Callable[[], Any]) -> Any:
+        """在剖析下执行函数并保存结果
+
+        Args:
+            func: 无参函数（如 analyzer.run）
+
+        Returns:
+            func 的返回值
+        """
+        use_sampler = self.mode in ("sample", "full")
+        if use_sampler and not StackSampler.available():
+            logger.warning("当前解释器不支持采样剖析，改用 cProfile", show_ui=False)
+            use_sampler = False
+        use_cprofile = self.mode in ("cprofile", "full") or not use_sampler
+
+        profiler = cProfile.Profile() if use_cprofile else None
+        sampler = StackSampler(self.interval) if use_sampler else None
+        if sampler:
+            sampler.start()
+        if profiler:
+            profiler.enable()
+        try:
+            return func()
+        finally:
+            if profiler:
+                profiler.disable()
+            if sampler:
+                sampler.stop()
+            self.files = self._save(profiler, sampler)
+
+    def _save(self, profiler: Optional[cProfile.Profile], sampler: Optional[StackSampler]) -> List[str]:
+        """保存剖析结果
+
+        Args:
+            profiler: cProfile 剖析器
+            sampler: 采样器
+
+        Returns:
+            已保存的文件路径列表
+        """
+        base = os.path.join(self.output_dir, f"{self.label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        files = []
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            summary = io.StringIO()
+            if profiler:
+                profiler.dump_stats(base + ".prof")
+                files.append(base + ".prof")
+                stats = pstats.Stats(profiler, stream=summary).strip_dirs()
+                summary.write(f"===== cProfile: 按自身耗时排序 (前 {self.top_n}) =====\n")
+                stats.sort_stats("tottime").print_stats(self.top_n)
+                summary.write(f"===== cProfile: 按累计耗时排序 (前 {self.top_n}) =====\n")
+                stats.sort_stats("cumulative").print_stats(self.top_n)
+            if sampler:
+                sampler.write_collapsed(base + ".collapsed")
+                files.append(base + ".collapsed")
+                summary.write(f"===== 采样: 共 {sampler.samples} 次，间隔 {self.interval * 1000:.1f} ms =====\n")
+                summary.write(f"{'self':>8} {'total':>8}  function\n")
+                for name, own, total in sampler.top_functions(self.top_n):
+                    summary.write(f"{own:>8} {total:>8}  {name}\n")
+            with open(base + "_top.txt", 'w', encoding='utf-8') as f:
+                f.write(summary.getvalue())
+            files.append(base + "_top.txt")
+            logger.info(f"性能剖析结果已保存: {', '.join(files)}")
+        except OSError as e:
+            logger.warning(f"保存性能剖析结果失败: {e}", show_ui=False)
+        return files
+
+
 class SettingsManager:
     """设置管理器 - 负责读取、保存和管理绘图设置"""
     
@@ -265,6 +1435,7 @@ class SettingsManager:
         self.setting_dir = setting_dir
         self.setting_name = setting_name
         self.default_content = default_content
+        self.cache = get_settings_cache()
         self._ensure_setting_dir()
     
     def _ensure_setting_dir(self) -> None:
@@ -290,7 +1461,21 @@ class SettingsManager:
         Returns:
             设置文件名列表
         """
-        return [os.path.basename(i) for i in glob.glob(os.path.join(self.setting_dir, "*.ini"))]
+        try:
+            return self.cache.get(self.setting_dir, self._scan_settings)
+        except OSError:
+            return []
+    
+    def _scan_settings(self, setting_dir: str) -> List[str]:
+        """扫描设置目录中的设置文件
+        
+        Args:
+            setting_dir: 设置文件目录
+            
+        Returns:
+            设置文件名列表
+        """
+        return [os.path.basename(i) for i in glob.glob(os.path.join(setting_dir, "*.ini"))]
     
     def load_setting(self, setting_name: Optional[str] = None) -> Dict[str, Any]:
         """读取设置文件
@@ -308,20 +1493,32 @@ class SettingsManager:
             return self.create_default_setting()
         
         try:
-            with open(setting_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                # 尝试JSON格式（新格式）
-                try:
-                    setting = json.loads(content)
-                except json.JSONDecodeError:
-                    # 兼容旧格式：使用ast.literal_eval代替eval
-                    import ast
-                    setting = ast.literal_eval(content)
-            return self._normalize_setting_keys(setting)
+            # 文件未修改时直接使用缓存，避免每次重新运行都重新解析
+            return self._normalize_setting_keys(self.cache.get(setting_path, self._parse_setting_file))
         except Exception as e:
             st.warning(f"读取设置文件失败: {e}，使用默认设置")
             return self.create_default_setting()
     
+    def _parse_setting_file(self, setting_path: str) -> Dict[str, Any]:
+        """读取并解析设置文件
+        
+        Args:
+            setting_path: 设置文件路径
+            
+        Returns:
+            原始设置字典
+        """
+        with open(setting_path, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+            # 尝试JSON格式（新格式）
+            try:
+                setting = json.loads(content)
+            except json.JSONDecodeError:
+                # 兼容旧格式：使用ast.literal_eval代替eval
+                import ast
+                setting = ast.literal_eval(content)
+        return setting
+    
     def _normalize_setting_keys(self, setting: Dict[str, Any]) -> Dict[str, Any]:
         """标准化设置键名，兼容旧键名和新键名
         
@@ -396,10 +1593,21 @@ class SettingsManager:
         setting_path = self.get_setting_path(filename)
         
         try:
-            with open(setting_path, 'w', encoding='utf-8') as f:
-                json.dump(setting, f, indent=2, ensure_ascii=False)
+            self._atomic_write(setting_path, json.dumps(setting, indent=2, ensure_ascii=False))
         except Exception as e:
             st.error(f"保存设置失败: {e}")
+        finally:
+            self.cache.invalidate(setting_path)
+            self.cache.invalidate(self.setting_dir)
+    
+    def _atomic_write(self, setting_path: str, content: str) -> None:
+        """原子写入设置文件
+        
+        Args:
+            setting_path: 目标文件路径
+            content: 文件内容
+        """
+        atomic_write(setting_path, content)
     
     def delete_setting(self, setting_name: str) -> None:
         """删除指定的设置文件
@@ -410,6 +1618,8 @@ class SettingsManager:
         setting_path = self.get_setting_path(setting_name)
         try:
             os.remove(setting_path)
+            self.cache.invalidate(setting_path)
+            self.cache.invalidate(self.setting_dir)
             # 如果删除后目录为空，创建默认设置
             if len(os.listdir(self.setting_dir)) == 0:
                 self.create_default_setting()
@@ -417,22 +1627,555 @@ class SettingsManager:
             st.error(f"删除设置失败: {e}")
 
 
+def empty_mw_table() -> pd.DataFrame:
+    """创建空的分子量平均值表格
+    
+    Returns:
+        列为 MW_TABLE_COLUMNS 的空 DataFrame，数值列为 float64
+    """
+    table = pd.DataFrame({field: pd.Series(dtype="float64") for field in MW_AVERAGE_FIELDS})
+    table.insert(0, "Samplename", pd.Series(dtype="object"))
+    return table
+
+
+def calculate_segment_percentages(mw: NDArray[np.float64], norm: NDArray[np.float64],
+                                  bounds: List[float]) -> NDArray[np.float64]:
+    """按分子量区间汇总归一化数据（向量化）
+    
+    区间为开区间 (bounds[i], bounds[i+1])，与边界相等的切片不计入任何区间。
+    
+    Args:
+        mw: 各切片分子量
+        norm: 各切片归一化数据
+        bounds: 升序排列的区间分割位置
+        
+    Returns:
+        各区间百分比数组，长度为 len(bounds) - 1
+    """
+    edges = np.asarray(bounds, dtype="float64")
+    segment_count = max(len(edges) - 1, 0)
+    if segment_count == 0:
+        return np.zeros(0)
+    
+    mw = np.asarray(mw, dtype="float64")
+    norm = np.asarray(norm, dtype="float64")
+    # idx 为严格小于 mw 的边界数，落在区间 idx-1 内（需排除与上边界相等的情况）
+    idx = np.searchsorted(edges, mw, side="left")
+    inside = (idx > 0) & (idx < len(edges))
+    inside &= edges[np.minimum(idx, len(edges) - 1)] != mw
+    sums = np.bincount(idx[inside] - 1, weights=norm[inside], minlength=segment_count)
+    return sums * PERCENTAGE_FACTOR
+
+
+class BatchStatistics:
+    """批量统计 - 汇总多个样品的分子量指标并标记异常值"""
+    
+    STAT_COLUMNS = ["Mn", "Mw", "PDI"]
+    SUMMARY_ROWS = ["mean", "std", "min", "max"]
+    
+    def __init__(self, segment_bounds: List[float], z_threshold: float = OUTLIER_Z_THRESHOLD,
+                 logger: Optional[Logger] = None) -> None:
+        """初始化批量统计
+        
+        Args:
+            segment_bounds: 分子量区间分割位置（排序并去重，重复的位置会产生宽度为0的区间）
+            z_threshold: 稳健Z分数超过该值时判定为异常
+            logger: 日志器实例
+        """
+        self.segment_bounds = sorted(set(segment_bounds))
+        self.z_threshold = z_threshold
+        self.logger: Logger = logger or Logger()
+        self.sample_names: List[str] = []
+        self.peak_index: List[int] = []
+        self.rows: List[NDArray[np.float64]] = []
+    
+    def segment_columns(self) -> List[str]:
+        """获取区间百分比列名
+        
+        Returns:
+            形如 "5000~10000 (%)" 的列名列表
+        """
+        return ["{:g}~{:g} (%)".format(lower, upper)
+                for lower, upper in zip(self.segment_bounds[:-1], self.segment_bounds[1:])]
+    
+    def metric_columns(self) -> List[str]:
+        """获取全部指标列名
+        
+        Returns:
+            指标列名列表
+        """
+        return self.STAT_COLUMNS + self.segment_columns()
+    
+    def add_sample(self, mw_table: pd.DataFrame, peaks: List[NDArray[np.float64]]) -> None:
+        """添加一个样品（每个峰一行）
+        
+        Args:
+            mw_table: 该样品的分子量表格（parse_mw_averages 的结果）
+            peaks: 该样品的切片表峰数据
+        """
+        count = min(len(mw_table), len(peaks))
+        if len(mw_table) != len(peaks):
+            self.logger.warning(f"样品 {mw_table['Samplename'].iloc[0] if len(mw_table) else ''}: "
+                                f"分子量数据行数({len(mw_table)})与峰数({len(peaks)})不一致，按较少者统计",
+                                show_ui=False)
+        averages = mw_table[["Mn", "Mw", "PD"]].to_numpy(dtype="float64")
+        for peak_idx in range(count):
+            peak_array = peaks[peak_idx]
+            percentages = calculate_segment_percentages(
+                peak_array[:, MW_COLUMN_INDEX], peak_array[:, NORM_COLUMN_INDEX], self.segment_bounds)
+            self.sample_names.append(mw_table["Samplename"].iloc[peak_idx])
+            self.peak_index.append(peak_idx + 1)
+            self.rows.append(np.concatenate([averages[peak_idx], percentages]))
+    
+    def _outlier_mask(self, matrix: NDArray[np.float64]) -> NDArray[np.bool_]:
+        """按列计算稳健Z分数（中位数/MAD）并判定异常值
+        
+        Args:
+            matrix: 样品 × 指标矩阵
+            
+        Returns:
+            与 matrix 同形状的布尔矩阵
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            median = np.nanmedian(matrix, axis=0)
+            deviation = np.abs(matrix - median)
+            mad = np.nanmedian(deviation, axis=0)
+            # MAD 为0时退化为标准差，避免除零
+            scale = np.where(mad > 0, mad / 0.6745, np.nanstd(matrix, axis=0))
+            z_score = np.divide(deviation, scale, out=np.zeros_like(deviation), where=scale > 0)
+        return z_score > self.z_threshold
+    
+    def summary(self) -> pd.DataFrame:
+        """生成汇总表格：每个峰一行，末尾附加 mean/std/min/max 行
+        
+        Returns:
+            汇总 DataFrame
+        """
+        columns = self.metric_columns()
+        if not self.rows:
+            return pd.DataFrame(columns=["Samplename", "Peak"] + columns + ["Outlier"])
+        
+        matrix = np.vstack(self.rows)
+        stat_count = len(self.STAT_COLUMNS)
+        outliers = self._outlier_mask(matrix[:, :stat_count])
+        outlier_labels = [", ".join(name for name, flag in zip(self.STAT_COLUMNS, row) if flag)
+                          for row in outliers]
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            summary_matrix = np.vstack([
+                np.nanmean(matrix, axis=0),
+                np.nanstd(matrix, axis=0, ddof=1) if len(matrix) > 1 else np.full(matrix.shape[1], np.nan),
+                np.nanmin(matrix, axis=0),
+                np.nanmax(matrix, axis=0),
+            ])
+        
+        samples = pd.DataFrame(matrix, columns=columns)
+        samples.insert(0, "Samplename", self.sample_names)
+        samples.insert(1, "Peak", self.peak_index)
+        samples["Outlier"] = outlier_labels
+        
+        summary = pd.DataFrame(summary_matrix, columns=columns)
+        summary.insert(0, "Samplename", self.SUMMARY_ROWS)
+        summary.insert(1, "Peak", None)
+        summary["Outlier"] = ""
+        
+        self.logger.info(f"批量统计: {len(matrix)} 个峰, {int(outliers.any(axis=1).sum())} 个异常")
+        return pd.concat([samples, summary], ignore_index=True)
+
+
+def calculate_mw_moments(peaks: List[NDArray[np.float64]]) -> NDArray[np.float64]:
+    """由切片表批量计算各峰的分子量矩（向量化）
+    
+    将所有峰拼接后用 bincount 按峰分组求和，一次完成全部峰的计算。
+    
+    Args:
+        peaks: 切片表峰数据列表，使用 MW_COLUMN_INDEX 与 NORM_COLUMN_INDEX 列
+        
+    Returns:
+        形状为 (峰数, 5) 的数组，列依次为 Mn, Mw, Mz, Mz+1, PD
+    """
+    if not peaks:
+        return np.zeros((0, 5))
+    
+    mw = np.concatenate([peak[:, MW_COLUMN_INDEX] for peak in peaks]).astype("float64")
+    weight = np.concatenate([peak[:, NORM_COLUMN_INDEX] for peak in peaks]).astype("float64")
+    peak_ids = np.repeat(np.arange(len(peaks)), [len(peak) for peak in peaks])
+    
+    valid = np.isfinite(mw) & np.isfinite(weight) & (mw > 0)
+    mw, weight, peak_ids = mw[valid], weight[valid], peak_ids[valid]
+    
+    def grouped_sum(values: NDArray[np.float64]) -> NDArray[np.float64]:
+        return np.bincount(peak_ids, weights=values, minlength=len(peaks))
+    
+    s_inverse = grouped_sum(weight / mw)
+    s0 = grouped_sum(weight)
+    s1 = grouped_sum(weight * mw)
+    s2 = grouped_sum(weight * mw ** 2)
+    s3 = grouped_sum(weight * mw ** 3)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mn = s0 / s_inverse
+        mw_avg = s1 / s0
+        mz = s2 / s1
+        mz1 = s3 / s2
+        pd_value = mw_avg / mn
+    return np.column_stack([mn, mw_avg, mz, mz1, pd_value])
+
+
+def compute_segment_features(segments: List[NDArray[np.float32]], x_index: int = 1, y_index: int = 2) -> NDArray:
+    """批量计算 DSC 曲线段的特征（方向、极值及其位置、中位数）
+
+    所有非空段拼接后用 reduceat 一次求出各段极值，极值位置取各段第一个等于极值的点（与 argmin/argmax 一致）。
+
+    Args:
+        segments: 曲线段列表
+        x_index: 横坐标（温度）列索引
+        y_index: 纵坐标（热流）列索引
+
+    Returns:
+        SEGMENT_FEATURE_DTYPE 结构化数组，与 segments 一一对应；空段只有 rows 为0
+    """
+    features = np.zeros(len(segments), dtype=SEGMENT_FEATURE_DTYPE)
+    lengths = np.array([len(segment) for segment in segments], dtype=np.int64)
+    features["rows"] = lengths
+    valid = np.flatnonzero(lengths > 0)
+    if len(valid) == 0:
+        return features
+
+    x = np.concatenate([segments[i][:, x_index] for i in valid])
+    y = np.concatenate([segments[i][:, y_index] for i in valid])
+    counts = lengths[valid]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    group = np.repeat(np.arange(len(valid)), counts)
+
+    def first_index(extreme: NDArray) -> NDArray[np.int64]:
+        # NaN 与 argmin/argmax 一样视为极值
+        hits = np.flatnonzero((y == extreme[group]) | np.isnan(y))
+        first = np.unique(group[hits], return_index=True)[1]
+        return hits[first] - starts
+
+    ymin = np.minimum.reduceat(y, starts)
+    ymax = np.maximum.reduceat(y, starts)
+    features["heating"][valid] = x[starts + counts - 1] > x[starts]
+    features["xmin"][valid] = np.minimum.reduceat(x, starts)
+    features["xmax"][valid] = np.maximum.reduceat(x, starts)
+    features["ymin"][valid] = ymin
+    features["ymax"][valid] = ymax
+    features["imin"][valid] = first_index(ymin)
+    features["imax"][valid] = first_index(ymax)
+    features["median"][valid] = [np.median(segments[i][:, y_index]) for i in valid]
+    return features
+
+
+def asls_baselines(segments: List[NDArray], lam: float = BASELINE_LAM, p: float = BASELINE_P,
+                   max_iter: int = BASELINE_MAX_ITER) -> List[NDArray[np.float64]]:
+    """非对称最小二乘（AsLS）基线拟合，所有曲线段一次批量求解
+
+    各段拼接为一个块对角的五对角系统 (W + lam·DᵀD) z = W y，D 为段内二阶差分（段与段之间不耦合），
+    用 solveh_banded 做带状 Cholesky 求解；DᵀD 的带状存储只构造一次，迭代中只更新对角线上的权重。
+    非有限值（NaN、inf）的权重为0，由平滑项插值，不会经求解扩散到其他段；
+    有限点不足以确定基线的段（少于2个，或不足3点且含非有限值）不参与求解，基线为 NaN。
+
+    Args:
+        segments: 一维曲线段列表（峰应朝上）
+        lam: 平滑参数
+        p: 非对称权重
+        max_iter: 最大迭代次数
+
+    Returns:
+        与 segments 一一对应的基线
+    """
+    from scipy.linalg import solveh_banded
+
+    lengths = np.array([len(segment) for segment in segments], dtype=np.int64)
+    baselines = [np.full(length, np.nan) for length in lengths]
+    y = np.concatenate(segments).astype(np.float64) if segments else np.zeros(0)
+    if len(y) == 0:
+        return baselines
+
+    segment_ids = np.repeat(np.arange(len(segments)), lengths)
+    finite = np.isfinite(y)
+    finite_counts = np.bincount(segment_ids, weights=finite, minlength=len(segments))
+    solvable = (finite_counts == lengths) | ((finite_counts >= 2) & (lengths >= 3))
+    keep = solvable[segment_ids]
+    y = np.where(finite, y, 0.0)[keep]
+    finite = finite[keep]
+    segment_ids = segment_ids[keep]
+    n = len(y)
+    if n == 0:
+        return baselines
+
+    # 第 k 行差分 (k, k+1, k+2) 只在三点同属一段时存在
+    rows = lam * (segment_ids[:-2] == segment_ids[2:])
+
+    # 上三角带状存储：ab[2] 主对角线，ab[1, j] = A[j-1, j]，ab[0, j] = A[j-2, j]
+    ab = np.zeros((3, n))
+    ab[0, 2:] = rows
+    ab[1, 1:n - 1] -= 2 * rows
+    ab[1, 2:] -= 2 * rows
+    ab[2, :n - 2] += rows
+    ab[2, 1:n - 1] += 4 * rows
+    ab[2, 2:] += rows
+    penalty = ab[2].copy()
+
+    weights = finite.astype(np.float64)
+    baseline = y
+    for _ in range(max_iter):
+        ab[2] = penalty + weights
+        baseline = solveh_banded(ab, weights * y, check_finite=False)
+        new_weights = np.where(finite, np.where(y > baseline, p, 1 - p), 0.0)
+        if np.array_equal(new_weights, weights):
+            break
+        weights = new_weights
+    for idx, piece in zip(np.flatnonzero(solvable), np.split(baseline, np.cumsum(lengths[solvable])[:-1])):
+        baselines[idx] = piece
+    return baselines
+
+
+def bin_segment(segment: NDArray, points: int = DSC_TRANSITION_POINTS) -> NDArray[np.float64]:
+    """将曲线段按行分箱平均到约 points 个点
+
+    Args:
+        segment: 曲线段（时间、温度、热流）
+        points: 目标点数
+
+    Returns:
+        分箱后的 float64 数组，行数不超过原段
+    """
+    factor = max(1, len(segment) // points)
+    rows = len(segment) // factor * factor
+    return segment[:rows].astype(np.float64).reshape(-1, factor, segment.shape[1]).mean(axis=1)
+
+
+def detect_transitions(segments: List[NDArray], heating: NDArray[np.bool_], exo_up: bool = DSC_EXO_UP,
+                       time_factor: float = 60.0) -> List[Dict[str, Any]]:
+    """检测各循环段的熔融/结晶峰和玻璃化转变，并积分峰焓
+
+    各段先分箱到 DSC_TRANSITION_POINTS 点；吸热向上、放热向上两个方向各做一次批量 AsLS 基线，
+    在扣除基线的曲线上用 find_peaks 找峰，峰焓为积分区间内相对端点连线（线性基线）的面积。
+    升温段另在热流对温度的平滑导数上寻找台阶作为 Tg（屏蔽强峰所在区间）。
+
+    Args:
+        segments: 曲线段列表（时间、温度、热流）
+        heating: 各段是否为升温段
+        exo_up: 热流是否放热向上
+        time_factor: 时间单位换算为秒的系数（TA 数据时间单位为 min）
+
+    Returns:
+        结果行列表，键为 Cycle, Direction, Transition, Start, Peak, End, Enthalpy, Step；
+        吸热峰焓为正、放热峰焓为负
+    """
+    from scipy.signal import find_peaks, peak_widths, savgol_filter
+
+    binned = [bin_segment(segment) if len(segment) > 2 else np.zeros((0, 3)) for segment in segments]
+    valid = [i for i, data in enumerate(binned) if len(data) > 10]
+    if not valid:
+        return []
+
+    steps = {i: np.mean(np.abs(np.diff(binned[i][:, 1]))) for i in valid}
+    valid = [i for i in valid if steps[i] > 0]
+    if not valid:
+        return []
+    lam = (DSC_TRANSITION_BASELINE_DEG / np.median([steps[i] for i in valid])) ** 4
+
+    # 吸热为正的热流；sign=1 找吸热峰，sign=-1 找放热峰
+    endo = {i: (-binned[i][:, 2] if exo_up else binned[i][:, 2]) for i in valid}
+    corrected = {}
+    for sign in (1, -1):
+        curves = [sign * endo[i] for i in valid]
+        for i, curve, baseline in zip(valid, curves, asls_baselines(curves, lam=lam)):
+            corrected[i, sign] = (curve, curve - baseline)
+
+    results = []
+    for i in valid:
+        t, x = binned[i][:, 0], binned[i][:, 1]
+        step = steps[i]
+
+        candidates = []
+        for sign in (1, -1):
+            curve, signal = corrected[i, sign]
+            noise = np.median(np.abs(np.diff(signal))) / (0.6745 * np.sqrt(2))
+            peaks, props = find_peaks(signal, prominence=max(DSC_PEAK_SNR * noise, np.finfo(float).tiny),
+                                      width=(DSC_PEAK_MIN_WIDTH_DEG / step, DSC_PEAK_MAX_WIDTH_DEG / step))
+            if len(peaks) == 0:
+                continue
+            lefts, rights = peak_widths(signal, peaks, rel_height=0.99)[2:]
+            for peak, prominence, left, right in zip(peaks, props["prominences"], lefts, rights):
+                candidates.append((sign, int(peak), prominence, int(np.floor(left)), int(np.ceil(right))))
+        top = max((candidate[2] for candidate in candidates), default=0.0)
+        candidates = [candidate for candidate in candidates if candidate[2] >= DSC_PEAK_MIN_RELATIVE * top]
+
+        # 玻璃化转变：吸热方向的台阶，对应平滑导数的正峰
+        tg = None
+        height = 0.0
+        if heating[i]:
+            window = max(5, int(DSC_TG_SMOOTH_DEG / step) | 1)
+            if window < len(x):
+                derivative = savgol_filter(endo[i], window, 2, deriv=1) / savgol_filter(x, window, 2, deriv=1)
+                derivative -= np.median(derivative)
+                mask = np.ones(len(derivative), dtype=bool)
+                for _, _, prominence, left, right in candidates:
+                    if prominence >= DSC_PEAK_STRONG_RELATIVE * top:
+                        mask[max(0, left - window):right + window] = False
+                noise = np.median(np.abs(derivative)) / 0.6745
+                peaks, props = find_peaks(np.where(mask, derivative, 0.0), prominence=max(DSC_TG_SNR * noise, np.finfo(float).tiny))
+                if len(peaks):
+                    k = int(peaks[np.argmax(props["prominences"])])
+                    n = max(1, int(DSC_TG_WINDOW_DEG / step))
+                    before, after = endo[i][max(0, k - 2 * n):max(1, k - n)], endo[i][k + n:k + 2 * n]
+                    if len(before) and len(after):
+                        tg = x[k]
+                        height = float(np.mean(after) - np.mean(before))
+                        results.append({"Cycle": i + 1, "Direction": "Heating", "Transition": "Tg",
+                                        "Start": x[max(0, k - n)], "Peak": tg, "End": x[min(len(x) - 1, k + n)],
+                                        "Enthalpy": np.nan, "Step": height})
+
+        for sign, peak, prominence, left, right in candidates:
+            # Tg 台阶在扣除平滑基线后会表现为小鼓包，不计为峰
+            if tg is not None and abs(x[peak] - tg) < DSC_TG_EXCLUSION_DEG and prominence < 2 * abs(height):
+                continue
+            curve = corrected[i, sign][0][left:right + 1]
+            times = t[left:right + 1]
+            excess = curve - np.interp(times, [times[0], times[-1]], [curve[0], curve[-1]])
+            area = np.sum((excess[1:] + excess[:-1]) * np.diff(times)) / 2 * time_factor
+            if sign == 1:
+                kind = "Melting" if heating[i] else "Endotherm"
+            else:
+                kind = "Cold crystallization" if heating[i] else "Crystallization"
+            results.append({"Cycle": i + 1, "Direction": "Heating" if heating[i] else "Cooling", "Transition": kind,
+                            "Start": x[left], "Peak": x[peak], "End": x[right], "Enthalpy": sign * area, "Step": np.nan})
+    return results
+
+
+def minmax_decimate(y: NDArray, buckets: int = DSC_PREVIEW_BUCKETS) -> NDArray[np.int64]:
+    """最小-最大降采样：按行等分为 buckets 桶，每桶保留最小值和最大值所在的行
+
+    每个像素列内的极值都被保留，因此按输出宽度选取桶数时，画出的折线与全分辨率数据在视觉上一致；
+    全局极值取第一次出现的位置，与 compute_segment_features 的 imin/imax 一致。
+
+    Args:
+        y: 一维曲线
+        buckets: 桶数
+
+    Returns:
+        保留的行号（升序，包含首尾两行）
+    """
+    n = len(y)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    size = -(-n // buckets)
+    rows = -(-n // size)
+    # 末桶用最后一个值补齐，补齐的值排在真实值之后，不影响第一次出现的位置
+    padded = np.pad(y, (0, rows * size - n), mode="edge").reshape(rows, size)
+    offsets = np.arange(rows) * size
+    keep = np.concatenate((offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1), [0, n - 1]))
+    return np.unique(np.minimum(keep, n - 1))
+
+
+def segment_peak_index(feature: np.void, upward: bool) -> int:
+    """由段特征确定峰的位置
+
+    Args:
+        feature: compute_segment_features 返回的一条记录
+        upward: 是否峰始终向上（升温段翻转后取最大值）
+
+    Returns:
+        峰所在行号
+    """
+    if upward:
+        return int(feature["imin"] if feature["heating"] else feature["imax"])
+    # 离中位数最远的极值
+    if abs(feature["ymin"] - feature["median"]) > abs(feature["ymax"] - feature["median"]):
+        return int(feature["imin"])
+    return int(feature["imax"])
+
+
+class MomentValidator:
+    """分子量校验器 - 用切片表重算的分子量矩校验 MW_Averages 报告值"""
+    
+    METRICS = ["Mn", "Mw", "Mz", "Mz+1", "PD"]
+    
+    def __init__(self, tolerance: float = MOMENT_TOLERANCE, logger: Optional[Logger] = None) -> None:
+        """初始化校验器
+        
+        Args:
+            tolerance: 相对误差容限
+            logger: 日志器实例
+        """
+        self.tolerance = tolerance
+        self.logger: Logger = logger or Logger()
+    
+    def validate(self, mw_table: pd.DataFrame, peaks: List[NDArray[np.float64]]) -> pd.DataFrame:
+        """批量校验所有峰
+        
+        Args:
+            mw_table: 分子量表格（可包含多个样品），与 peaks 按行一一对应
+            peaks: 切片表峰数据列表；少于表格行数时（切片表被截断），缺少的峰按空峰校验
+            
+        Returns:
+            校验结果 DataFrame：每行对应 mw_table 的一行，包含重算值、报告值、相对误差及不一致的指标
+        """
+        count = len(mw_table)
+        peaks = list(peaks[:count])
+        if len(peaks) < count:
+            # 空峰重算为 NaN，有报告值的行会被标记为不一致
+            peaks.extend([np.zeros((0, MIN_GPC_PEAK_COLUMNS + 1))] * (count - len(peaks)))
+        calculated = calculate_mw_moments(peaks)
+        reported = mw_table[self.METRICS].to_numpy(dtype="float64")
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative_error = np.abs(calculated - reported) / np.abs(reported)
+        # 报告值存在但切片表无法重算（如峰被截断丢失）同样视为不一致
+        mismatch = (relative_error > self.tolerance) | (np.isnan(calculated) & np.isfinite(reported))
+        
+        result = pd.DataFrame({"Samplename": mw_table["Samplename"].to_numpy()[:count]})
+        for col_idx, metric in enumerate(self.METRICS):
+            result[metric + " (calc)"] = calculated[:, col_idx]
+            result[metric + " (reported)"] = reported[:, col_idx]
+            result[metric + " (rel err)"] = relative_error[:, col_idx]
+        result["Mismatch"] = [", ".join(m for m, flag in zip(self.METRICS, row) if flag) for row in mismatch]
+        return result
+    
+    def report(self, result: pd.DataFrame, show_ui: bool = True) -> List[str]:
+        """记录校验不通过的样品
+        
+        Args:
+            result: validate 的返回值
+            show_ui: 是否在UI中显示
+            
+        Returns:
+            校验不通过的样品名列表
+        """
+        failed = result.loc[result["Mismatch"] != "", "Samplename"].unique().tolist()
+        if failed:
+            self.logger.warning(f"以下样品的分子量与切片表重算值偏差超过 {self.tolerance:.0%}，"
+                                f"可能为截断导出: {', '.join(map(str, failed))}", show_ui=show_ui)
+        return failed
+
+
 class BaseAnalyzer:
     """分析器基类，包含共同的文件和目录操作方法"""
     
-    def __init__(self, datadir: str):
+    def __init__(self, datadir: str, figure_format: Optional[str] = None, png_compress_level: Optional[int] = None):
         """初始化基类
         
         Args:
             datadir: 数据目录路径
+            figure_format: 保存图片的格式（FIGURE_FORMATS 之一），为None时读取环境变量 FIGURE_FORMAT_ENV_VAR
+            png_compress_level: PNG 压缩级别 0-9，为None时读取环境变量 PNG_COMPRESS_LEVEL_ENV_VAR
         """
         self.rootdir = os.path.dirname(os.path.abspath(__file__))
         self.data_path = os.path.join(self.rootdir, "datapath")
-        self._cached_file_list: Optional[List[str]] = None
+        # 提供了有效的数据目录或压缩包时覆盖默认设置
+        if datadir and is_data_source(datadir):
+            self.data_path = datadir
+        self.source: DataSource = open_data_source(self.data_path)  # 数据文件的读取入口（目录、压缩包或网络共享）
         self.lines: List[str] = []
         self.filename = ""
         self.sample_name = ""
-        self.mw_data = []
+        self.mw_data: pd.DataFrame = empty_mw_table()
         self.peak_num = 0
         self.peak_pos = []
         self.peak_data = {}
@@ -440,7 +2183,140 @@ class BaseAnalyzer:
         # 集成日志器和验证器
         self.logger = logger  # 使用全局日志器实例
         self.validator = DataValidator(self.logger)
-    
+        self.moment_validator = MomentValidator(logger=self.logger)
+        self.timer = StageTimer(type(self).__name__)
+        self.profile_files: List[str] = []  # 最近一次剖析运行保存的文件
+        self.figure_format = resolve_figure_format(figure_format)  # 保存图片的格式
+        self.png_compress_level = resolve_png_compress_level(png_compress_level)
+        self.figure_writer = FigureWriter(self.logger)  # 高分辨率图片的后台绘制、编码与保存
+
+    def render_figure(self, kind: str, data_digest: str, settings: Dict[str, Any], draw: Callable[[], Any],
+                      save_path: Optional[str] = None, display: bool = False, transparent: bool = False,
+                      display_width: Union[str, int] = "stretch", container: Any = None,
+                      report: Optional[FigureReport] = None) -> None:
+        """绘图并保存/显示，数据和设置未变时直接使用缓存的图片
+        
+        界面显示 PREVIEW_DPI 的 PNG 预览图；保存的 FIGURE_DPI 图片（figure_format 格式）交给后台写入器，
+        运行结束前由 flush_figures 等待完成。
+        
+        Args:
+            kind: 图形类型
+            data_digest: 绘图数据的摘要
+            settings: 影响图片内容的设置
+            draw: 创建并返回 matplotlib 图形的函数（仅缓存未命中时调用）
+            save_path: 图片保存路径（扩展名见 figure_name），为None时不保存
+            display: 是否在界面中显示
+            transparent: 是否透明背景
+            display_width: 界面显示宽度（st.image 的 width 参数）
+            container: 显示所用的 Streamlit 容器（如标签页），为None时直接显示
+            report: 批量报告，不为None时图形总会绘制并写入报告
+        """
+        if not save_path and not display and report is None:
+            return
+        import matplotlib
+        import matplotlib.pyplot as plt
+        
+        cache = figure_cache(self.rootdir)
+        settings = dict(settings, transparent=transparent, app_version=APP_VERSION, matplotlib=matplotlib.__version__)
+        
+        def lookup(dpi: int, figure_format: str = "png", compress_level: int = PREVIEW_COMPRESS_LEVEL) -> Tuple[Optional[str], Optional[bytes]]:
+            if cache is None:
+                return None, None
+            key = cache.make_key(kind, data_digest, dict(settings, dpi=dpi, format=figure_format, compress_level=compress_level))
+            return key, cache.get(key)
+        
+        preview_key, preview = lookup(PREVIEW_DPI) if display else (None, None)
+        image_key, image = lookup(FIGURE_DPI, self.figure_format, self.png_compress_level) if save_path else (None, None)
+        if (display and preview is None) or (save_path and image is None) or report is not None:
+            with self.timer.stage("figure"):
+                fig = draw()
+            # 从 pyplot 中分离，之后可交给后台线程渲染
+            plt.close(fig)
+            if report is not None:
+                # 在交给后台写入器之前写入报告，图形不会被两个线程同时访问
+                with self.timer.stage("report"):
+                    report.add(fig, transparent)
+        else:
+            fig = None
+            self.logger.debug(f"图片缓存命中: {kind}")
+        
+        if display:
+            if preview is None:
+                with self.timer.stage("savefig"):
+                    preview = render_figure_bytes(fig, "png", PREVIEW_DPI, transparent, PREVIEW_COMPRESS_LEVEL)
+                if cache is not None:
+                    cache.put(preview_key, preview)
+            with self.timer.stage("display"), (container if container is not None else nullcontext()):
+                st.image(preview, width=display_width)
+        if save_path:
+            with self.timer.stage("savefig"):
+                if image is not None:
+                    with open(save_path, "wb") as f:
+                        f.write(image)
+                else:
+                    on_done = (lambda data: cache.put(image_key, data)) if cache is not None else None
+                    self.figure_writer.submit(fig, save_path, transparent, self.figure_format, self.png_compress_level, on_done)
+
+    def figure_name(self, stem: str) -> str:
+        """按保存格式得到图片文件名
+        
+        Args:
+            stem: 不含扩展名的文件名
+        
+        Returns:
+            文件名
+        """
+        return f"{stem}.{self.figure_format}"
+
+    def flush_figures(self) -> List[str]:
+        """等待后台保存的图片全部写入
+        
+        Returns:
+            保存失败的图片路径列表
+        """
+        with self.timer.stage("savefig"):
+            failed = self.figure_writer.wait()
+        for path in failed:
+            self.logger.error(f"保存图片失败: {os.path.basename(path)}", show_ui=True)
+        return failed
+
+    def profile_dir(self) -> str:
+        """性能剖析结果的保存目录（输出目录下的 PROFILE_DIR_NAME 子目录）
+
+        Returns:
+            目录路径
+        """
+        return os.path.join(getattr(self, "output_dir", self.rootdir), PROFILE_DIR_NAME)
+
+    def run_profiled(self, mode: Optional[str] = None, trace_memory: Optional[bool] = None) -> bool:
+        """运行分析流程，按需开启性能剖析和 tracemalloc 内存追踪
+
+        Args:
+            mode: 剖析模式（PROFILE_MODES 之一或 "off"），为None时读取环境变量 PROFILE_ENV_VAR
+            trace_memory: 是否开启 tracemalloc，为None时读取环境变量 TRACEMALLOC_ENV_VAR
+
+        Returns:
+            bool: run() 的返回值
+        """
+        self.profile_files = []
+        mode = resolve_profile_mode(mode)
+        start_tracing = resolve_trace_memory(trace_memory)
+        if start_tracing:
+            get_memory_tracer().start()
+        try:
+            if mode is None:
+                return self.run()
+
+            profiler = RunProfiler(self.profile_dir(), type(self).__name__, mode)
+            result = profiler.run(self.run)
+            self.profile_files = profiler.files
+            return result
+        finally:
+            self.figure_writer.close()
+            self.source.close()
+            if start_tracing:
+                get_memory_tracer().stop()
+
     def open_folder(self, path: str) -> None:
         """跨平台打开文件夹
         
@@ -468,7 +2344,7 @@ class BaseAnalyzer:
         self.lines = []
         self.filename = ""
         self.sample_name = ""
-        self.mw_data = []
+        self.mw_data = empty_mw_table()
         self.peak_num = 0
         self.peak_pos = []
         if reset_peak_data:
@@ -488,7 +2364,7 @@ class BaseAnalyzer:
                 if os.path.isfile(file_path):
                     os.remove(file_path)
             except Exception as e:
-                st.warning(f"删除文件失败 {filename}: {e}")
+                self.logger.warning(f"删除文件失败 {filename}: {e}")
     
     def read_file(self, name: str, reset_peak_data: bool = True) -> bool:
         """读取数据文件（优化版：使用生成器逐行读取）
@@ -502,11 +2378,10 @@ class BaseAnalyzer:
         """
         self.reset(reset_peak_data=reset_peak_data)
         self.filename = name
-        file_path = os.path.join(self.data_path, name)
         
         try:
             # 优化：使用列表推导式和生成器，一次性过滤空行
-            with open(file_path, "r", encoding="ascii") as file:
+            with self.timer.stage("read"), self.source.open(name, encoding="ascii") as file:
                 self.lines = [line.strip() for line in file if line.strip()]
             return True
         except FileNotFoundError:
@@ -520,17 +2395,19 @@ class BaseAnalyzer:
             return False
     
     def read_file_list(self, force_refresh: bool = False) -> List[str]:
-        """读取数据目录中的所有.rst文件列表（带缓存）
+        """读取数据目录中的所有.rst文件列表
+        
+        文件列表来自数据源；本地目录使用进程级共享的目录索引，数据目录未变化时 Streamlit 重新运行不会重新扫描目录。
         
         Args:
-            force_refresh: 强制刷新缓存
+            force_refresh: 强制重新扫描目录
             
         Returns:
             文件名列表
         """
-        if self._cached_file_list is None or force_refresh:
-            self._cached_file_list = [os.path.basename(i) for i in glob.glob(os.path.join(self.data_path, "*.rst"))]
-        return self._cached_file_list
+        if force_refresh:
+            self.source.refresh()
+        return self.source.files("*.rst")
     
     def preprocess_common(self) -> Tuple[int, int, int]:
         """预处理数据的公共部分，提取关键位置
@@ -566,17 +2443,58 @@ class BaseAnalyzer:
         
         return mw_start, mw_end, slice_table_start
 
+    def parse_mw_averages(self, mw_start: int, mw_end: int) -> pd.DataFrame:
+        """解析 MW_Averages 区域为数值表格（每个峰一行）
+        
+        Args:
+            mw_start: MW起始位置
+            mw_end: MW结束位置
+            
+        Returns:
+            列为 MW_TABLE_COLUMNS 的 DataFrame，Mp~PD 为 float64，无法解析的值为 NaN
+        """
+        field_count = len(MW_AVERAGE_FIELDS)
+        rows = []
+        for line in self.lines[mw_start + MW_DATA_OFFSET:mw_end]:
+            parts = line.split('\t')
+            if len(parts) > 1:
+                values = parts[1:field_count + 1]
+                if len(values) < field_count:
+                    self.logger.warning(f"文件 {self.filename}: 分子量数据列数不足，缺失值按空值处理", show_ui=False)
+                    values = values + [""] * (field_count - len(values))
+                rows.append(values)
+        
+        if not rows:
+            return empty_mw_table()
+        
+        table = pd.DataFrame(rows, columns=MW_AVERAGE_FIELDS)
+        table = table.apply(pd.to_numeric, errors="coerce").astype("float64")
+        table.insert(0, "Samplename", self.sample_name)
+        return table
+
 class MolecularWeightAnalyzer(BaseAnalyzer):
     def __init__(self, datadir: str, save_file: bool = True, bar_width: float = 1.2, line_width: float = 1.0, axis_width: float = 1.0,
                  title_font_size: float = 20, axis_font_size: float = 14, transparent_back: bool = DEFAULT_TRANSPARENT_BACK, save_picture: bool = True, display_picture: bool = False, 
                  bar_color: str = DEFAULT_BAR_COLOR, mw_color: str = DEFAULT_MW_COLOR, draw_bar: bool = True, draw_mw: bool = True, draw_table: bool = True, 
-                 setting_name: str = DEFAULT_SETTING_NAME, test_mode: bool = False, progress_callback: Optional[Callable[[float, str], None]] = None) -> None:
+                 setting_name: str = DEFAULT_SETTING_NAME, test_mode: bool = False, progress_callback: Optional[Callable[[float, str], None]] = None,
+                 incremental: bool = False, figure_format: Optional[str] = None, png_compress_level: Optional[int] = None,
+                 report_format: Optional[str] = None, small_multiples: bool = False) -> None:
         # 调用基类构造函数
-        super().__init__(datadir)
+        super().__init__(datadir, figure_format, png_compress_level)
         self.output_dir = os.path.join(self.rootdir, "Mw_output")
         self.setting_dir = os.path.join(self.rootdir, "setting")
         self.file_list : Optional[List[str]] = None
         self.selected_file = None
+        self.incremental = incremental  # 增量更新：只重画输入或设置发生变化的图片
+        self.table_renderer = resolve_table_renderer()  # 表格渲染器（环境变量 TABLE_RENDERER_ENV_VAR）
+        self.report_format = report_format if report_format in MW_REPORT_FORMATS else None  # 批量报告：所有图片汇总为一个文件
+        self.report: Optional[FigureReport] = None
+        self.report_files: List[str] = []  # 本次运行生成的报告文件
+        self.small_multiples = small_multiples  # 组图模式：多个样品画在同一页的小图阵列中，代替逐个文件的图片
+        self.grid_panels: List[Dict[str, Any]] = []  # 当前页尚未绘制的小图数据
+        self.grid_pages = 0  # 本次运行已绘制的组图页数
+        self._axis_style: Optional[MwAxisStyle] = None  # 按设置缓存的坐标轴样式，见 axis_style
+        self.skipped_files: List[str] = []  # 本次运行因已是最新而跳过的文件
         
         # 每个文件的数据存储
         self.norm = None
@@ -587,7 +2505,7 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
 
         # 初始化设置管理器
         default_setting = {
-            "segmentpos": [0, 5000, 10000, 50000, 100000, 500000, 1000000, 5000000, 10000000, 50000000],
+            "segmentpos": list(DEFAULT_SEGMENT_POS),
             "bar_color": DEFAULT_BAR_COLOR,
             "mw_color": DEFAULT_MW_COLOR,
             "transparent_back": DEFAULT_TRANSPARENT_BACK,
@@ -626,14 +2544,16 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         
         # 初始化分段位置
         if "segmentpos" not in st.session_state:
-            self.segmentpos = setting.get("segmentpos", [0, 5000, 10000, 50000, 100000, 500000, 1000000, 5000000, 10000000, 50000000])
+            # 设置文件可能被手工编辑，统一为升序且不重复
+            self.segmentpos = sorted(set(setting.get("segmentpos", list(DEFAULT_SEGMENT_POS))))
             st.session_state["segmentpos"] = self.segmentpos
         else:
             self.segmentpos = st.session_state["segmentpos"]
         
         if "selectedpos" not in st.session_state:
-            self.selectedpos = self.segmentpos
-            st.session_state["selectedpos"] = self.segmentpos
+            # 选中位置与候选位置分开存放，add_region 只改变候选位置
+            self.selectedpos = list(self.segmentpos)
+            st.session_state["selectedpos"] = self.selectedpos
         else:
             self.selectedpos = st.session_state["selectedpos"]
         
@@ -649,16 +2569,128 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         """清空输出目录"""
         super().clear_dir(self.output_dir)
 
-    def check_dir(self) -> bool:
-        """检查输出目录中是否存在同名文件
+    def check_dir(self) -> bool:
+        """检查输出目录中是否存在同名文件
+        
+        Returns:
+            bool: 存在同名文件返回True
+        """
+        for file in self.selected_file:
+            if os.path.exists(self.picture_path(file)):
+                return True
+        return False    
+
+    def picture_path(self, filename: str) -> str:
+        """获取数据文件对应的输出图片路径
+        
+        Args:
+            filename: 数据文件名
+        
+        Returns:
+            图片路径
+        """
+        return os.path.join(self.output_dir, self.figure_name(os.path.splitext(filename)[0]))
+
+    def manifest_path(self) -> str:
+        """获取增量更新清单的路径"""
+        return os.path.join(self.output_dir, MW_MANIFEST_NAME)
+
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """读取增量更新清单
+        
+        Returns:
+            文件名 -> 指纹记录；清单不存在、损坏或版本不符时返回空字典（全部重画）
+        """
+        try:
+            with open(self.manifest_path(), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or manifest.get("version") != MW_MANIFEST_VERSION:
+            return {}
+        files = manifest.get("files")
+        return files if isinstance(files, dict) else {}
+
+    def save_manifest(self, files: Dict[str, Dict[str, Any]]) -> None:
+        """原子写入增量更新清单
+        
+        Args:
+            files: 文件名 -> 指纹记录
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        content = json.dumps({"version": MW_MANIFEST_VERSION, "files": files}, indent=2, ensure_ascii=False)
+        try:
+            atomic_write(self.manifest_path(), content)
+        except OSError as e:
+            self.logger.warning(f"保存增量更新清单失败: {e}")
+
+    def settings_fingerprint(self) -> str:
+        """计算影响图片内容的设置的指纹（设置项、图形尺寸与软件版本）
+        
+        Returns:
+            十六进制摘要
+        """
+        settings = {name: getattr(self, name) for name in MW_FINGERPRINT_SETTINGS}
+        settings.update(app_version=APP_VERSION, dpi=FIGURE_DPI,
+                        sizes=[FIGURE_SIZE_WITH_TABLE, FIGURE_SIZE_WITHOUT_TABLE])
+        return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def input_stamp(self, filename: str) -> Optional[Dict[str, int]]:
+        """获取输入文件的版本标记（大小和修改时间，来自数据源，无需读取文件）
+        
+        Args:
+            filename: 数据文件名
+        
+        Returns:
+            {"size", "mtime_ns"}，文件不在数据源中时返回None
+        """
+        entry = self.source.stat(filename)
+        if entry is None:
+            return None
+        return {"size": entry.size, "mtime_ns": entry.mtime_ns}
+
+    def content_digest(self) -> str:
+        """计算当前文件内容（去空行后的各行）的摘要"""
+        digest = hashlib.sha1()
+        for line in self.lines:
+            digest.update(line.encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def is_up_to_date(self, filename: str, record: Optional[Dict[str, Any]], fingerprint: str,
+                      stamp: Optional[Dict[str, int]] = None, digest: Optional[str] = None) -> bool:
+        """判断输出图片是否已是最新（make 式比较）
+        
+        设置指纹必须一致且图片存在；输入文件的大小和修改时间一致，或（修改时间变化但）内容摘要一致。
+        
+        Args:
+            filename: 数据文件名
+            record: 清单中的指纹记录
+            fingerprint: 当前设置指纹
+            stamp: 输入文件当前的版本标记
+            digest: 输入文件当前的内容摘要（已读入文件时提供）
+        
+        Returns:
+            已是最新返回True
+        """
+        if not record or record.get("settings") != fingerprint or not os.path.exists(self.picture_path(filename)):
+            return False
+        if stamp is not None and record.get("size") == stamp["size"] and record.get("mtime_ns") == stamp["mtime_ns"]:
+            return True
+        return digest is not None and record.get("sha1") == digest
+
+    def skip_file(self, filename: str) -> None:
+        """跳过已是最新的文件；需要显示图片时显示已有的图片
         
-        Returns:
-            bool: 存在同名文件返回True
+        Args:
+            filename: 数据文件名
         """
-        for file in self.selected_file:
-            if os.path.exists(os.path.join(self.output_dir, os.path.splitext(file)[0] + '.png')):
-                return True
-        return False    
+        self.skipped_files.append(filename)
+        self.logger.info(f"图片已是最新，跳过: {filename}")
+        # 矢量格式的图片无法在界面中直接显示
+        if self.display_picture and self.figure_format not in FIGURE_VECTOR_FORMATS:
+            with self.timer.stage("display"):
+                st.image(self.picture_path(filename))
 
     def setting_list(self) -> List[str]:
         """获取所有设置文件列表
@@ -690,8 +2722,8 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         }
         
         self.settings_manager.save_setting(setting, new_setting_name)
-        st.session_state["segmentpos"] = self.selectedpos
-        st.session_state["selectedpos"] = self.selectedpos
+        st.session_state["segmentpos"] = list(self.selectedpos)
+        st.session_state["selectedpos"] = list(self.selectedpos)
                         
     def delete_setting(self, settingname: str) -> None:
         """删除指定的设置文件
@@ -716,6 +2748,8 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         Args:
             new_region: 新的分割点值
         """
+        if new_region in self.segmentpos:
+            return
         self.segmentpos.append(new_region)
         self.segmentpos.sort()
     
@@ -730,11 +2764,10 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         """
         self.reset()
         self.filename = name
-        file_path = os.path.join(self.data_path, name)
         
         try:
             # 优化：使用列表推导式和生成器，一次性过滤空行
-            with open(file_path, "r", encoding="ascii") as file:
+            with self.timer.stage("read"), self.source.open(name, encoding="ascii") as file:
                 self.lines = [line.strip() for line in file if line.strip()]
             return True
         except FileNotFoundError:
@@ -753,12 +2786,9 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         mw_start, mw_end, slice_table_start = self.preprocess_common()
 
         # 整理分子量数据
-        for line in self.lines[mw_start + MW_DATA_OFFSET:mw_end]:
-            parts = line.split('\t')
-            if len(parts) > 1:
-                self.mw_data.append([self.sample_name] + parts[1:])
+        self.mw_data = self.parse_mw_averages(mw_start, mw_end)
         
-        if not self.mw_data:
+        if self.mw_data.empty:
             raise ValueError("未找到分子量数据")
         
         self.peak_num = len(self.mw_data)
@@ -776,9 +2806,9 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
                         self.mw = peak_array[:, MW_COLUMN_INDEX]
                         all_peaks.append(peak_array)
                     else:
-                        st.warning(f"峰数据格式不正确，跳过该峰")
+                        self.logger.warning(f"文件 {self.filename}: 峰数据格式不正确，跳过该峰")
                 except (ValueError, IndexError) as e:
-                    st.warning(f"峰数据转换失败: {e}")
+                    self.logger.warning(f"文件 {self.filename}: 峰数据转换失败: {e}")
                 current_peak = []
                 continue
             if "RT" in line:
@@ -792,6 +2822,8 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
             raise ValueError("未找到有效的峰数据")
         
         self.peak_data = all_peaks
+        with self.timer.stage("compute"):
+            self.moment_validator.report(self.moment_validator.validate(self.mw_data, all_peaks))
 
     def transform_number(self, num: float) -> str:
         """将数字转换为科学记数法格式
@@ -802,9 +2834,7 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         Returns:
             科学记数法字符串
         """
-        dig = len(str(num)) - 1
-        front = num / (10 ** dig)
-        return '{:.1f} × 10$^{}$'.format(front, dig)
+        return format_mw_label(num)
     
     def start_width(self) -> int:
         """计算起始宽度
@@ -833,13 +2863,7 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         Returns:
             List[float]: 各区间百分比列表
         """
-        segment_percentages = []
-        for segment_idx in range(len(self.selectedpos) - 1):
-            lower_bound = self.selectedpos[segment_idx]
-            upper_bound = self.selectedpos[segment_idx + 1]
-            mask = (self.mw < upper_bound) & (self.mw > lower_bound)
-            segment_sum = np.sum(self.norm[np.where(mask)]) * PERCENTAGE_FACTOR
-            segment_percentages.append(segment_sum)
+        segment_percentages = calculate_segment_percentages(self.mw, self.norm, self.selectedpos).tolist()
         self.logger.debug(f"计算区间百分比: {segment_percentages}")
         return segment_percentages
     
@@ -849,13 +2873,14 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         Returns:
             Tuple: (fig, ax, gs) 图形、坐标轴和GridSpec对象
         """
-        import matplotlib.pyplot as plt
+        from matplotlib.figure import Figure
         import matplotlib.gridspec as gridspec
         
+        # 直接创建 Figure，不注册到 pyplot
         if self.draw_table:
-            fig = plt.figure(dpi=FIGURE_DPI, figsize=FIGURE_SIZE_WITH_TABLE)
+            fig = Figure(dpi=FIGURE_DPI, figsize=FIGURE_SIZE_WITH_TABLE)
         else:
-            fig = plt.figure(dpi=FIGURE_DPI, figsize=FIGURE_SIZE_WITHOUT_TABLE)
+            fig = Figure(dpi=FIGURE_DPI, figsize=FIGURE_SIZE_WITHOUT_TABLE)
 
         if self.transparent_back:
             fig.patch.set_alpha(0.0)
@@ -868,6 +2893,18 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         
         return fig, ax, gs
     
+    def axis_style(self) -> MwAxisStyle:
+        """获取当前设置的坐标轴样式（设置不变时复用，批量绘图只计算一次）
+        
+        Returns:
+            坐标轴样式
+        """
+        key = MwAxisStyle.make_key(self.selectedpos, self.bar_width, self.axis_width, self.title_font_size, self.axis_font_size)
+        if self._axis_style is None or self._axis_style.key != key:
+            self._axis_style = MwAxisStyle(self.selectedpos, self.bar_width, self.axis_width,
+                                           self.title_font_size, self.axis_font_size)
+        return self._axis_style
+    
     def _plot_data(self, ax: Any, segment_percentages: List[float]) -> None:
         """绘制分子量分布曲线和柱状图
         
@@ -875,45 +2912,29 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
             ax: matplotlib坐标轴对象
             segment_percentages: 各区间百分比
         """
-        import matplotlib.pyplot as plt
-        
-        # 计算柱状图位置和宽度
-        bar_positions = [
-            (self.selectedpos[idx] * BAR_POSITION_WEIGHT_LEFT + 
-             self.selectedpos[idx + 1] * BAR_POSITION_WEIGHT_RIGHT) 
-            for idx in range(len(self.selectedpos) - 1)
-        ]
-        bar_widths = [pos * self.bar_width for pos in bar_positions]
+        style = self.axis_style()
         
         # 归一化数据
-        max_norm = max(self.norm)
+        norm = np.asarray(self.norm, dtype=np.float64)
+        max_norm = norm.max()
         if max_norm > 0:  # 避免除以零
-            normalized_data = [value * NORM_SCALE_FACTOR / max_norm for value in self.norm]
+            normalized_data = norm * NORM_SCALE_FACTOR / max_norm
         else:
-            normalized_data = [0] * len(self.norm)
+            normalized_data = np.zeros_like(norm)
             self.logger.warning(f"文件 {self.filename}: 归一化数据最大值为0")
         
         # 设置坐标轴粗细
         for spine in ax.spines.values():
-            spine.set_linewidth(self.axis_width)
+            spine.set_linewidth(style.axis_width)
         
         # 绘制曲线和柱状图
         if self.draw_mw:
             ax.plot(self.mw, normalized_data, color=self.mw_color, linewidth=self.line_width)
         if self.draw_bar:
-            ax.bar(bar_positions, segment_percentages, align="edge", width=bar_widths, color=self.bar_color)
+            ax.bar(style.bar_left, segment_percentages, align="edge", width=style.bar_widths, color=self.bar_color)
 
         # 设置图形样式
-        plt.xscale("log")
-        font1 = {"size": self.axis_font_size, "weight":"bold", "fontname": "Arial"}
-        font2 = {"size": self.title_font_size, "weight":"bold", "fontname": "Arial"}
-        plt.xlabel("Mw (g /mol)", labelpad = 4, fontdict = font1)
-        plt.ylabel("Cumulative%", labelpad = 4, fontdict = font1)
-        plt.xticks(weight = 'bold')
-        plt.yticks(weight = 'bold')
-        
-        result_name = self.filename.split('.')[0]
-        plt.title(result_name, pad = 10, fontdict = font2)
+        style.apply(ax, self.filename.split('.')[0])
     
     def _create_distribution_table(self, fig: Any, gs: Any, segment_percentages: List[float]) -> None:
         """创建分子量区间分布表格
@@ -923,32 +2944,12 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
             gs: GridSpec对象
             segment_percentages: 各区间百分比
         """
-        from plottable import Table, ColumnDefinition
-        
         ax1 = fig.add_subplot(gs[:6, 5:7])
-        distribution_data = []
-    
-        for segment_idx, pos in enumerate(self.selectedpos[1:-1]):
-            if segment_idx == 0:
-                range_label = "< " + self.transform_number(self.selectedpos[segment_idx + 1])
-            elif segment_idx == len(self.selectedpos[1:-1]) - 1:
-                range_label = ">" + self.transform_number(self.selectedpos[segment_idx])
-            else:
-                range_label = self.transform_number(self.selectedpos[segment_idx]) + " ~ " + self.transform_number(self.selectedpos[segment_idx + 1])
-            percentage_text = "{:.2f}%".format(segment_percentages[segment_idx])
-            distribution_data.append([range_label, percentage_text])
-        
-        df_distribution = pd.DataFrame(data=distribution_data, columns=["Mw", "Percent"]).set_index("Mw")
-        Table(df_distribution, 
-            ax=ax1, 
-            textprops={"fontsize": 12, "fontname": 'Times New Roman'},
-            column_definitions=[
-                ColumnDefinition(name="Mw", width=10, textprops={"ha": "center"}),
-                ColumnDefinition(name="Percent", width=4, textprops={"ha": "center"})
-            ],
-            footer_divider=True,
-            row_dividers=True
-        )
+        # 区间标签随设置预先计算，只需格式化百分比
+        distribution_data = [[range_label, "{:.2f}%".format(percentage)]
+                             for range_label, percentage in zip(self.axis_style().range_labels, segment_percentages)]
+        
+        self._draw_table(ax1, ["Mw", "Percent"], distribution_data, DISTRIBUTION_TABLE_WIDTHS, footer_divider=True)
     
     def _create_stats_table(self, fig: Any, gs: Any) -> None:
         """创建分子量统计数据表格
@@ -957,50 +2958,59 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
             fig: matplotlib图形对象
             gs: GridSpec对象
         """
-        from plottable import Table, ColumnDefinition
-        
-        stats_data = []
         ax2 = fig.add_subplot(gs[7, 5:7])
         
-        # 验证数据完整性
-        if (self.mw_data and len(self.mw_data) > 0 and 
-            self.validator.validate_array_shape(
-                np.array(self.mw_data), min_rows=1, min_cols=MIN_MW_DATA_COLUMNS, name="分子量数据")):
-            for mw_row in self.mw_data:
-                if len(mw_row) >= MIN_MW_DATA_COLUMNS:
-                    # 索引 2=Mn, 3=Mw, 7=PDI
-                    stats_data.append([self.mw_data[0][2], self.mw_data[0][3], self.mw_data[0][7]])
-                else:
-                    self.logger.warning("分子量数据不完整，跳过表格生成", show_ui=True)
-                    break
+        # 验证数据完整性：每个峰一行，Mn/Mw/PD 均需为有效数值
+        stats_data = []
+        if self.validator.validate_data_not_empty(self.mw_data, "分子量数据"):
+            stats = self.mw_data[["Mn", "Mw", "PD"]]
+            valid = stats.notna().all(axis=1)
+            if not valid.all():
+                self.logger.warning("分子量数据不完整，跳过不完整的行", show_ui=True)
+            for mn, mw, pd_value in stats[valid].itertuples(index=False):
+                stats_data.append(["{:.0f}".format(mn), "{:.0f}".format(mw), "{:.3f}".format(pd_value)])
         else:
             self.logger.warning("分子量数据格式错误，跳过表格生成", show_ui=True)
         
         if stats_data:
-            df_stats = pd.DataFrame(data=stats_data, columns=["Mn", "Mw", "PDI"]).set_index("Mn")
-            Table(df_stats,
-                ax=ax2,
-                textprops={"fontsize": 12, "fontname": 'Times New Roman'},
-                column_definitions=[
-                    ColumnDefinition(name="Mw", textprops={"ha": "center"}),
-                    ColumnDefinition(name="Mn", textprops={"ha": "center"}),
-                    ColumnDefinition(name="PDI", textprops={"ha": "center"})
-                ])
+            self._draw_table(ax2, ["Mn", "Mw", "PDI"], stats_data)
+
+    def _draw_table(self, ax: Any, header: List[str], rows: List[List[str]], widths: Optional[List[float]] = None,
+                    footer_divider: bool = False) -> None:
+        """按 table_renderer 绘制表格（第一列为索引列）
+        
+        Args:
+            ax: 坐标轴
+            header: 表头
+            rows: 各行单元格文本
+            widths: 各列相对宽度，默认等宽
+            footer_divider: 是否在末行下方画线
+        """
+        if self.table_renderer != "plottable":
+            draw_table(ax, header, rows, widths, TABLE_TEXTPROPS, footer_divider=footer_divider)
+            return
+        from plottable import Table, ColumnDefinition
+        widths = widths if widths is not None else [1] * len(header)
+        df = pd.DataFrame(data=rows, columns=header).set_index(header[0])
+        Table(df,
+            ax=ax,
+            textprops=dict(TABLE_TEXTPROPS),
+            column_definitions=[ColumnDefinition(name=name, width=width, textprops={"ha": "center"})
+                                for name, width in zip(header, widths)],
+            footer_divider=footer_divider,
+            row_dividers=True
+        )
 
     def draw_image(self) -> None:
         """绘制分子量分布图（重构版：调用多个子方法）"""
-        # 延迟导入 matplotlib,减少启动时间和打包体积
-        import matplotlib.pyplot as plt
-        
         # 步骤1: 验证数据
         self._validate_draw_data()
         
         # 步骤2: 计算区间百分比
-        segment_percentages = self._calculate_segment_percentages()
+        with self.timer.stage("compute"):
+            segment_percentages = self._calculate_segment_percentages()
         
-        # 使用 try-finally 确保资源释放
-        fig = None
-        try:
+        def draw():
             # 步骤3: 设置图形
             fig, ax, gs = self._setup_figure()
             
@@ -1011,22 +3021,103 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
             if self.draw_table:
                 self._create_distribution_table(fig, gs, segment_percentages)
                 self._create_stats_table(fig, gs)
-            
-            # 步骤6: 保存和显示
-            result_name = os.path.splitext(self.filename)[0]
-            if not os.path.exists(self.output_dir):
-                os.makedirs(self.output_dir, exist_ok=True)
-            if self.save_picture:
-                plt.savefig(os.path.join(self.output_dir, result_name + ".png"), transparent = self.transparent_back)
-                self.logger.debug(f"已保存图片: {result_name}.png")
-            if self.display_picture:
-                st.pyplot(fig, width='content')
-        finally:
-            # 确保图形资源释放
-            if fig is not None:
-                plt.close(fig)
+            return fig
+        
+        # 步骤6: 保存和显示（数据和设置未变时使用缓存的图片）
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir, exist_ok=True)
+        self.render_figure("mw", f"{self.filename}:{self.content_digest()}", {"settings": self.settings_fingerprint()},
+                           draw, save_path=self.picture_path(self.filename) if self.save_picture else None,
+                           display=self.display_picture, transparent=self.transparent_back, display_width="content",
+                           report=self.report)
         return
     
+    def add_grid_panel(self) -> None:
+        """组图模式：记录当前文件的小图数据，攒满一页时绘制该页"""
+        with self.timer.stage("compute"):
+            segment_percentages = self._calculate_segment_percentages()
+            curve = np.asarray(self.norm, dtype=np.float64)
+            max_norm = curve.max() if len(curve) else 0.0
+            if max_norm > 0:
+                curve = curve * (NORM_SCALE_FACTOR / max_norm)
+            else:
+                curve = np.zeros_like(curve)
+                self.logger.warning(f"文件 {self.filename}: 归一化数据最大值为0")
+        self.grid_panels.append({
+            "name": self.filename.split('.')[0],
+            "digest": self.content_digest(),
+            "mw": np.asarray(self.mw, dtype=np.float64),
+            "curve": curve,
+            "percentages": np.asarray(segment_percentages, dtype=np.float64),
+        })
+        if len(self.grid_panels) == MW_GRID_SHAPE[0] * MW_GRID_SHAPE[1]:
+            self.draw_grid_page()
+    
+    def draw_grid_page(self) -> None:
+        """绘制一页组图：每个样品一个小图，所有小图共享坐标轴（同一组对数刻度定位器和格式化器）
+        
+        每个小图的柱状图由一个 PolyCollection 绘制，轴标签只在整页上画一次；
+        多个样品只需一次图形创建、一次渲染和保存。
+        """
+        panels, self.grid_panels = self.grid_panels, []
+        if not panels:
+            return
+        self.grid_pages += 1
+        page = self.grid_pages
+        digest = hashlib.sha1("\n".join(f"{panel['name']}:{panel['digest']}" for panel in panels).encode("utf-8")).hexdigest()
+        
+        def draw():
+            from matplotlib.figure import Figure
+            from matplotlib.collections import PolyCollection
+            
+            style = self.axis_style()
+            cols = MW_GRID_SHAPE[0]
+            rows = -(-len(panels) // cols)  # 末页按实际样品数减少行数
+            fig = Figure(dpi=FIGURE_DPI, figsize=(cols * MW_GRID_PANEL_SIZE[0], rows * MW_GRID_PANEL_SIZE[1]), layout="constrained")
+            axes = fig.subplots(rows, cols, sharex=True, sharey=True, squeeze=False)
+            if self.transparent_back:
+                fig.patch.set_alpha(0.0)
+            axes = axes.ravel()
+            # 共享坐标轴只需设置一次：所有小图使用同一组刻度定位器和格式化器
+            axes[0].set_xscale("log")
+            
+            # 各区间柱的四个顶点（x 对所有样品相同，y 为各样品的百分比）
+            left, widths = np.asarray(style.bar_left), np.asarray(style.bar_widths)
+            bar_x = np.column_stack((left, left + widths, left + widths, left))
+            bar_y = np.array([0.0, 0.0, 1.0, 1.0])
+            title = dict(style.title_font, size=style.title_font["size"] * MW_GRID_FONT_SCALE)
+            for ax, panel in zip(axes, panels):
+                for spine in ax.spines.values():
+                    spine.set_linewidth(style.axis_width)
+                ax.tick_params(labelsize=MW_GRID_TICK_SIZE, width=style.axis_width)
+                if self.draw_mw:
+                    ax.plot(panel["mw"], panel["curve"], color=self.mw_color, linewidth=self.line_width)
+                if self.draw_bar:
+                    verts = np.stack((bar_x, panel["percentages"][:, None] * bar_y), axis=-1)
+                    bars = PolyCollection(verts, facecolors=self.bar_color, edgecolors="none")
+                    bars.sticky_edges.y.append(0.0)  # 与 ax.bar 相同，y 轴从 0 开始
+                    ax.add_collection(bars)
+                ax.set_title(panel["name"], pad=4, fontdict=title)
+            # 共享坐标轴的内侧刻度标签已由 subplots 隐藏；空位隐藏后，其上方小图补上 x 刻度标签
+            for idx in range(len(panels), len(axes)):
+                axes[idx].set_visible(False)
+                if idx >= cols:
+                    axes[idx - cols].xaxis.set_tick_params(labelbottom=True)
+            axes[0].autoscale_view()
+            
+            font = {"fontsize": self.axis_font_size, "fontweight": "bold", "fontname": "Arial"}
+            fig.supxlabel("Mw (g /mol)", **font)
+            fig.supylabel("Cumulative%", **font)
+            return fig
+        
+        path = os.path.join(self.output_dir, self.figure_name(f"{MW_GRID_NAME}_{page:03d}"))
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir, exist_ok=True)
+        self.render_figure("mw_grid", digest, {"settings": self.settings_fingerprint(), "shape": MW_GRID_SHAPE,
+                                               "panel_size": MW_GRID_PANEL_SIZE},
+                           draw, save_path=path if self.save_picture else None,
+                           display=self.display_picture, transparent=self.transparent_back, report=self.report)
+    
     def output_data(self):
         column = ["Samplename", "Mp", "Mn", "Mw", "Mz", "Mz+1", "Mv",  "PD"]
 
@@ -1041,15 +3132,57 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
         if len(self.selected_file) == 0:
             self.logger.warning("没有选中文件", show_ui=True)
             return False
+        if not self.validator.validate_segment_positions(self.selectedpos):
+            self.logger.warning("分割位置无效（至少2个且严格递增），请检查区域设置", show_ui=True)
+            return False
         
         self.file_list = self.selected_file
+        self.timer.reset()
+        self.skipped_files = []
+        self.report_files = []
+        self.grid_panels = []
+        self.grid_pages = 0
+        
+        # 保存图片时总是维护清单，之后开启增量更新即可直接利用；生成报告或组图时每个文件都要绘制，不跳过
+        manifest = self.load_manifest() if self.save_picture else {}
+        fingerprint = self.settings_fingerprint()
+        stamps = {filename: self.input_stamp(filename) for filename in self.file_list}
+        incremental = self.incremental and self.save_picture and self.report_format is None and not self.small_multiples
+        if self.report_format:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.report = FigureReport(os.path.join(self.output_dir, MW_REPORT_NAME), self.report_format,
+                                       self.figure_format, self.png_compress_level)
+        if incremental:
+            pending = [filename for filename in self.file_list
+                       if not self.is_up_to_date(filename, manifest.get(filename), fingerprint, stamps[filename])]
+        else:
+            pending = self.file_list
+        self.source.prefetch(pending)
         
         for pro, filename in enumerate(self.file_list):
             self.filename = filename
+            self.logger.set_file(filename)
+            self.timer.set_file(filename)
             try:
+                if filename not in pending:
+                    self.skip_file(filename)
+                    continue
                 if self.read_file(filename):
-                    self.preprocess()
-                    self.draw_image()
+                    record = {**(stamps[filename] or {}), "sha1": self.content_digest(), "settings": fingerprint}
+                    # 只有修改时间变化（如重新复制）而内容未变时，不必重画
+                    if incremental and self.is_up_to_date(
+                            filename, manifest.get(filename), fingerprint, digest=record["sha1"]):
+                        manifest[filename] = record
+                        self.skip_file(filename)
+                        continue
+                    with self.timer.stage("parse"):
+                        self.preprocess()
+                    if self.small_multiples:
+                        self.add_grid_panel()
+                    else:
+                        self.draw_image()
+                        if self.save_picture:
+                            manifest[filename] = record
                     self.logger.info(f"成功处理文件: {filename}")
             except Exception as e:
                 self.logger.error(f"处理文件 {filename} 时出错", show_ui=True, exception=e)
@@ -1060,16 +3193,46 @@ class MolecularWeightAnalyzer(BaseAnalyzer):
                 if self.progress_callback:
                     self.progress_callback((pro + 1) / len(self.file_list), "画图进度 {}/{} {:.2f}%".format(pro + 1, len(self.file_list), (pro + 1) * 100/ len(self.file_list)))
         
+        self.timer.set_file(TRACE_BATCH_LABEL)
+        if self.small_multiples:
+            try:
+                self.draw_grid_page()
+            except Exception as e:
+                self.logger.error("绘制组图时出错", show_ui=True, exception=e)
+        if self.report is not None:
+            try:
+                with self.timer.stage("report"):
+                    self.report_files = self.report.close()
+                self.logger.info(f"报告已保存: {', '.join(os.path.basename(path) for path in self.report_files)}")
+            except Exception as e:
+                self.logger.error("保存报告失败", show_ui=True, exception=e)
+            finally:
+                self.report = None
+        failed = self.flush_figures()
+        if self.save_picture:
+            # 保存失败的图片不记入清单，下次重画
+            for filename in list(manifest):
+                if self.picture_path(filename) in failed:
+                    del manifest[filename]
+            self.save_manifest(manifest)
+        self.logger.flush_ui()
+        self.timer.write_trace()
         return True
 
 class GPCAnalyzer(BaseAnalyzer):
-    def __init__(self, datadir: str, output_filename: str, save_file: bool = True, save_picture: bool = True, display_mode: bool = True, save_figure_file_gpc: bool = True, test_mode: bool = False, progress_callback: Optional[Callable[[float, str], None]] = None, info_callback: Optional[Callable[[str], None]] = None) -> None:
+    def __init__(self, datadir: str, output_filename: str, save_file: bool = True, save_picture: bool = True, display_mode: bool = True, save_figure_file_gpc: bool = True, test_mode: bool = False, progress_callback: Optional[Callable[[float, str], None]] = None, info_callback: Optional[Callable[[str], None]] = None,
+                 save_batch_stats: bool = True, segmentpos: Optional[List[float]] = None,
+                 figure_format: Optional[str] = None, png_compress_level: Optional[int] = None) -> None:
         # 调用基类构造函数
-        super().__init__(datadir)
+        super().__init__(datadir, figure_format, png_compress_level)
         self.output_dir = os.path.join(self.rootdir, "GPC_output")
         self.file_list = None
         self.output_filename = output_filename
         self.selected_file = None
+        self.mw_tables: List[pd.DataFrame] = []  # 各文件的分子量表格，用于批量导出和统计
+        self.moment_peaks: List[NDArray[np.float64]] = []  # 与 mw_tables 逐行对应的峰数据，用于批量校验
+        self.segmentpos = list(segmentpos) if segmentpos else list(DEFAULT_SEGMENT_POS)
+        self.batch_stats = BatchStatistics(self.segmentpos, logger=logger)
 
         # 运行模式
         self.test_mode = test_mode
@@ -1077,6 +3240,7 @@ class GPCAnalyzer(BaseAnalyzer):
         self.save_picture = save_picture
         self.display_mode = display_mode
         self.save_figure_file_gpc = save_figure_file_gpc
+        self.save_batch_stats = save_batch_stats
         
         # 回调函数
         self.progress_callback = progress_callback
@@ -1096,8 +3260,9 @@ class GPCAnalyzer(BaseAnalyzer):
         Returns:
             bool: 存在同名文件返回True
         """
-        if os.path.exists(os.path.join(self.output_dir, self.output_filename + '.csv')) or os.path.exists(os.path.join(self.output_dir, self.output_filename + '.png')):
-            return True
+        for name in (self.output_filename + '.csv', self.figure_name(self.output_filename), self.output_filename + '_stats.csv'):
+            if os.path.exists(os.path.join(self.output_dir, name)):
+                return True
         return False
     
     def preprocess(self) -> None:
@@ -1106,12 +3271,9 @@ class GPCAnalyzer(BaseAnalyzer):
         mw_start, mw_end, slice_table_start = self.preprocess_common()
 
         # 整理分子量数据
-        for line in self.lines[mw_start + MW_DATA_OFFSET:mw_end]:
-            parts = line.split('\t')
-            if len(parts) > 1:
-                self.mw_data.append([self.sample_name] + parts[1:])
+        self.mw_data = self.parse_mw_averages(mw_start, mw_end)
         
-        if not self.mw_data:
+        if self.mw_data.empty:
             raise ValueError("未找到分子量数据")
         
         self.peak_num = len(self.mw_data)
@@ -1127,9 +3289,9 @@ class GPCAnalyzer(BaseAnalyzer):
                     if peak_array.shape[0] > 0 and peak_array.shape[1] > MIN_GPC_PEAK_COLUMNS:
                         all_peaks.append(peak_array)
                     else:
-                        st.warning(f"文件 {self.filename}: 峰数据格式不正确，跳过该峰")
+                        self.logger.warning(f"文件 {self.filename}: 峰数据格式不正确，跳过该峰")
                 except (ValueError, IndexError) as e:
-                    st.warning(f"文件 {self.filename}: 峰数据转换失败: {e}")
+                    self.logger.warning(f"文件 {self.filename}: 峰数据转换失败: {e}")
                 current_peak = []
                 continue
             if "RT" in line:
@@ -1143,6 +3305,24 @@ class GPCAnalyzer(BaseAnalyzer):
             raise ValueError("未找到有效的峰数据")
         
         self.peak_data[self.sample_name] = all_peaks
+        self.mw_tables.append(self.mw_data)
+        # 批量校验时各样品的峰须与表格逐行对齐，缺少的峰在此补空峰（单个样品由 validate 补齐）
+        self.moment_peaks.extend(all_peaks[:len(self.mw_data)])
+        if len(all_peaks) < len(self.mw_data):
+            self.moment_peaks.extend([np.zeros((0, MIN_GPC_PEAK_COLUMNS + 1))] * (len(self.mw_data) - len(all_peaks)))
+        if self.save_batch_stats:
+            with self.timer.stage("compute"):
+                self.batch_stats.add_sample(self.mw_data, all_peaks)
+
+    def batch_mw_table(self) -> pd.DataFrame:
+        """合并本次运行中所有文件的分子量表格
+        
+        Returns:
+            所有样品的分子量数据表格
+        """
+        if not self.mw_tables:
+            return empty_mw_table()
+        return pd.concat(self.mw_tables, ignore_index=True)
 
     def draw_image(self) -> None:
         # 延迟导入 matplotlib,减少启动时间和打包体积
@@ -1152,18 +3332,16 @@ class GPCAnalyzer(BaseAnalyzer):
         if not self.peak_data:
             raise ValueError("没有可用的峰数据用于绘图")
         
-        # 使用 try-finally 确保资源释放
-        fig = None
-        try:
+        def draw():
             fig = plt.figure(dpi=FIGURE_DPI, figsize=GPC_FIGURE_SIZE)
             plotted_labels = []
             for sample_idx, (sample_name, peak_data_list) in enumerate(self.peak_data.items()):
                 if sample_idx >= len(self.color_list):
-                    st.warning(f"颜色库不足，跳过样品 {sample_name}")
+                    self.logger.warning(f"颜色库不足，跳过样品 {sample_name}")
                     break
                 for peak_array in peak_data_list:
                     if peak_array.shape[1] <= MIN_GPC_PEAK_COLUMNS:
-                        st.warning(f"样品 {sample_name} 的峰数据不完整，跳过")
+                        self.logger.warning(f"样品 {sample_name} 的峰数据不完整，跳过")
                         continue
                     x_data = peak_array[:, GPC_X_COLUMN_INDEX]
                     y_data = peak_array[:, GPC_Y_COLUMN_INDEX]
@@ -1171,31 +3349,62 @@ class GPCAnalyzer(BaseAnalyzer):
                     plotted_labels.append(sample_name)
             
             if not plotted_labels:
+                plt.close(fig)
                 raise ValueError("没有有效数据可以绘图")
             
             plt.legend(plotted_labels)
-            result_name = self.output_filename
-            if not os.path.exists(self.output_dir):
-                os.makedirs(self.output_dir, exist_ok=True)
-            if self.save_picture:
-                plt.savefig(os.path.join(self.output_dir, result_name + ".png"))
-            if self.display_mode:
-                st.pyplot(fig)
-        finally:
-            # 确保图形资源释放
-            if fig is not None:
-                plt.close(fig)
+            return fig
+        
+        # 绘图数据摘要：样品名和各峰的 x/y 列
+        digest = hashlib.sha1()
+        for sample_name, peak_data_list in self.peak_data.items():
+            digest.update(str(sample_name).encode("utf-8") + b"\0")
+            for peak_array in peak_data_list:
+                digest.update(repr(peak_array.shape).encode("utf-8"))
+                if peak_array.shape[1] > MIN_GPC_PEAK_COLUMNS:
+                    digest.update(np.ascontiguousarray(peak_array[:, [GPC_X_COLUMN_INDEX, GPC_Y_COLUMN_INDEX]]).tobytes())
+        result_name = self.output_filename
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir, exist_ok=True)
+        self.render_figure("gpc", digest.hexdigest(), {"color_list": self.color_list, "size": GPC_FIGURE_SIZE, "dpi": FIGURE_DPI},
+                           draw, save_path=os.path.join(self.output_dir, self.figure_name(result_name)) if self.save_picture else None,
+                           display=self.display_mode)
         return
 
     def output_data(self):
-        column = ["Samplename", "Mp", "Mn", "Mw", "Mz", "Mz+1", "Mv",  "PD"]
         result_name = self.output_filename
-        data  = pd.DataFrame(data = self.mw_data, columns = column)
+        data = self.batch_mw_table()
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir, exist_ok=True)
         if self.save_file:
             data.to_csv(os.path.join(self.output_dir, result_name + '.csv'))
 
+    def validate_moments(self) -> pd.DataFrame:
+        """批量校验本次运行中所有峰的分子量，必要时保存校验结果
+        
+        Returns:
+            校验结果 DataFrame
+        """
+        result = self.moment_validator.validate(self.batch_mw_table(), self.moment_peaks)
+        failed = self.moment_validator.report(result)
+        if failed and self.save_file:
+            if not os.path.exists(self.output_dir):
+                os.makedirs(self.output_dir, exist_ok=True)
+            result.to_csv(os.path.join(self.output_dir, self.output_filename + '_mw_check.csv'), index=False)
+        return result
+
+    def output_batch_stats(self) -> pd.DataFrame:
+        """输出批量统计汇总表格
+        
+        Returns:
+            汇总 DataFrame
+        """
+        summary = self.batch_stats.summary()
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir, exist_ok=True)
+        summary.to_csv(os.path.join(self.output_dir, self.output_filename + '_stats.csv'), index=False)
+        return summary
+
     def output_figure_data(self) -> None:
         result_name = os.path.join(self.output_dir, self.output_filename + ".xlsx")
         xlsx = pd.ExcelWriter(result_name, engine = "openpyxl")
@@ -1217,19 +3426,30 @@ class GPCAnalyzer(BaseAnalyzer):
             bool: 成功返回True，失败返回False
         """
         if self.selected_file == None:
-            self.file_list = [os.path.basename(i) for i in glob.glob(os.path.join(self.data_path, "*.rst"))]
+            self.file_list = self.read_file_list()
         else:
             self.file_list = self.selected_file
 
         # 在开始处理前清空 peak_data，确保不会累积旧数据
         self.peak_data = {}
+        self.mw_tables = []
+        self.moment_peaks = []
+        self.batch_stats = BatchStatistics(self.segmentpos, logger=self.logger)
+        if self.save_batch_stats and not self.validator.validate_segment_positions(self.batch_stats.segment_bounds):
+            self.logger.warning("分割位置无效（至少2个且严格递增），请检查区域设置", show_ui=True)
+            return False
         
+        self.timer.reset()
+        self.source.prefetch(self.file_list)
         for pro, filename in enumerate(self.file_list):
             self.filename = filename
+            self.logger.set_file(filename)
+            self.timer.set_file(filename)
             try:
                 # 使用 reset_peak_data=False 保留之前文件的 peak_data
                 if self.read_file(filename, reset_peak_data=False):
-                    self.preprocess()
+                    with self.timer.stage("parse"):
+                        self.preprocess()
                     self.logger.info(f"成功处理文件: {filename}")
             except Exception as e:
                 self.logger.error(f"处理文件 {filename} 时出错", show_ui=True, exception=e)
@@ -1237,6 +3457,16 @@ class GPCAnalyzer(BaseAnalyzer):
             finally:
                 if self.progress_callback:
                     self.progress_callback((pro + 1) / len(self.file_list), "画图进度 {}/{} {:.2f}%".format(pro + 1, len(self.file_list), (pro + 1) * 100/ len(self.file_list)))
+        self.logger.flush_ui()
+        self.timer.set_file(TRACE_BATCH_LABEL)
+        
+        if self.info_callback:
+            self.info_callback("校验分子量")
+        try:
+            with self.timer.stage("compute"):
+                self.validate_moments()
+        except Exception as e:
+            self.logger.error("分子量校验失败", show_ui=True, exception=e)
         
         if self.info_callback:
             self.info_callback("绘制图片")
@@ -1244,20 +3474,30 @@ class GPCAnalyzer(BaseAnalyzer):
             self.draw_image()
         except Exception as e:
             self.logger.error("绘图失败", show_ui=True, exception=e)
+            self.timer.write_trace()
             return False
         
         if self.info_callback:
             self.info_callback("保存数据")
         try:
-            if self.save_file:
-                self.output_data()
-            if self.save_figure_file_gpc:
-                self.output_figure_data()
+            with self.timer.stage("export"):
+                if self.save_file:
+                    self.output_data()
+                if self.save_batch_stats:
+                    summary = self.output_batch_stats()
+                    if self.display_mode:
+                        st.dataframe(summary)
+                if self.save_figure_file_gpc:
+                    self.output_figure_data()
         except Exception as e:
             self.logger.error("保存数据失败", show_ui=True, exception=e)
             return False
+        finally:
+            # 图片在后台保存，与数据导出重叠
+            failed = self.flush_figures()
+            self.timer.write_trace()
         
-        return True
+        return not failed
 
 
 class DSCAnalyzer(BaseAnalyzer):
@@ -1269,15 +3509,16 @@ class DSCAnalyzer(BaseAnalyzer):
                  left_length: float = 1.9, right_length: float = 1.9,
                  setting_name: str = DEFAULT_DSC_SETTING_NAME,
                  progress_callback: Optional[Callable[[float, str], None]] = None,
-                 info_callback: Optional[Callable[[str], None]] = None):
+                 info_callback: Optional[Callable[[str], None]] = None,
+                 memory_budget_mb: Optional[float] = None, fit_segment_data: bool = False,
+                 baseline_lam: float = BASELINE_LAM, analyze_transitions: bool = False, exo_up: bool = DSC_EXO_UP,
+                 figure_format: Optional[str] = None, png_compress_level: Optional[int] = None):
         """初始化DSC分析器"""
-        super().__init__(datadir)
-        # 如果提供了有效的数据目录，覆盖基类的默认设置
-        if datadir and os.path.exists(datadir):
-             self.data_path = datadir
+        super().__init__(datadir, figure_format, png_compress_level)
              
         self.cycle_dir = os.path.join(self.rootdir, "DSC_Cycle")
         self.pic_dir = os.path.join(self.rootdir, "DSC_Pic")
+        self.result_dir = os.path.join(self.rootdir, "DSC_Result")
         self.setting_dir = os.path.join(self.rootdir, "setting")
         
         self.heads = {}  # 变量名
@@ -1287,6 +3528,16 @@ class DSCAnalyzer(BaseAnalyzer):
         self.region = []
         self.peak = []
         self.data = None # raw data
+        self.segment_features = np.zeros(0, dtype=SEGMENT_FEATURE_DTYPE)  # 与 data_seg 对应的段特征
+        self.baselines: List[NDArray[np.float64]] = []  # 与 data_seg 对应的拟合基线（热流）
+        self.transitions: List[Dict[str, Any]] = []  # 本次运行全部文件的转变检测结果
+        self.previews: List[NDArray[np.float32]] = []  # 与 data_seg 对应的降采样温度/热流，供叠加图使用
+        self.preview_features = np.zeros(0, dtype=SEGMENT_FEATURE_DTYPE)  # 降采样副本的段特征（行号指向副本）
+        self.cycle_store: Dict[int, Dict[str, Tuple[NDArray[np.float32], np.void]]] = {}  # 循环序号 -> {文件名: (降采样温度/热流, 段特征)}，供叠加图使用
+        self.encoding = "utf-8"  # 当前文件的编码
+        self.streaming = False  # 当前文件是否分块读取数据区
+        self.memory_budget_mb = resolve_memory_budget(memory_budget_mb)  # 一次运行允许新增的进程内存
+        self.run_rss_mb = 0.0  # 运行开始时的进程 RSS，内存预算相对于它计算
         
         # 运行模式设置
         self.test_mode = test_mode
@@ -1295,6 +3546,10 @@ class DSCAnalyzer(BaseAnalyzer):
         self.draw_cycle = draw_cycle
         self.display_pic = display_pic
         self.save_cycle_pic = save_cycle_pic
+        self.fit_segment_data = fit_segment_data
+        self.baseline_lam = baseline_lam
+        self.analyze_transitions = analyze_transitions
+        self.exo_up = exo_up
         self.peaks_upward = peaks_upward
         self.center_peak = center_peak
         
@@ -1363,6 +3618,10 @@ class DSCAnalyzer(BaseAnalyzer):
         st.session_state["dsc_settingname"] = self.setting_name
         return
 
+    def profile_dir(self) -> str:
+        """性能剖析结果的保存目录（DSC 图片输出目录下）"""
+        return os.path.join(self.pic_dir, PROFILE_DIR_NAME)
+
     def reset(self, reset_peak_data: bool = True) -> None:
         """重置数据"""
         super().reset(reset_peak_data)
@@ -1373,11 +3632,16 @@ class DSCAnalyzer(BaseAnalyzer):
         self.region = []
         self.peak = []
         self.data = None
+        self.segment_features = np.zeros(0, dtype=SEGMENT_FEATURE_DTYPE)
+        self.baselines = []
+        self.previews = []
+        self.preview_features = np.zeros(0, dtype=SEGMENT_FEATURE_DTYPE)
+        self.streaming = False
 
     def clear_dir(self) -> None:
         """清空输出目录"""
-        # 清空 Cycle 目录
-        for cycle_dir in glob.glob(os.path.join(self.cycle_dir, 'Cycle*')):
+        # 清空 Cycle 目录及结果目录下的各循环
+        for cycle_dir in glob.glob(os.path.join(self.cycle_dir, 'Cycle*')) + glob.glob(os.path.join(self.result_dir, 'Cycle*')):
             try:
                 for file in os.listdir(cycle_dir):
                     file_path = os.path.join(cycle_dir, file)
@@ -1388,9 +3652,19 @@ class DSCAnalyzer(BaseAnalyzer):
             except Exception as e:
                 self.logger.warning(f"清理目录失败 {cycle_dir}: {e}")
         
+        # 上次运行的转变检测结果（本次未检测到转变时不会被覆盖）
+        transitions_path = os.path.join(self.result_dir, DSC_TRANSITIONS_FILE)
+        try:
+            if os.path.isfile(transitions_path):
+                os.remove(transitions_path)
+        except OSError as e:
+            self.logger.warning(f"删除文件失败 {transitions_path}: {e}")
+        
         # 清空 Pic 目录
         if os.path.exists(self.pic_dir):
             for dir_name in os.listdir(self.pic_dir):
+                if dir_name == PROFILE_DIR_NAME:
+                    continue  # 保留历史剖析结果
                 dir_path = os.path.join(self.pic_dir, dir_name)
                 try:
                     if os.path.isdir(dir_path):
@@ -1400,16 +3674,43 @@ class DSCAnalyzer(BaseAnalyzer):
                 except Exception as e:
                     self.logger.warning(f"清理目录失败 {dir_path}: {e}")
 
-    def read_file(self, name: str) -> bool:
-        """读取数据文件 (自动检测编码)"""
+    def memory_mode(self, name: str) -> str:
+        """根据内存预算选择文件的处理方式
+        
+        Args:
+            name: 文件名
+        
+        Returns:
+            "eager"（一次性读入）、"stream"（分块读取数据区）或 "defer"（预算不足，推迟处理）
+        """
+        if self.memory_budget_mb is None:
+            return "eager"
+        
+        # 预算针对本次运行新增的内存：进程 RSS 还包含界面本身和其他会话，不应计入
+        size_mb = self.source.size(name) / BYTES_PER_MB
+        used = max((current_rss_mb() or 0.0) - self.run_rss_mb, 0.0)
+        available = self.memory_budget_mb - used
+        if size_mb * DSC_EAGER_MEMORY_FACTOR <= available:
+            return "eager"
+        if size_mb * DSC_STREAM_MEMORY_FACTOR <= available:
+            return "stream"
+        return "defer"
+
+    def read_file(self, name: str, streaming: bool = False) -> bool:
+        """读取数据文件 (自动检测编码)
+        
+        Args:
+            name: 文件名
+            streaming: 为True时只读取到 StartOfData 为止的表头，数据区在预处理时分块读取
+        """
         self.reset()
         self.filename = name
-        file_path = os.path.join(self.data_path, name)
         
         try:
-            # 检测编码
-            with open(file_path, 'rb') as f:
-                raw_data = f.read()
+            # 检测编码（分块模式只读取文件开头用于检测）
+            with self.timer.stage("read"), self.source.open(name) as f:
+                raw_data = f.read(DSC_ENCODING_SAMPLE_BYTES) if streaming else f.read()
+            with self.timer.stage("detect_encoding"):
                 result = chardet.detect(raw_data)
                 encoding = result['encoding']
                 # 如果置信度太低，或者检测失败，回退到 utf-16 (常见于 DSC) 或 utf-8
@@ -1419,11 +3720,23 @@ class DSCAnalyzer(BaseAnalyzer):
                         encoding = 'utf-16'
                     else:
                         encoding = 'utf-8'
+            del raw_data  # 编码检测完成后立即释放原始字节
             
             self.logger.debug(f"文件 {name} 检测到的编码: {encoding}")
+            self.encoding = encoding
             
-            with open(file_path, "r", encoding=encoding, errors='replace') as file:
-                self.lines = [line.strip() for line in file if line.strip()]
+            with self.timer.stage("read"), self.source.open(name, encoding=encoding, errors='replace') as file:
+                if streaming:
+                    for line in file:
+                        line = line.strip()
+                        if line:
+                            self.lines.append(line)
+                            if "StartOfData" in line:
+                                # 没有 StartOfData 的文件会被完整读入，按一次性读入处理
+                                self.streaming = True
+                                break
+                else:
+                    self.lines = [line.strip() for line in file if line.strip()]
             return True
         except Exception as e:
             self.logger.error(f"读取文件失败 {name}", show_ui=True, exception=e)
@@ -1515,90 +3828,260 @@ class DSCAnalyzer(BaseAnalyzer):
             # 记录方法
             self.method[item] = (start, end, grad, t)
             
-        if table_pos + 1 < len(self.lines):
-            try:
-                start_time = float(self.lines[table_pos + 1].split("\t")[0])
-                if 1 in self.method:
-                    start_time += self.method[1][3]
-            except (ValueError, IndexError):
-                start_time = 0
+        # 数据区：分块模式从文件逐行读取，否则遍历已读入的行
+        if self.streaming:
+            rows = self._iter_data_lines()
         else:
-            start_time = 0
+            rows = itertools.islice(self.lines, table_pos + 1, None)
+        self.data = self._parse_data_rows(rows)
+        
+        if peak_pos != 0:   
+            for i in range(len(self.region) - 1):
+                if peak_pos + i < len(self.lines):
+                    self.peak.append(list(filter(None, self.lines[peak_pos + i].split(" ")))
+                                    )
+        # 文本行解析完毕后不再需要
+        self.lines = []
+        
+        if self.data is not None and self.data.size > 0 and self.data.ndim == 2:
+            self.data_seg = self._slice_segments(self.data, self.region)
+        self.segment_features = compute_segment_features(self.data_seg)
+        self.build_previews()
 
-        # 整理数据格式
-        table = []
-        current_start_time = start_time
-        count_cycle = 3
+    def build_previews(self) -> None:
+        """为各段构建叠加图用的降采样副本（全分辨率的 data_seg 仍用于导出）
+        
+        副本大小只取决于输出宽度，与采集频率无关；段特征复制一份，极值行号换算到副本中。
+        """
+        self.previews = []
+        self.preview_features = self.segment_features.copy()
+        for i, segment in enumerate(self.data_seg):
+            keep = minmax_decimate(segment[:, 2])
+            self.previews.append(np.ascontiguousarray(segment[keep, 1:3]))
+            if len(keep):
+                feature = self.preview_features[i]
+                feature["rows"] = len(keep)
+                feature["imin"] = np.searchsorted(keep, feature["imin"])
+                feature["imax"] = np.searchsorted(keep, feature["imax"])
+
+    @staticmethod
+    def _slice_segments(data: NDArray[np.float32], regions: List[List[float]]) -> List[NDArray[np.float32]]:
+        """按时间区域切分数据
+        
+        时间列单调递增时（正常的 DSC 数据）用二分查找得到行范围，返回原数组的视图而不复制；
+        否则退回布尔索引。区域为开区间 (left, right)。
+        
+        Args:
+            data: 数据数组，第0列为时间
+            regions: [left, right] 区域列表
+        
+        Returns:
+            各区域的数据
+        """
+        time_col = data[:, 0]
+        monotonic = bool(np.all(time_col[1:] >= time_col[:-1]))
+        segments = []
+        for left_side, right_side in regions:
+            # 与 float32 时间列按同一精度比较
+            left_side, right_side = np.float32(left_side), np.float32(right_side)
+            if monotonic:
+                lo = int(np.searchsorted(time_col, left_side, side="right"))
+                hi = int(np.searchsorted(time_col, right_side, side="left"))
+                segments.append(data[lo:max(lo, hi)])
+            else:
+                segments.append(data[(time_col > left_side) & (time_col < right_side)])
+        return segments
+
+    def fit_baselines(self) -> None:
+        """对当前文件的全部循环段批量做 AsLS 基线拟合
+        
+        AsLS 要求峰朝上，峰朝下（离中位数最远的是最小值）的段先翻转，拟合后再翻转回来。
+        """
+        signs = []
+        curves = []
+        for segment, feature in zip(self.data_seg, self.segment_features):
+            downward = len(segment) > 0 and abs(feature["ymin"] - feature["median"]) > abs(feature["ymax"] - feature["median"])
+            signs.append(-1.0 if downward else 1.0)
+            curves.append(signs[-1] * segment[:, 2])
+        self.baselines = [sign * baseline for sign, baseline in zip(signs, asls_baselines(curves, lam=self.baseline_lam))]
+
+    def save_baselines(self) -> None:
+        """保存基线校正结果到 DSC_Result/CycleX/，列为温度、热流、基线、校正后热流"""
+        for i, (segment, baseline) in enumerate(zip(self.data_seg, self.baselines)):
+            if len(segment) == 0:
+                continue
+            cycle_path = os.path.join(self.result_dir, f"Cycle{i + 1}")
+            os.makedirs(cycle_path, exist_ok=True)
+            filename = os.path.join(cycle_path, os.path.splitext(self.filename)[0] + ".csv")
+            result = np.column_stack([segment[:, 1], segment[:, 2], baseline, segment[:, 2] - baseline])
+            try:
+                np.savetxt(filename, result, delimiter=',', header="Temperature,HeatFlow,Baseline,Corrected", comments='')
+            except Exception as e:
+                self.logger.error(f"保存基线校正结果失败: {e}")
+
+    def find_transitions(self) -> None:
+        """检测当前文件各循环段的转变，结果追加到 transitions（列名带单位）"""
+        temperature_unit = self.heads.get(2, "Temperature/°C").split("/", 1)[-1]
+        flow_head = self.heads.get(3, "Heat Flow/W/g")
+        flow_unit = flow_head.split("/", 1)[1] if "/" in flow_head else "W/g"
+        energy_unit = re.sub("W", "J", flow_unit, count=1)
+        time_factor = 60.0 if self.heads.get(1, "Time/min").split("/", 1)[-1].startswith("min") else 1.0
+        
+        name = os.path.splitext(self.filename)[0]
+        for row in detect_transitions(self.data_seg, self.segment_features["heating"], self.exo_up, time_factor):
+            self.transitions.append({
+                "File": name,
+                "Cycle": row["Cycle"],
+                "Direction": row["Direction"],
+                "Transition": row["Transition"],
+                f"Start ({temperature_unit})": row["Start"],
+                f"Peak ({temperature_unit})": row["Peak"],
+                f"End ({temperature_unit})": row["End"],
+                f"ΔH ({energy_unit})": row["Enthalpy"],
+                f"Step ({flow_unit})": row["Step"],
+            })
+
+    def transition_table(self) -> pd.DataFrame:
+        """汇总本次运行的转变检测结果
+        
+        Returns:
+            每个转变一行的表格
+        """
+        return pd.DataFrame(self.transitions)
+
+    def output_transitions(self) -> None:
+        """将转变检测结果写入 DSC_Result/transitions.csv"""
+        if not self.transitions:
+            return
+        os.makedirs(self.result_dir, exist_ok=True)
+        path = os.path.join(self.result_dir, DSC_TRANSITIONS_FILE)
+        try:
+            self.transition_table().to_csv(path, index=False, encoding="utf-8-sig", float_format="%.4f")
+            self.logger.info(f"转变检测结果已保存: {path}")
+        except Exception as e:
+            self.logger.error(f"保存转变检测结果失败: {e}", show_ui=True)
+
+    def store_cycles(self, name: str) -> None:
+        """将当前文件各段的降采样副本及段特征存入 cycle_store，供叠加图直接使用
+        
+        Args:
+            name: 曲线名称（文件名去掉扩展名）
+        """
+        for i, preview in enumerate(self.previews):
+            if len(preview) == 0:
+                continue
+            self.cycle_store.setdefault(i, {})[name] = (preview, self.preview_features[i])
+
+    def release(self) -> None:
+        """释放当前文件的文本和数值数据（输出写出之后调用），保留表头、方法和区域等元数据"""
+        self.lines = []
+        self.data = None
+        self.data_seg = []
+        self.baselines = []
+        self.previews = []
+
+    def _iter_data_lines(self) -> Iterator[str]:
+        """逐行读取 StartOfData 之后的数据行（分块模式）
+        
+        Yields:
+            去除首尾空白后的非空行
+        """
+        with self.source.open(self.filename, encoding=self.encoding, errors='replace') as file:
+            for line in file:
+                if "StartOfData" in line:
+                    break
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield line
+
+    def _parse_data_rows(self, rows: Iterable[str]) -> Optional[NDArray[np.float32]]:
+        """解析数据区，按分隔符划分循环区域并分块转换为数组
+        
+        以 -2 开头的行为循环分隔符；每个区域取 [起始时间 + 左侧裁剪, 结束时间 - 右侧裁剪 - 等温时间]。
+        数据行每 DSC_CHUNK_ROWS 行转换一次，避免同时持有全部行的字符串列表；
+        只保留作图和导出用到的前三列（时间、温度、热流）。
+        
+        Args:
+            rows: 数据行（StartOfData 之后）
         
-        data_lines = self.lines[table_pos + 1:]
+        Returns:
+            float32 数据数组，转换失败时返回None
+        """
+        chunks: List[NDArray[np.float32]] = []
+        chunk: List[List[str]] = []
+        error: Optional[ValueError] = None
+        last_time: Optional[str] = None  # 最近一行数据的时间（字符串，用到时再转换）
+        current_start_time = 0.0
+        count_cycle = 3
+        first_row = True
+        after_separator = False
         
         # 直接遍历所有数据行，不再进行前1000行抽样检查，防止漏掉靠后的分隔符
-        for pos, line in enumerate(data_lines):
+        for line in rows:
             l = line.split("\t")
-            # 检查第一列是否为分隔符 (通常是 -2.000000)
-            # 使用 startswith("-2") 或 float转换判断，避免误判
-            is_separator = False
-            if l and len(l) > 0:
-                val_str = l[0].strip()
-                if val_str.startswith("-2"):
-                    is_separator = True
+            if first_row:
+                first_row = False
+                try:
+                    current_start_time = float(l[0])
+                    if 1 in self.method:
+                        current_start_time += self.method[1][3]
+                except (ValueError, IndexError):
+                    current_start_time = 0
+            if after_separator:
+                # 分隔符后的第一行为下一区域的起始时间
+                after_separator = False
+                try:
+                    current_start_time = float(l[0])
+                except (ValueError, IndexError):
+                    pass
             
-            if is_separator:
+            # 检查第一列是否为分隔符 (通常是 -2.000000)
+            if l[0].strip().startswith("-2"):
                 try:
-                    if table:
-                        end_time = float(table[-1][0])
-                    else:
-                        end_time = current_start_time
-                    
-                    left_side = current_start_time + self.left_length
+                    end_time = float(last_time) if last_time is not None else current_start_time
                     right_side = end_time - self.right_length
                     if count_cycle in self.method:
                         right_side -= self.method[count_cycle][3]
-                    
-                    self.region.append([left_side, right_side])
-                    
-                    if pos + 1 < len(data_lines):
-                        next_line = data_lines[pos + 1]
-                        next_l = next_line.split("\t")
-                        if next_l and len(next_l) > 0:
-                            current_start_time = float(next_l[0])
-                    
+                    self.region.append([current_start_time + self.left_length, right_side])
+                    after_separator = True
                     count_cycle += 3
-                except (ValueError, IndexError):
+                except ValueError:
                     pass
                 continue
             
-            # 只有非分隔符行才加入 table
+            # 只有非分隔符行才加入数据
             if len(l) >= 2: # 确保至少有时间和温度两列
-                table.append(l)
-
+                chunk.append(l[:3])
+                last_time = l[0]
+                if len(chunk) >= DSC_CHUNK_ROWS:
+                    if error is None:
+                        try:
+                            chunks.append(np.array(chunk, dtype="float32"))
+                        except ValueError as e:
+                            error = e
+                    chunk = []
+        
+        if chunk and error is None:
+            try:
+                chunks.append(np.array(chunk, dtype="float32"))
+            except ValueError as e:
+                error = e
+        
         # 处理最后一个区域
-        if table:
+        if last_time is not None:
             try:
-                last_time = float(table[-1][0])
-                left_side = current_start_time + self.left_length
-                right_side = last_time - self.right_length
-                self.region.append([left_side, right_side])
-            except (ValueError, IndexError):
+                self.region.append([current_start_time + self.left_length, float(last_time) - self.right_length])
+            except ValueError:
                 pass
         
-        if peak_pos != 0:   
-            for i in range(len(self.region) - 1):
-                if peak_pos + i < len(self.lines):
-                    self.peak.append(list(filter(None, self.lines[peak_pos + i].split(" ")))
-                                    )
-        
         try:
-            valid_table = [row for row in table if len(row) >= 2]
-            self.data = np.array(valid_table, dtype="float32")
-            
-            for region in self.region:
-                left_side, right_side = region
-                if self.data.size > 0 and self.data.shape[1] > 0:
-                    segment = self.data[np.where((self.data[:,0] > left_side) & (self.data[:,0] < right_side))]
-                    self.data_seg.append(segment)
+            if error is not None:
+                raise error
+            return np.concatenate(chunks) if chunks else np.array([], dtype="float32")
         except ValueError as e:
             self.logger.error(f"数据转换失败: {e}")
+            return None
 
     def save_data_seg(self) -> None:
         """保存切片数据"""
@@ -1622,193 +4105,261 @@ class DSCAnalyzer(BaseAnalyzer):
             if data.size == 0:
                 continue
                 
-            plt.cla()
-            fig = plt.figure(dpi=FIGURE_DPI, figsize=FIGURE_SIZE_WITHOUT_TABLE)
-            if self.transparent_back:
-                fig.patch.set_alpha(0.0)
+            with self.timer.stage("figure"):
+                plt.cla()
+                fig = plt.figure(dpi=FIGURE_DPI, figsize=FIGURE_SIZE_WITHOUT_TABLE)
+                if self.transparent_back:
+                    fig.patch.set_alpha(0.0)
             
-            ax = fig.add_subplot(111)
+                ax = fig.add_subplot(111)
             
-            x = data[:,1]
-            y = data[:,2]
+                x = data[:,1]
+                y = data[:,2]
+                feature = self.segment_features[num]
             
-            # 如果勾选了峰始终向上
-            if self.peaks_upward and len(x) > 1:
-                # 根据温度变化判断：升温(吸热)峰向下，降温(放热)峰向上
-                # 如果是升温过程(x[-1] > x[0])，则翻转Y轴使峰向上
-                if x[-1] > x[0]:
-                    y = -y
+                baseline = self.baselines[num] if num < len(self.baselines) else None
             
-            # 如果勾选了峰居中
-            if self.center_peak and len(x) > 1:
-                # 寻找峰值位置
-                # 如果peaks_upward为True，峰一定是向上的(max)
-                # 如果peaks_upward为False，需要判断峰的方向
-                peak_idx = 0
-                if self.peaks_upward:
-                    peak_idx = np.argmax(y)
-                else:
-                    # 简单判断：离中位数最远的点
-                    y_centered = y - np.median(y)
-                    if np.abs(np.min(y_centered)) > np.abs(np.max(y_centered)):
-                        peak_idx = np.argmin(y)
-                    else:
-                        peak_idx = np.argmax(y)
-                
-                peak_x = x[peak_idx]
-                span = max(x) - min(x)
-                plt.xlim(peak_x - span/2, peak_x + span/2)
+                # 如果勾选了峰始终向上
+                if self.peaks_upward and len(x) > 1:
+                    # 根据温度变化判断：升温(吸热)峰向下，降温(放热)峰向上
+                    if feature["heating"]:
+                        y = -y
+                        if baseline is not None:
+                            baseline = -baseline
+            
+                # 如果勾选了峰居中
+                if self.center_peak and len(x) > 1:
+                    peak_x = x[segment_peak_index(feature, self.peaks_upward)]
+                    span = feature["xmax"] - feature["xmin"]
+                    plt.xlim(peak_x - span/2, peak_x + span/2)
 
-            plt.plot(x, y, color=self.curve_color, linewidth=self.line_width)
+                plt.plot(x, y, color=self.curve_color, linewidth=self.line_width)
+                if baseline is not None:
+                    plt.plot(x, baseline, color="#808080", linestyle="--", linewidth=self.line_width)
             
-            # 设置坐标轴粗细
-            for spine in ax.spines.values():
-                spine.set_linewidth(self.axis_width)
+                # 设置坐标轴粗细
+                for spine in ax.spines.values():
+                    spine.set_linewidth(self.axis_width)
             
-            xlabel = self.heads.get(2, "Temperature")
-            ylabel = self.heads.get(3, "Heat Flow")
+                xlabel = self.heads.get(2, "Temperature")
+                ylabel = self.heads.get(3, "Heat Flow")
             
-            font1 = {"size": self.axis_font_size, "weight":"bold", "fontname": "Arial"}
-            plt.xlabel(xlabel, labelpad = 4, fontdict = font1)
-            plt.ylabel(ylabel, labelpad = 4, fontdict = font1)
-            plt.xticks(weight = 'bold')
-            plt.yticks(weight = 'bold')
+                font1 = {"size": self.axis_font_size, "weight":"bold", "fontname": "Arial"}
+                plt.xlabel(xlabel, labelpad = 4, fontdict = font1)
+                plt.ylabel(ylabel, labelpad = 4, fontdict = font1)
+                plt.xticks(weight = 'bold')
+                plt.yticks(weight = 'bold')
             
             pic_subdir = os.path.join(self.pic_dir, os.path.splitext(self.filename)[0])
             if not os.path.exists(pic_subdir):
                 os.makedirs(pic_subdir, exist_ok=True)
                 
-            plt.savefig(os.path.join(pic_subdir, f"Cycle {num + 1}.png"), transparent=self.transparent_back)
+            # 从 pyplot 中分离后交给后台写入器绘制、编码
             plt.close(fig)
+            with self.timer.stage("savefig"):
+                self.figure_writer.submit(fig, os.path.join(pic_subdir, self.figure_name(f"Cycle {num + 1}")),
+                                          self.transparent_back, self.figure_format, self.png_compress_level)
+        # 分块读取的大文件不在后台保留整段数据
+        if self.streaming:
+            self.flush_figures()
+
+    def cycle_curves(self, index: int) -> List[Tuple[str, NDArray, np.void]]:
+        """收集某个循环的全部曲线（降采样副本）
+        
+        Args:
+            index: 循环序号（从0开始）
+        
+        Returns:
+            (名称, 温度/热流数组, 段特征) 列表
+        """
+        return [(name, xy, feature) for name, (xy, feature) in self.cycle_store.get(index, {}).items()]
+
+    def cycle_indices(self) -> List[int]:
+        """获取需要绘制叠加图的循环序号（按序号排列）"""
+        return sorted(self.cycle_store)
 
     def cycle_draw(self) -> None:
         """绘制循环叠加图"""
         import matplotlib.pyplot as plt
         
-        cycle_list = glob.glob(os.path.join(self.cycle_dir, 'Cycle*'))
+        cycle_list = self.cycle_indices()
         
         # 如果显示图片，在UI中创建标签页
         tabs = None
         if self.display_pic and cycle_list:
-            tab_list = [f"Cycle{i + 1}" for i in range(len(cycle_list))]
+            tab_list = [f"Cycle{i + 1}" for i in cycle_list]
             tabs = st.tabs(tab_list)
         
-        for pro, cycle_path in enumerate(cycle_list):
-            plt.cla()
-            fig = plt.figure(dpi=300, figsize=(16, 8))
-            labels = []
+        settings = {"peaks_upward": self.peaks_upward, "center_peak": self.center_peak,
+                    "color_list": self.color_list, "size": CYCLE_FIGURE_SIZE, "dpi": FIGURE_DPI}
+        for pro, index in enumerate(cycle_list):
+            curves = self.cycle_curves(index)
             
-            csv_files = glob.glob(os.path.join(cycle_path, '*.csv'))
+            def draw():
+                plt.cla()
+                fig = plt.figure(dpi=FIGURE_DPI, figsize=CYCLE_FIGURE_SIZE)
+                labels = []
             
-            # 用于计算平均峰位置
-            peak_x_list = []
-            all_x_min = []
-            all_x_max = []
+                # 用于计算平均峰位置
+                peak_x_list = []
+                spans = []
             
-            for num, file in enumerate(csv_files):
-                try:
-                    data = np.loadtxt(file, delimiter=',')
-                    name = os.path.splitext(os.path.basename(file))[0]
-                    
-                    x = data[:,0]
-                    y = data[:,1]
-                    
+                for num, (name, xy, feature) in enumerate(curves):
+                    x = xy[:,0]
+                    y = xy[:,1]
+                
                     if len(x) <= 1:
                         continue
 
                     # 如果勾选了峰始终向上
                     if self.peaks_upward:
                         # 根据温度变化判断：升温(吸热)峰向下，降温(放热)峰向上
-                        # 如果是升温过程(x[-1] > x[0])，则翻转Y轴使峰向上
-                        if x[-1] > x[0]:
+                        if feature["heating"]:
                             y = -y
-                    
+                
                     # 收集峰位置信息用于居中
                     if self.center_peak:
-                        peak_idx = 0
-                        if self.peaks_upward:
-                            peak_idx = np.argmax(y)
-                        else:
-                            y_centered = y - np.median(y)
-                            if np.abs(np.min(y_centered)) > np.abs(np.max(y_centered)):
-                                peak_idx = np.argmin(y)
-                            else:
-                                peak_idx = np.argmax(y)
-                        peak_x_list.append(x[peak_idx])
-                        all_x_min.append(min(x))
-                        all_x_max.append(max(x))
-                    
+                        peak_x_list.append(x[segment_peak_index(feature, self.peaks_upward)])
+                        spans.append(feature["xmax"] - feature["xmin"])
+                
                     color_idx = num % len(self.color_list)
                     plt.plot(x, y, c=self.color_list[color_idx], label=name)
                     labels.append(name)
-                except Exception as e:
-                    self.logger.warning(f"读取CSV失败 {file}: {e}")
-
-            # 应用峰居中
-            if self.center_peak and peak_x_list:
-                avg_peak_x = np.mean(peak_x_list)
-                # 计算平均跨度
-                if all_x_min and all_x_max:
-                    avg_span = np.mean(np.array(all_x_max) - np.array(all_x_min))
+
+                # 应用峰居中
+                if self.center_peak and peak_x_list:
+                    avg_peak_x = np.mean(peak_x_list)
+                    avg_span = np.mean(spans)
                     plt.xlim(avg_peak_x - avg_span/2, avg_peak_x + avg_span/2)
 
-            if labels:
-                plt.legend(labels)
-                
+                if labels:
+                    plt.legend(labels)
+                return fig
+            
+            # 绘图数据摘要：各曲线的名称、降采样数据和段特征
+            digest = hashlib.sha1()
+            for name, xy, feature in curves:
+                digest.update(str(name).encode("utf-8") + b"\0")
+                digest.update(repr(xy.shape).encode("utf-8"))
+                digest.update(np.ascontiguousarray(xy).tobytes())
+                digest.update(feature.tobytes())
+            save_path = None
             if self.save_cycle_pic:
-                plt.savefig(os.path.join(cycle_path, "result.png"))
+                cycle_path = os.path.join(self.cycle_dir, f"Cycle{index + 1}")
+                os.makedirs(cycle_path, exist_ok=True)
+                save_path = os.path.join(cycle_path, self.figure_name("result"))
+            self.render_figure("dsc_cycle", digest.hexdigest(), settings, draw, save_path=save_path,
+                               display=bool(self.display_pic and tabs), container=tabs[pro] if tabs else None)
             
             # 进度更新
             if self.progress_callback:
                 self.progress_callback((pro + 1) / len(cycle_list), 
                                      "画图进度 {}/{} {:.2f}%".format(pro + 1, len(cycle_list), (pro + 1) * 100/ len(cycle_list)))
+
+    def process_file(self, filename: str, streaming: bool = False) -> None:
+        """处理单个文件：读取、预处理、保存切片并分循环作图
         
-            if self.display_pic and tabs:
-                with tabs[pro]:
-                    st.pyplot(fig)
-            else:
-                plt.close(fig)
+        Args:
+            filename: 文件名
+            streaming: 是否分块读取数据区
+        """
+        if not self.read_file(filename, streaming=streaming):
+            return
+        if self.info_callback:
+            self.info_callback(f"预处理文件: {filename}...")
+        with self.timer.stage("parse"):
+            self.preprocess()
+        
+        if self.fit_segment_data:
+            if self.info_callback:
+                self.info_callback(f"基线校正: {filename}...")
+            with self.timer.stage("compute"):
+                self.fit_baselines()
+            with self.timer.stage("export"):
+                self.save_baselines()
+        
+        if self.analyze_transitions:
+            if self.info_callback:
+                self.info_callback(f"转变分析: {filename}...")
+            with self.timer.stage("compute"):
+                self.find_transitions()
+        
+        if self.info_callback:
+            self.info_callback(f"数据切片: {filename}...")
+        
+        if self.save_seg_mode:
+            if self.info_callback:
+                self.info_callback(f"保存切片数据: {filename}...")
+            with self.timer.stage("export"):
+                self.save_data_seg()
+            
+        if self.draw_seg_mode:
+            if self.info_callback:
+                self.info_callback(f"分循环做图: {filename}...")
+            self.draw_img()
+        
+        # 降采样副本大小与文件大小无关，分块读取的文件同样存入内存
+        if self.draw_cycle:
+            self.store_cycles(os.path.splitext(filename)[0])
+        self.release()
 
     def run(self) -> bool:
         """运行DSC分析"""
         self.clear_dir()
+        self.cycle_store = {}
+        self.transitions = []
         if self.info_callback:
             self.info_callback("处理原数据...")
             
-        file_list = glob.glob(os.path.join(self.data_path, "*.txt"))
+        file_list = self.source.files("*.txt")
         if not file_list:
             self.logger.warning("数据文件夹中没有相应文件", show_ui=True)
             return False
             
-        for pro, file_path in enumerate(file_list):
-            filename = os.path.basename(file_path)
-            if self.read_file(filename):
-                if self.info_callback:
-                    self.info_callback(f"预处理文件: {filename}...")
-                self.preprocess()
-                
-                if self.info_callback:
-                    self.info_callback(f"数据切片: {filename}...")
-                
-                if self.save_seg_mode:
-                    if self.info_callback:
-                        self.info_callback(f"保存切片数据: {filename}...")
-                    self.save_data_seg()
-                    
-                if self.draw_seg_mode:
-                    if self.info_callback:
-                        self.info_callback(f"分循环做图: {filename}...")
-                    self.draw_img()
+        self.timer.reset()
+        self.run_rss_mb = current_rss_mb() or 0.0
+        self.source.prefetch(file_list)
+        deferred = []  # 超出内存预算、推迟到最后处理的文件
+        for pro, filename in enumerate(file_list):
+            self.logger.set_file(filename)
+            self.timer.set_file(filename)
+            mode = self.memory_mode(filename)
+            if mode == "defer":
+                self.logger.warning(f"文件 {filename} 超出内存预算 {self.memory_budget_mb:.0f} MB，推迟处理")
+                deferred.append(filename)
+            else:
+                if mode == "stream":
+                    self.logger.info(f"文件 {filename} 超出内存预算，改为分块读取")
+                self.process_file(filename, streaming=mode == "stream")
             
             if self.progress_callback:
                 self.progress_callback((pro + 1) / len(file_list), 
                                      "处理进度 {}/{} {:.2f}%".format(pro + 1, len(file_list), (pro + 1) * 100/ len(file_list)))
+        
+        # 推迟的文件在其余文件处理完、释放数据后分块处理
+        for filename in deferred:
+            self.logger.set_file(filename)
+            self.timer.set_file(filename)
+            self.reset()
+            gc.collect()
+            if self.memory_mode(filename) == "defer":
+                # 分块读取是内存占用最小的方式，仍超出预算时照常处理而不丢弃文件
+                self.logger.warning(f"文件 {filename} 仍超出内存预算，以分块读取处理", show_ui=True)
+            self.process_file(filename, streaming=True)
+        self.logger.flush_ui()
+        self.timer.set_file(TRACE_BATCH_LABEL)
+        
+        if self.analyze_transitions:
+            with self.timer.stage("export"):
+                self.output_transitions()
 
         if self.draw_cycle:
             if self.info_callback:
                 self.info_callback("绘制各循环叠加图...")
             self.cycle_draw()
         
+        self.flush_figures()
+        self.timer.write_trace()
         return True
 
 
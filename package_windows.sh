@@ -142,6 +142,8 @@ cp main.py "$OUTPUT_DIR/$PACKAGE_NAME/"
 cp ui.py "$OUTPUT_DIR/$PACKAGE_NAME/"
 cp i18n.py "$OUTPUT_DIR/$PACKAGE_NAME/"
 cp cnames.py "$OUTPUT_DIR/$PACKAGE_NAME/"
+cp caching.py "$OUTPUT_DIR/$PACKAGE_NAME/"
+cp data_source.py "$OUTPUT_DIR/$PACKAGE_NAME/"
 cp run_main.py "$OUTPUT_DIR/$PACKAGE_NAME/"
 cp requirements.txt "$OUTPUT_DIR/$PACKAGE_NAME/"
 cp README.md "$OUTPUT_DIR/$PACKAGE_NAME/"
@@ -297,7 +299,7 @@ echo [Step 4] Upgrading pip and installing tools...
 echo.
 echo [Step 5] Installing application dependencies...
 echo This may take 5-10 minutes, please be patient...
-echo Installing: streamlit numpy pandas matplotlib plottable openpyxl
+echo Installing: streamlit numpy pandas matplotlib openpyxl psutil
 echo.
 
 "%~dp0python\python.exe" -m pip install -r requirements.txt --no-warn-script-location
@@ -309,8 +311,8 @@ if errorlevel 1 (
     "%~dp0python\python.exe" -m pip install numpy --no-warn-script-location
     "%~dp0python\python.exe" -m pip install pandas --no-warn-script-location
     "%~dp0python\python.exe" -m pip install matplotlib --no-warn-script-location
-    "%~dp0python\python.exe" -m pip install plottable --no-warn-script-location
     "%~dp0python\python.exe" -m pip install openpyxl --no-warn-script-location
+    "%~dp0python\python.exe" -m pip install psutil --no-warn-script-location
 )
 
 echo.
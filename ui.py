@@ -8,17 +8,39 @@ import time
 import shutil
 from typing import TYPE_CHECKING
 from i18n import get_i18n, t
+from data_source import is_data_source
 import inspect
 
 if TYPE_CHECKING:
     from main import MolecularWeightAnalyzer, GPCAnalyzer, DSCAnalyzer
 
-from main import APP_VERSION
+from main import (APP_VERSION, BASELINE_LAM, DSC_EXO_UP, FIGURE_CACHE_DIR_NAME, FIGURE_FORMATS, MW_REPORT_FORMATS,
+                  PROFILE_MODES, figure_cache, resolve_figure_format, resolve_png_compress_level, resolve_profile_mode,
+                  resolve_memory_budget, resolve_trace_memory)
 
 # 全局变量
 i18n = get_i18n()
 
 
+def render_stage_timing(analyzer) -> None:
+    """渲染分析器各阶段耗时汇总表
+    
+    Args:
+        analyzer: 已运行的分析器实例
+    """
+    if analyzer.profile_files:
+        st.caption(t("profile_saved", os.path.dirname(analyzer.profile_files[0])))
+    summary = analyzer.timer.summary()
+    if summary.empty:
+        return
+    with st.expander(t("stage_timing")):
+        st.dataframe(summary.style.format("{:.3f}"))
+    memory = analyzer.timer.memory_summary()
+    if not memory.empty:
+        with st.expander(t("memory_usage")):
+            st.dataframe(memory.style.format("{:.1f}"))
+
+
 def render_dsc_ui(default_dir: str, AnalyzerClass: type) -> None:
     """渲染DSC分析UI标签页
     
@@ -27,26 +49,34 @@ def render_dsc_ui(default_dir: str, AnalyzerClass: type) -> None:
         AnalyzerClass: DSC分析器类
     """
     
-    datapath_dsc = st.text_input(t("data_folder"), value=default_dir, placeholder=t("data_folder"), key="datapath_dsc")
-    if not os.path.isdir(datapath_dsc):
+    datapath_dsc = st.text_input(t("data_folder"), value=default_dir, placeholder=t("data_folder"), key="datapath_dsc",
+                                 help=t("data_folder_help"))
+    if not is_data_source(datapath_dsc):
         st.warning(t("invalid_path"))
         
     # 参数选择
     saveSegMode_col, drawSegMode_col, drawCycle_col, displayPic_col, saveCyclePic_col, peaksUpward_col, testMode_col = st.columns(spec=7)
     saveSegMode = saveSegMode_col.checkbox(t("save_segment_data"), value=True)
+    analyzeTransitions = saveSegMode_col.checkbox(t("analyze_transitions"), value=False)
     drawSegMode = drawSegMode_col.checkbox(t("draw_segment_data"), value=True)
+    fitSegment = drawSegMode_col.checkbox(t("fit_segment_data"), value=False)
     drawCycle = drawCycle_col.checkbox(t("draw_cycle"), value=saveSegMode, disabled=not saveSegMode)
     displayPic = displayPic_col.checkbox(t("display_cycle"), value=saveSegMode and drawCycle, disabled=not (saveSegMode and drawCycle))
     saveCyclePic = saveCyclePic_col.checkbox(t("save_cycle"), value=saveSegMode and drawCycle, disabled=not (saveSegMode and drawCycle))
     peaksUpward = peaksUpward_col.checkbox(t("peaks_upward"), value=False)
     centerPeak = peaksUpward_col.checkbox(t("center_peak"), value=False)
     testMode = testMode_col.checkbox(t("test_mode"), value=False, disabled=True)
+    exoUp = testMode_col.checkbox(t("exo_up"), value=DSC_EXO_UP, disabled=not analyzeTransitions)
 
     leftSide_col, rightSide_col = st.columns(spec=2)
     leftSide = leftSide_col.slider(label=t("left_boundary"), min_value=0.0, max_value=3.0, value=0.5, step=0.1)
     rightSide = rightSide_col.slider(label=t("right_boundary"), min_value=0.0, max_value=3.0, value=0.5, step=0.1)
+    baselineLam = BASELINE_LAM
+    if fitSegment:
+        baselineLam = st.number_input(t("baseline_lambda"), min_value=1.0, value=BASELINE_LAM, format="%.0e",
+                                      help=t("baseline_lambda_help"))
     
-    avilible = any([saveSegMode, drawSegMode, drawCycle, saveCyclePic, displayPic])
+    avilible = any([saveSegMode, drawSegMode, drawCycle, saveCyclePic, displayPic, fitSegment, analyzeTransitions])
 
     if not avilible:
         st.warning(t("select_at_least_one"))
@@ -65,7 +95,12 @@ def render_dsc_ui(default_dir: str, AnalyzerClass: type) -> None:
                       draw_seg_mode=drawSegMode, draw_cycle=drawCycle, display_pic=displayPic, 
                       save_cycle_pic=saveCyclePic, peaks_upward=peaksUpward, center_peak=centerPeak,
                       left_length=leftSide, right_length=rightSide,
-                      progress_callback=progress_callback, info_callback=info_callback)
+                      progress_callback=progress_callback, info_callback=info_callback,
+                      memory_budget_mb=st.session_state.get("memory_budget_mb"),
+                      fit_segment_data=fitSegment, baseline_lam=baselineLam,
+                      analyze_transitions=analyzeTransitions, exo_up=exoUp,
+                      figure_format=st.session_state.get("figure_format"),
+                      png_compress_level=st.session_state.get("png_compress_level"))
     
     # 画图设置
     render_dsc_settings(dsc)
@@ -75,10 +110,14 @@ def render_dsc_ui(default_dir: str, AnalyzerClass: type) -> None:
     if run_col_dsc.button(t("run"), key="run_col_dsc", disabled=not avilible):
         task_start_time = time.time()
         infoBar_dsc = infoBar_col_dsc.empty()
-        result_dsc = dsc.run()
+        result_dsc = dsc.run_profiled(st.session_state.get("profile_mode"), st.session_state.get("trace_memory"))
         infoBar_dsc.text(t("complete", time.time() - task_start_time))
+        if dsc.transitions:
+            st.subheader(t("transition_results"))
+            st.dataframe(dsc.transition_table())
+        render_stage_timing(dsc)
 
-    if os.path.isdir(datapath_dsc):
+    if is_data_source(datapath_dsc):
         if openDir_dsc_col.button(t("open_folder"), key="openDir_dsc_col"):
             dsc.open_folder(dsc.rootdir)
 
@@ -157,8 +196,10 @@ def render_mw_region_settings(mw: 'MolecularWeightAnalyzer') -> None:
 
     with rangeSet:
         selectedRegion = st.multiselect(t("split_position"), mw.segmentpos, default=mw.selectedpos)
-        selectedRegion.sort()
-        mw.selectedpos = selectedRegion
+        # multiselect 按点击顺序返回，区间统计需要升序且不重复的边界
+        mw.selectedpos = sorted(set(selectedRegion))
+        # GPC 的批量统计按同一组分割位置分区间，不必等到保存设置
+        st.session_state["selectedpos"] = mw.selectedpos
         
         new_region_col, addRegion_col, *_ = st.columns(spec=6)
         new_region = new_region_col.number_input(t("new_split_position"), min_value=0, max_value=1000000000)
@@ -174,13 +215,20 @@ def render_mw_ui(default_dir: str, AnalyzerClass: type) -> None:
         AnalyzerClass: 分子量分析器类
     """
     
-    datapath_mw = st.text_input(t("data_folder"), value=default_dir, max_chars=100, key="datapath_mw")
-    if not os.path.isdir(datapath_mw):
+    datapath_mw = st.text_input(t("data_folder"), value=default_dir, max_chars=100, key="datapath_mw",
+                                help=t("data_folder_help"))
+    if not is_data_source(datapath_mw):
         st.warning(t("invalid_path"))
 
-    savePic_mw_col, displayPic_mw_col, *_ = st.columns(spec=8)
+    savePic_mw_col, displayPic_mw_col, incremental_mw_col, grid_mw_col, report_mw_col, *_ = st.columns(spec=8)
     savePic_mw = savePic_mw_col.checkbox(t("save_image"), value=True, key="savePic_mw_col")
     displayPic_mw = displayPic_mw_col.checkbox(t("display_image"), value=False, key="displayPic_mw_col")
+    incremental_mw = incremental_mw_col.checkbox(t("incremental_build"), value=False, disabled=not savePic_mw,
+                                                 help=t("incremental_build_help"), key="incremental_mw_col")
+    grid_mw = grid_mw_col.checkbox(t("mw_small_multiples"), value=False, help=t("mw_small_multiples_help"), key="grid_mw_col")
+    report_mw = report_mw_col.selectbox(t("mw_report"), ["off"] + MW_REPORT_FORMATS,
+                                        format_func=lambda mode: t(f"mw_report_{mode}"),
+                                        help=t("mw_report_help"), key="report_mw_col")
     
     st.empty()  # output_filename_mw_col
     st.empty()  # fileSelect_mw_col
@@ -193,7 +241,10 @@ def render_mw_ui(default_dir: str, AnalyzerClass: type) -> None:
         progressBar_mw.progress(progress, text)
                 
     mw = AnalyzerClass(datapath_mw, save_picture=savePic_mw, display_picture=displayPic_mw, 
-                                  test_mode=False, progress_callback=progress_callback)
+                                  test_mode=False, progress_callback=progress_callback, incremental=incremental_mw,
+                                  figure_format=st.session_state.get("figure_format"),
+                                  png_compress_level=st.session_state.get("png_compress_level"),
+                                  report_format=report_mw, small_multiples=grid_mw)
     
     # 画图设置
     render_mw_settings(mw)
@@ -205,7 +256,8 @@ def render_mw_ui(default_dir: str, AnalyzerClass: type) -> None:
     run_mw_col, openDir_mw_col, infoBar_mw_col, *_ = st.columns(spec=8)
     
     overlayFile_mw = True
-    if mw.check_dir():
+    # 增量更新只覆盖输入或设置已变化的图片，无需确认
+    if not incremental_mw and mw.check_dir():
         overlayFile_mw = st.checkbox(t("confirm_overwrite"), key="overlayFile_mw_col")
         if not overlayFile_mw:
             st.warning(t("file_exists_warning"))
@@ -213,10 +265,15 @@ def render_mw_ui(default_dir: str, AnalyzerClass: type) -> None:
     if run_mw_col.button(t("run"), key="run_mw_col_mw", disabled=not overlayFile_mw):
         task_start_time = time.time()
         infoBar_mw = infoBar_mw_col.empty()
-        result_mw = mw.run()
+        result_mw = mw.run_profiled(st.session_state.get("profile_mode"), st.session_state.get("trace_memory"))
         infoBar_mw.text(t("complete", time.time() - task_start_time))
+        if mw.skipped_files:
+            st.caption(t("incremental_skipped", len(mw.skipped_files), len(mw.file_list)))
+        if mw.report_files:
+            st.caption(t("mw_report_saved", ", ".join(os.path.basename(path) for path in mw.report_files)))
+        render_stage_timing(mw)
 
-    if os.path.isdir(datapath_mw):
+    if is_data_source(datapath_mw):
         if openDir_mw_col.button(t("open_folder"), key="openDir_mw_col_mw"):
             mw.open_folder(mw.output_dir)
 
@@ -229,16 +286,18 @@ def render_gpc_ui(default_dir: str, AnalyzerClass: type) -> None:
         AnalyzerClass: GPC分析器类
     """
     
-    datapath_gpc = st.text_input(t("data_folder"), value=default_dir, max_chars=100, key="datapath_gpc")
-    if not os.path.isdir(datapath_gpc):
+    datapath_gpc = st.text_input(t("data_folder"), value=default_dir, max_chars=100, key="datapath_gpc",
+                                help=t("data_folder_help"))
+    if not is_data_source(datapath_gpc):
         st.warning(t("invalid_path"))
 
-    save_file_col, save_picture_col, display_mode_col, save_figure_file_gpc_col, selected_gpc_col, draw_mw_col, *_ = st.columns(spec=8)
+    save_file_col, save_picture_col, display_mode_col, save_figure_file_gpc_col, selected_gpc_col, save_batch_stats_col, *_ = st.columns(spec=8)
     save_file = save_file_col.checkbox(t("save_sample_info"), value=True)
     save_picture = save_picture_col.checkbox(t("save_image"), value=True)
     display_mode = display_mode_col.checkbox(t("display_image"), value=True)
     save_figure_file_gpc = save_figure_file_gpc_col.checkbox(t("save_plot_data"), value=False)
     selected = selected_gpc_col.checkbox(t("select_partial_files"))
+    save_batch_stats = save_batch_stats_col.checkbox(t("save_batch_stats"), value=True)
 
     output_filename = st.text_input(t("output_filename"), value=time.strftime("%Y%m%d", time.localtime()), max_chars=100, key="output_filename", disabled=not (save_file or save_picture))
     overlayFile_col = st.empty()
@@ -258,7 +317,10 @@ def render_gpc_ui(default_dir: str, AnalyzerClass: type) -> None:
     
     gpc = AnalyzerClass(datapath_gpc, output_filename, save_file, save_picture, display_mode, 
                       save_figure_file_gpc, test_mode=False, 
-                      progress_callback=progress_callback, info_callback=info_callback)
+                      progress_callback=progress_callback, info_callback=info_callback,
+                      save_batch_stats=save_batch_stats, segmentpos=st.session_state.get("selectedpos"),
+                      figure_format=st.session_state.get("figure_format"),
+                      png_compress_level=st.session_state.get("png_compress_level"))
 
     if selected:
         gpc.selected_file = fileSelect_col.multiselect(t("file_list"), gpc.read_file_list())
@@ -272,10 +334,11 @@ def render_gpc_ui(default_dir: str, AnalyzerClass: type) -> None:
     if run_gpc_col.button(t("run"), key="run_gpc_col", disabled=not overlayFile):
         task_start_time = time.time()
         infoBar_gpc = infoBar_gpc_col.empty()
-        result_gpc = gpc.run()
+        result_gpc = gpc.run_profiled(st.session_state.get("profile_mode"), st.session_state.get("trace_memory"))
         infoBar_gpc.text(t("complete", time.time() - task_start_time))
+        render_stage_timing(gpc)
 
-    if os.path.isdir(datapath_gpc):
+    if is_data_source(datapath_gpc):
         if openDir_gpc_col.button(t("open_folder"), key="openDir_gpc_col"):
             gpc.open_folder(gpc.output_dir)
 
@@ -287,11 +350,24 @@ def render_other_ui(default_dir: str) -> None:
         default_dir: 默认数据目录
     """
     datapath_other = st.text_input(t("data_folder"), value=default_dir, max_chars=100, key="datapath_other")
+    profile_options = ["off"] + PROFILE_MODES
+    st.selectbox(t("profile_mode"), profile_options, index=profile_options.index(resolve_profile_mode() or "off"),
+                 format_func=lambda mode: t("profile_off") if mode == "off" else mode,
+                 help=t("profile_mode_help"), key="profile_mode")
+    budget_col, trace_col = st.columns(spec=2)
+    budget_col.number_input(t("memory_budget"), min_value=0.0, value=resolve_memory_budget() or 0.0, step=256.0,
+                            help=t("memory_budget_help"), key="memory_budget_mb")
+    trace_col.checkbox(t("trace_memory"), value=resolve_trace_memory(), key="trace_memory")
+    format_col, compress_col = st.columns(spec=2)
+    figure_format = format_col.selectbox(t("figure_format"), FIGURE_FORMATS, index=FIGURE_FORMATS.index(resolve_figure_format()),
+                                         help=t("figure_format_help"), key="figure_format")
+    compress_col.slider(t("png_compress_level"), min_value=0, max_value=9, value=resolve_png_compress_level(),
+                        disabled=figure_format != "png", help=t("png_compress_level_help"), key="png_compress_level")
     if os.path.isdir(datapath_other):
         clear_confirm = st.checkbox(t("clean_folder"), value=False)
         if st.button(t("run_clean"), disabled=not clear_confirm):
             root_dir = os.getcwd()
-            folders_to_clean = ["Mw_output", "GPC_output", "DSC_Cycle", "DSC_Pic"]
+            folders_to_clean = ["Mw_output", "GPC_output", "DSC_Cycle", "DSC_Pic", "DSC_Result", FIGURE_CACHE_DIR_NAME]
             
             for folder in folders_to_clean:
                 folder_path = os.path.join(root_dir, folder)
@@ -309,6 +385,10 @@ def render_other_ui(default_dir: str) -> None:
                                 st.error(f"Failed to delete {file_path}. Reason: {e}")
                     except Exception as e:
                         st.error(f"Error cleaning {folder_path}: {e}")
+            # 磁盘缓存已清空，内存中的图片缓存一并清空
+            cache = figure_cache(root_dir)
+            if cache is not None:
+                cache.clear()
             
             st.success(t("clean_success"))
     else: